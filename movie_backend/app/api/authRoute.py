@@ -2,16 +2,20 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.ext.asyncio import AsyncSession
 from pydantic import BaseModel
-from google.oauth2 import id_token
-from google.auth.transport import requests 
 import os
 
 from app.schemas.userSchema import SignUpRequest, SignUpResponse, TokenResponse
-from app.core.security import create_access_token, hash_password, verify_password
+from app.core.security import (
+    PasswordHasherBusy,
+    create_access_token,
+    hash_password_async,
+    verify_password_async,
+)
 from app.db.database import get_db
 from app.db.models import User
 from app.db.crud import get_user_by_email
 from app.db.crud import create_user_if_not_exists  # ✅ we’ll add this small helper
+from app.services.google_auth import verify_google_id_token
 
 from datetime import timedelta
 
@@ -22,6 +26,14 @@ router = APIRouter(prefix="/auth", tags=["Auth"])
 GOOGLE_CLIENT_ID = os.getenv("GOOGLE_CLIENT_ID")  # ✅ Set this in your .env
 
 
+def _hasher_busy() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Too many sign-in attempts in progress, please retry",
+        headers={"Retry-After": "1"},
+    )
+
+
 # -----------------------------------------------
 # 🧩 1️⃣ Normal Signup
 # -----------------------------------------------
@@ -34,13 +46,18 @@ async def signup(request: SignUpRequest, db: AsyncSession = Depends(get_db)):
         raise HTTPException(status_code=400, detail="Passwords do not match")
 
     name = f"{request.first_name} {request.last_name}"
-    hashed_password = hash_password(request.password)
+    # hand the pooled connection back while bcrypt runs; the session reconnects on commit
+    await db.close()
+    try:
+        hashed_password = await hash_password_async(request.password)
+    except PasswordHasherBusy:
+        raise _hasher_busy()
     new_user = User(email=request.email, password=hashed_password, name=name)
     db.add(new_user)
     await db.commit()
     await db.refresh(new_user)
 
-    access_token = create_access_token({"sub": new_user.email, "name": name})
+    access_token = create_access_token({"sub": new_user.email, "name": name}, user=new_user)
     return {"email": new_user.email, "token": access_token}
 
 
@@ -53,13 +70,19 @@ async def login(
     db: AsyncSession = Depends(get_db)
 ):
     db_user = await get_user_by_email(db, form_data.username)
-    if not db_user or not verify_password(form_data.password, db_user.password):
+    # hand the pooled connection back while bcrypt runs (db_user stays readable, detached)
+    await db.close()
+    try:
+        valid = bool(db_user) and await verify_password_async(form_data.password, db_user.password)  #type: ignore
+    except PasswordHasherBusy:
+        raise _hasher_busy()
+    if not valid:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid credentials",
         )
 
-    access_token = create_access_token({"sub": db_user.email, "name": db_user.name})
+    access_token = create_access_token({"sub": db_user.email, "name": db_user.name}, user=db_user)
     return {"access_token": access_token, "token_type": "bearer"}
 
 
@@ -73,10 +96,8 @@ class GoogleToken(BaseModel):
 @router.post("/google")
 async def google_login(payload: GoogleToken, db: AsyncSession = Depends(get_db)):
     try:
-        # 1️⃣ Verify token
-        idinfo = id_token.verify_oauth2_token(
-            payload.id_token, requests.Request(), GOOGLE_CLIENT_ID
-        )
+        # 1️⃣ Verify token (cached Google certs, checked off the event loop)
+        idinfo = await verify_google_id_token(payload.id_token, GOOGLE_CLIENT_ID)
 
         # 2️⃣ Extract info
         email = idinfo["email"]
@@ -88,7 +109,7 @@ async def google_login(payload: GoogleToken, db: AsyncSession = Depends(get_db))
 
         # 4️⃣ Generate your app’s JWT
         access_token = create_access_token(
-            {"sub": email, "name": name, "picture": picture}
+            {"sub": email, "name": name, "picture": picture}, user=user
         )
 
         # ✅ Return token and user info
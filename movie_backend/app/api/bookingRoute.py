@@ -1,73 +1,203 @@
 # app/api/v1/bookings.py
-from fastapi import APIRouter, Depends, HTTPException, status
+from typing import Optional
+from fastapi import APIRouter, Depends, Header, HTTPException, status
+from fastapi.responses import Response
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.db.database import async_session
-from app.api.deps import get_db, get_current_user
-from app.schemas.bookingSchema import BookingRequest, BookingResponse, CancelBookingRequest, BookingUpdateRequest
-from app.services.booking_pool import TicketPool
+from app.api.deps import get_current_user, get_ticket_pool
+from app.db.database import get_db
+from app.db.replica import read_db
+from app.schemas.bookingSchema import (
+    BookingRequest,
+    BookingResponse,
+    CancelBookingRequest,
+    BookingUpdateRequest,
+    SeatHoldRequest,
+    SeatHoldResponse,
+)
+from app.services.booking_pool import TicketPool, TicketPoolBusy
+from app.services.broadcast import publish_showtime_event
+from app.services.seat_holds import SeatHoldConflict, announce_released_hold_later, create_hold, get_hold, release_hold
+from app.services.seat_codec import COMPACT_MEDIA_TYPE, compact_seat_map, layout_digest, wants_compact
+from app.services.seat_cache import seat_cache
+from app.core.config import settings
 
-from app.db.crud import get_seats_for_showtime, get_booking_by_id
 from sqlalchemy.future import select
+from app.db.crud import with_booking_seats
 from app.db.models import Booking, Movie, ShowTime
+from datetime import datetime, timezone
 
 router = APIRouter(prefix="/bookings", tags=["Bookings"])
 
-# create a global pool instance
-_pool = TicketPool()
+
+def _pool_busy(e: TicketPoolBusy) -> HTTPException:
+    return HTTPException(
+        status_code=e.status_code,
+        detail=str(e),
+        headers={"Retry-After": str(e.retry_after)},
+    )
 
 
 @router.post("/", response_model=BookingResponse)
 async def create_booking_endpoint(
     payload: BookingRequest,
-    db: AsyncSession = Depends(get_db),
-    user=Depends(get_current_user)
+    user=Depends(get_current_user),
+    pool: TicketPool = Depends(get_ticket_pool),
 ):
-    # ✅ Validate seats belong to the showtime
-    seats = await get_seats_for_showtime(db, payload.showtime_id)
-    seats_map = {s.id: s for s in seats}
-    for sid in payload.seat_ids:
-        if sid not in seats_map:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"seat {sid} not found for this showtime"
-            )
-
-    # ✅ Create booking via the TicketPool queue
-    result = await _pool.enqueue_booking(user.id, payload.showtime_id, payload.seat_ids)
+    # ✅ Create booking via the TicketPool queue (it also rejects seats of other showtimes)
+    try:
+        result = await pool.enqueue_booking(user.id, payload.showtime_id, payload.seat_ids)
+    except TicketPoolBusy as e:
+        raise _pool_busy(e)
     if not result.get("success"):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=result.get("message")
         )
 
-    booking_id = result.get("booking_id")
+    return _booking_confirmation(result)
 
-    # ✅ Fetch full info to return to frontend
-    async with async_session() as session:
-        booking = await get_booking_by_id(session, booking_id)
-        showtime = await session.get(ShowTime, booking.showtime_id)
-        movie = await session.get(Movie, showtime.movie_id)
 
+def _booking_confirmation(result: dict) -> dict:
+    # ✅ The pool returns everything the frontend shows, straight from its transaction
     return {
         "success": True,
         "message": "Booked successfully!",
-        "booking_id": booking.id,
-        "movie_title": movie.title,
-        "showtime": showtime.start_time,
-        "hall": showtime.hall,
-        "seats": booking.seats,
-        "total_amount": booking.total_amount,
+        "booking_id": result.get("booking_id"),
+        "movie_title": result.get("movie_title"),
+        "showtime": result.get("showtime"),
+        "hall": result.get("hall"),
+        "seats": result.get("seats"),
+        "total_amount": result.get("total_amount"),
     }
 
 
+# -----------------------------------------------
+# 🪑 Seat holds (checkout phase, Redis only)
+# -----------------------------------------------
+@router.post("/holds", response_model=SeatHoldResponse)
+async def hold_seats_endpoint(
+    payload: SeatHoldRequest,
+    user=Depends(get_current_user),
+    pool: TicketPool = Depends(get_ticket_pool),
+):
+    """Hold seats during checkout without touching Postgres; confirm within SEAT_HOLD_SECONDS."""
+    if not payload.seat_ids:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="no seats specified")
+    if len(payload.seat_ids) > settings.SEAT_HOLD_MAX_SEATS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"at most {settings.SEAT_HOLD_MAX_SEATS} seats can be held"
+        )
+
+    # fast rejection from the booking worker's in-memory seat table when it lives in this
+    # process, otherwise from the seat-map cache (patched by every committed change)
+    state = pool.seat_states.get(payload.showtime_id)
+    if state is None:
+        state = await seat_cache.get_state(payload.showtime_id)
+    missing = state.missing(payload.seat_ids)
+    if missing:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"seat {missing[0]} not found for this showtime"
+        )
+    if state.unavailable(payload.seat_ids):
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="some seats are no longer available")
+
+    try:
+        hold = await create_hold(user.id, payload.showtime_id, payload.seat_ids)
+    except SeatHoldConflict as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+
+    publish_showtime_event(payload.showtime_id, {
+        "type": "seats_updated",
+        "showtime_id": payload.showtime_id,
+        "seat_ids": hold["seat_ids"],
+        "status": "locked",
+    })
+    # unversioned: the listener may skip it here if it is merged into a delta this process already applied
+    seat_cache.apply(payload.showtime_id, [("locked", hold["seat_ids"])])
+    return SeatHoldResponse(
+        hold_id=hold["hold_id"],
+        showtime_id=hold["showtime_id"],
+        seat_ids=hold["seat_ids"],
+        expires_at=datetime.fromtimestamp(hold["expires_at"], tz=timezone.utc),
+    )
+
+
+@router.post("/holds/{hold_id}/confirm", response_model=BookingResponse)
+async def confirm_hold_endpoint(
+    hold_id: str,
+    user=Depends(get_current_user),
+    pool: TicketPool = Depends(get_ticket_pool),
+):
+    """Persist a held selection as a booking through the TicketPool."""
+    hold = await get_hold(hold_id)
+    if not hold or hold["user_id"] != user.id:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Hold not found or expired")
+
+    try:
+        result = await pool.enqueue_booking(user.id, hold["showtime_id"], hold["seat_ids"], hold_id=hold_id)
+    except TicketPoolBusy as e:
+        raise _pool_busy(e)   # the hold stays valid, so the client can retry the confirm
+    if not result.get("success"):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=result.get("message")
+        )
+    await release_hold(hold)
+    return _booking_confirmation(result)
+
+
+@router.delete("/holds/{hold_id}")
+async def release_hold_endpoint(
+    hold_id: str,
+    user=Depends(get_current_user),
+    pool: TicketPool = Depends(get_ticket_pool),
+):
+    hold = await get_hold(hold_id)
+    if not hold or hold["user_id"] != user.id:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Hold not found or expired")
+    await release_hold(hold)
+    # announced through the showtime queue so seats booked meanwhile are not reported free
+    try:
+        await pool.enqueue_hold_expired(hold["showtime_id"], hold["seat_ids"])
+    except TicketPoolBusy as e:
+        # the seats are free already; the reaper tells viewers once the pool takes requests again
+        await announce_released_hold_later(hold)
+        raise _pool_busy(e)
+    return {"success": True, "message": "hold released"}
+
+
+@router.get("/requests/{request_id}")
+async def get_request_status(
+    request_id: str,
+    user=Depends(get_current_user),
+    pool: TicketPool = Depends(get_ticket_pool),
+):
+    """Outcome of a request queued on the durable backend (e.g. after a timeout or restart)."""
+    if pool.durable is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Request tracking is not enabled")
+    stored = await pool.durable.get_result(request_id)
+    if stored is None:
+        return {"request_id": request_id, "status": "pending"}
+    if stored["user_id"] not in (None, user.id):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Request not found")
+    return {"request_id": request_id, "status": "done", "result": stored["result"]}
+
+
 @router.get("/me")
-async def get_my_bookings(db: AsyncSession = Depends(get_db), user=Depends(get_current_user)):
+async def get_my_bookings(
+    # a user checks this right after booking: only a caught-up replica will do
+    db: AsyncSession = Depends(read_db(max_staleness=0.5)),
+    user=Depends(get_current_user),
+):
     query = (
         select(Booking, Movie.title, ShowTime.start_time, ShowTime.id.label("showtime_id"))
         .join(ShowTime, Booking.showtime_id == ShowTime.id)
         .join(Movie, ShowTime.movie_id == Movie.id)
         .where(Booking.user_id == user.id)
+        .options(with_booking_seats())
     )
 
     result = await db.execute(query)
@@ -86,35 +216,51 @@ async def get_my_bookings(db: AsyncSession = Depends(get_db), user=Depends(get_c
     return bookings
 
 @router.get("/showtime/{showtime_id}/seats")
-async def get_seats(showtime_id: int, db: AsyncSession = Depends(get_db)):
-    seats = await get_seats_for_showtime(db, showtime_id)
-    # convert seat objects to JSON friendly
-    res = [
-        {
-            "id": s.id,
-            "row": s.row,
-            "number": s.number,
-            "status": s.status.value,
-            "locked_by": s.locked_by,
-            "locked_until": s.locked_until.isoformat() if s.locked_until else None,   #type: ignore
-            "price": s.price,
-        }
-        for s in seats
-    ]
-    return res
+async def get_seats(
+    showtime_id: int,
+    format: Optional[str] = None,
+    rle: bool = False,
+    layout: Optional[str] = None,
+    accept: Optional[str] = Header(None),
+):
+    # served from the seat-map cache: rendered once per change, not per request
+    state = await seat_cache.get_state(showtime_id)
+    if not len(state):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="No seats found for this showtime")
+
+    # 📦 compact map: layout descriptor (skipped when ?layout=<layout_hash> matches) + packed statuses
+    if wants_compact(format, accept):
+        skip_layout = layout == layout_digest(state)
+        body = await seat_cache.render(
+            showtime_id,
+            f"compact:{skip_layout}:{rle}",
+            lambda state: compact_seat_map(state, known_layout=layout if skip_layout else None, rle=rle),
+        )
+        return Response(body, media_type=COMPACT_MEDIA_TYPE)
+
+    # lock owners are not part of the public map; keys kept for existing clients
+    body = await seat_cache.render(
+        showtime_id,
+        "seats",
+        lambda state: [{**seat, "locked_by": None, "locked_until": None} for seat in state.seats()],
+    )
+    return Response(body, media_type="application/json")
 
 @router.put("/{booking_id}/cancel", response_model=BookingResponse)
 async def cancel_booking_endpoint(
     booking_id: int,
     body: CancelBookingRequest,  # ✅ Now explicitly typed
     user=Depends(get_current_user),
+    pool: TicketPool = Depends(get_ticket_pool),
 ):
-    pool = TicketPool()
-    result = await pool.enqueue_cancel(
-        booking_id=booking_id,
-        user_id=user.id,
-        seat_ids=body.seat_ids,   # ✅ Get list directly from model
-    )
+    try:
+        result = await pool.enqueue_cancel(
+            booking_id=booking_id,
+            user_id=user.id,
+            seat_ids=body.seat_ids,   # ✅ Get list directly from model
+        )
+    except TicketPoolBusy as e:
+        raise _pool_busy(e)
 
     if not result["success"]:
         raise HTTPException(status_code=400, detail=result["message"])
@@ -139,6 +285,7 @@ async def get_booking_by_id_endpoint(
         .join(ShowTime, Booking.showtime_id == ShowTime.id)
         .join(Movie, ShowTime.movie_id == Movie.id)
         .where(Booking.id == booking_id, Booking.user_id == user.id)
+        .options(with_booking_seats())
     )
     result = await db.execute(query)
     record = result.first()
@@ -164,13 +311,16 @@ async def update_booking_endpoint(
     booking_id: int,
     body: BookingUpdateRequest,
     user=Depends(get_current_user),
+    pool: TicketPool = Depends(get_ticket_pool),
 ):
-    pool = TicketPool()
-    result = await pool.enqueue_update(
-        booking_id=booking_id,
-        user_id=user.id,
-        new_seat_ids=body.new_seat_ids,
-    )
+    try:
+        result = await pool.enqueue_update(
+            booking_id=booking_id,
+            user_id=user.id,
+            new_seat_ids=body.new_seat_ids,
+        )
+    except TicketPoolBusy as e:
+        raise _pool_busy(e)
 
     if not result["success"]:
         raise HTTPException(status_code=400, detail=result["message"])
@@ -1,22 +1,43 @@
 # app/api/deps.py
 from fastapi import Depends, HTTPException, status
-from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi.security import OAuth2PasswordBearer 
+from starlette.requests import HTTPConnection
 
+from app.core.config import settings
 from app.core.security import decode_access_token
 from app.db.crud import get_user_by_email
-from app.db.database import get_db
+from app.db.database import async_session
+from app.services.booking_pool import TicketPool
+from app.services.user_cache import AuthUser, cache_user, get_cached_user
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
 
-async def get_current_user(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_db)):
+async def get_current_user(token: str = Depends(oauth2_scheme)) -> AuthUser:
     if not token:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Not authenticated")
     payload = decode_access_token(token)
     email = payload.get("sub")
     if not email:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
-    user = await get_user_by_email(db, email)
-    if not user:
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
+
+    # ⚡ stateless (when enabled): the signed token already says who the caller is.
+    # Claims of tokens issued while it was enabled are not trusted once it is off.
+    user = AuthUser.from_claims(payload) if settings.AUTH_EMBED_USER_CLAIMS else None
+    if user is None:
+        user = get_cached_user(email)
+    if user is None:
+        # a cold cache (or a user changed in this process) reaches the database
+        async with async_session() as db:
+            db_user = await get_user_by_email(db, email)
+        if not db_user:
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
+        user = AuthUser.from_model(db_user)
+        cache_user(user)
+    if not user.is_active:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Inactive user")
     return user
+
+
+# ✅ The application's TicketPool (created and drained by the lifespan in main.py)
+def get_ticket_pool(conn: HTTPConnection) -> TicketPool:
+    return conn.app.state.ticket_pool
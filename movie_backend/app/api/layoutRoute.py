@@ -0,0 +1,47 @@
+# app/api/layoutRoute.py
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.deps import get_current_user
+from app.db.crud import get_hall_layout, get_layout_seats, get_or_create_grid_layout
+from app.db.database import get_db
+from app.db.replica import get_read_db
+from app.schemas.movieSchema import HallLayoutCreate, HallLayoutOut
+
+router = APIRouter(prefix="/layouts", tags=["Layouts"])
+
+
+@router.post("/", response_model=HallLayoutOut)
+async def create_layout_endpoint(payload: HallLayoutCreate, db: AsyncSession = Depends(get_db), user=Depends(get_current_user)):
+    """Store a hall's seat geometry and price tiers once; showtimes then reference it by id."""
+    # admin only
+    if not user.is_admin:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN)
+    layout = payload.layout
+    try:
+        layout_id = await get_or_create_grid_layout(
+            db, payload.name, [r.strip() for r in layout.rows if r.strip()], layout.cols, layout.price,
+            price_tiers=layout.price_tiers, row_categories=layout.row_categories,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    await db.commit()
+    return await _layout_out(db, layout_id)
+
+
+@router.get("/{layout_id}", response_model=HallLayoutOut)
+async def get_layout_endpoint(layout_id: int, db: AsyncSession = Depends(get_read_db)):
+    return await _layout_out(db, layout_id)
+
+
+async def _layout_out(db: AsyncSession, layout_id: int) -> HallLayoutOut:
+    layout = await get_hall_layout(db, layout_id)
+    if not layout:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Layout not found")
+    seats = await get_layout_seats(db, layout_id)
+    return HallLayoutOut(
+        id=layout.id,                       #type: ignore
+        name=layout.name,                   #type: ignore
+        price_tiers=layout.price_tiers,     #type: ignore
+        seats=seats,                        #type: ignore
+    )
@@ -0,0 +1,16 @@
+# app/api/metricsRoute.py
+from fastapi import APIRouter, Depends, HTTPException, status
+
+from app.api.deps import get_current_user
+from app.db.database import pool_stats
+
+router = APIRouter(prefix="/metrics", tags=["Metrics"])
+
+
+@router.get("/db")
+async def db_pool_metrics(user=Depends(get_current_user)):
+    """Checkout wait, hold time and saturation per connection pool (since process start)."""
+    # admin only
+    if not user.is_admin:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN)
+    return {name: stats.snapshot() for name, stats in pool_stats.items()}
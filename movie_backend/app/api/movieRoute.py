@@ -1,20 +1,44 @@
 # app/api/v1/movies.py
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
-from datetime import datetime
+from datetime import date as date_, datetime
+from typing import Optional
 
 from app.db.models import Movie
 from app.db.database import get_db
 from app.api.deps import get_current_user
-from app.schemas.movieSchema import MovieCreate, MovieOut, ShowTimeOut
-from app.db.crud import create_movie, list_movies, create_showtime, bulk_create_seats, get_movie
+from app.api.pagination import decode_cursor, next_cursor_headers
+from app.services.catalog_cache import catalog_cache
+from app.schemas.movieSchema import MovieCreate, MovieOut, SeatLayout, ShowTimeBatchCreate, ShowTimeOut
+from app.db.crud import (
+    MOVIE_ORDERINGS, create_movie, list_movies, create_showtime, create_showtime_seats, bulk_create_showtimes, get_movie,
+    get_hall_layout, get_or_create_grid_layout,
+)
 
 router = APIRouter(
     prefix="/movie",
     tags=["Movie"],
 )
 
+
+class CatalogPage:
+    """Paging and filter query parameters shared by the catalog listings."""
+
+    def __init__(
+        self,
+        cursor: Optional[str] = None,
+        limit: int = Query(20, ge=1, le=100),
+        language: Optional[str] = None,
+        location: Optional[str] = None,
+        date: Optional[date_] = Query(None, description="only movies with a showtime on this day (UTC)"),
+    ):
+        self.cursor = cursor
+        self.limit = limit
+        self.language = language
+        self.location = location
+        self.date = date
+
+
 @router.post("/create", response_model=MovieOut)
 async def create_movie_endpoint(payload: MovieCreate, db: AsyncSession = Depends(get_db), user=Depends(get_current_user)):
     # only admin (example)
@@ -23,6 +47,7 @@ async def create_movie_endpoint(payload: MovieCreate, db: AsyncSession = Depends
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized")
     movie = await create_movie(db, **payload.dict())  #type: ignore
     await db.commit()
+    await catalog_cache.bump()
     await db.refresh(movie)
     return movie
 
@@ -38,72 +63,139 @@ async def update_movie_endpoint(movie_id: int, payload: MovieCreate, db: AsyncSe
         setattr(movie, key, value)
     db.add(movie)
     await db.commit()
+    await catalog_cache.bump()
     await db.refresh(movie)
     return movie
 
 @router.get("/list", response_model=list[MovieOut])
-async def list_movies_endpoint(skip: int = 0, limit: int = 20, db: AsyncSession = Depends(get_db)):
-    movies = await list_movies(db, skip, limit)
-    return movies
+async def list_movies_endpoint(
+    request: Request,
+    catalog: CatalogPage = Depends(),
+):
+    """All movies by id, a page at a time (next page: ?cursor=<X-Next-Cursor>)."""
+    return await catalog_cache.respond(request, lambda db: _movie_page(db, catalog, "list", "id"))
 
 
 @router.post("/{movie_id}/showtimes", response_model=ShowTimeOut)
-async def create_showtime_endpoint(movie_id: int, start_time: datetime, hall: str = "Main Hall", rows: str = "A,B,C,D", cols: int = 10, price: int = 100, db: AsyncSession = Depends(get_db), user=Depends(get_current_user)):
+async def create_showtime_endpoint(
+    movie_id: int,
+    start_time: datetime,
+    hall: str = "Main Hall",
+    rows: str = Query("A,B,C,D", description="comma-separated row labels"),
+    # same bounds as SeatLayout, so bad values are a 422 rather than a failed model build
+    cols: int = Query(10, ge=1, le=200),
+    price: int = Query(100, ge=0),
+    layout_id: Optional[int] = None,
+    db: AsyncSession = Depends(get_db),
+    user=Depends(get_current_user),
+):
     # admin only
     if not user.is_admin:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN)
-    st = await create_showtime(db, movie_id, start_time, hall)
+    if layout_id is None:
+        # an identical rows x cols layout is reused, so only new halls add layout rows
+        rows_list = [r.strip() for r in rows.split(",") if r.strip()]
+        if not rows_list:
+            raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail="rows must name at least one row")
+        layout_id = await _grid_layout(db, hall, SeatLayout(rows=rows_list, cols=cols, price=price))
+    elif not await get_hall_layout(db, layout_id):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Layout not found")
+    st = await create_showtime(db, movie_id, start_time, hall, layout_id=layout_id)
+    # generate the showtime's seats from the layout in the same transaction
+    await create_showtime_seats(db, [st.id])  #type: ignore
     await db.commit()
-    # generate seat layout
-    rows_list = [r.strip() for r in rows.split(",")]
-    await bulk_create_seats(db, st.id, rows_list, cols, price=price)  #type: ignore
-    await db.commit()
-    await db.refresh(st)
+    await catalog_cache.bump()   # showtime listings and location/date filters
     return st
 
 
+@router.post("/{movie_id}/showtimes/batch", response_model=list[ShowTimeOut])
+async def create_showtimes_batch_endpoint(movie_id: int, payload: ShowTimeBatchCreate, db: AsyncSession = Depends(get_db), user=Depends(get_current_user)):
+    """Schedule many showtimes (e.g. a week for one screen) from one hall layout, in one transaction."""
+    # admin only
+    if not user.is_admin:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN)
+    if not await get_movie(db, movie_id):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Movie not found")
+    layout_id = payload.layout_id
+    if layout_id is None:
+        layout_id = await _grid_layout(db, payload.hall, payload.layout)
+    elif not await get_hall_layout(db, layout_id):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Layout not found")
+    showtimes = await bulk_create_showtimes(db, movie_id, payload.start_times, layout_id, hall=payload.hall)
+    await db.commit()
+    await catalog_cache.bump()
+    return showtimes
+
+
+async def _grid_layout(db: AsyncSession, hall: str, layout: SeatLayout) -> int:
+    rows_list = [r.strip() for r in layout.rows if r.strip()]
+    try:
+        return await get_or_create_grid_layout(
+            db, hall, rows_list, layout.cols, layout.price,
+            price_tiers=layout.price_tiers, row_categories=layout.row_categories,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+
 @router.get("/currently-showing", response_model=list[MovieOut])
-async def currently_showing_movies(db: AsyncSession = Depends(get_db)):
+async def currently_showing_movies(
+    request: Request,
+    catalog: CatalogPage = Depends(),
+):
     """
-    Movies with release_date <= now (already released).
+    Movies with release_date <= now (already released), newest first.
     """
     now = datetime.utcnow()
-    q = select(Movie).where(Movie.release_date != None).where(Movie.release_date <= now)
-    result = await db.execute(q)
-    movies = result.scalars().all()
-    if not movies:
-        # return empty list is also fine — choose behavior you prefer
-        return []
-    return movies
+    return await catalog_cache.respond(request, lambda db: _movie_page(
+        db, catalog, "currently-showing", "release_date_desc",
+        where=(Movie.release_date != None, Movie.release_date <= now),
+    ))
 
 @router.get("/upcoming", response_model=list[MovieOut])
-async def upcoming_movies(db: AsyncSession = Depends(get_db)):
+async def upcoming_movies(
+    request: Request,
+    catalog: CatalogPage = Depends(),
+):
     """
-    Movies with release_date > now (upcoming).
+    Movies with release_date > now (upcoming), soonest first.
     """
     now = datetime.utcnow()
-    q = select(Movie).where(Movie.release_date != None).where(Movie.release_date > now).order_by(Movie.release_date.asc())
-    result = await db.execute(q)
-    movies = result.scalars().all()
-    if not movies:
-        return []
-    return movies
+    return await catalog_cache.respond(request, lambda db: _movie_page(
+        db, catalog, "upcoming", "release_date",
+        where=(Movie.release_date != None, Movie.release_date > now),
+    ))
 
 @router.get("/top-rated", response_model=list[MovieOut])
-async def top_rated_movies(min_rating: int = 7, db: AsyncSession = Depends(get_db)):
+async def top_rated_movies(
+    request: Request,
+    min_rating: int = 7,
+    catalog: CatalogPage = Depends(),
+):
     """
     Top rated movies. Default threshold = 7.
     """
-    q = select(Movie).where(Movie.rating != None).where(Movie.rating >= min_rating).order_by(Movie.rating.desc())
-    result = await db.execute(q)
-    movies = result.scalars().all()
-    if not movies:
-        return []
-    return movies
+    return await catalog_cache.respond(request, lambda db: _movie_page(
+        db, catalog, "top-rated", "rating_desc",
+        where=(Movie.rating != None, Movie.rating >= min_rating),
+    ))
+
+
+async def _movie_page(db: AsyncSession, catalog: CatalogPage, kind: str, order: str, where=()):
+    # rendered by the catalog cache: (body, headers)
+    columns, _ = MOVIE_ORDERINGS[order]
+    after = decode_cursor(kind, catalog.cursor, [c.type.python_type for c in columns])
+    movies, next_key = await list_movies(
+        db, catalog.limit, order=order, after=after, where=where,
+        language=catalog.language, location=catalog.location, on_date=catalog.date,
+    )
+    return [MovieOut.model_validate(m) for m in movies], next_cursor_headers(kind, next_key)
 
 @router.get("/{movie_id}", response_model=MovieOut)
-async def get_movie_endpoint(movie_id: int, db: AsyncSession = Depends(get_db)):
-    movie = await get_movie(db, movie_id)
-    if not movie:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND)
-    return movie
\ No newline at end of file
+async def get_movie_endpoint(movie_id: int, request: Request):
+    async def build(db: AsyncSession):
+        movie = await get_movie(db, movie_id)
+        if not movie:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND)
+        return MovieOut.model_validate(movie), {}
+    return await catalog_cache.respond(request, build)
\ No newline at end of file
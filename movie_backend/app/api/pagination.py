@@ -0,0 +1,49 @@
+# app/api/pagination.py
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+from fastapi import HTTPException, status
+
+# list bodies stay plain arrays (existing clients); the next page's cursor travels in this header
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(kind: str, key: Tuple[Any, ...]) -> str:
+    """Opaque cursor for continuing a `kind` listing after the sort key `key`."""
+    values = [{"dt": v.isoformat()} if isinstance(v, datetime) else v for v in key]
+    raw = json.dumps([kind, values], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode()
+
+
+def _decode_value(value: Any, expected: type) -> Any:
+    if expected is datetime:
+        return datetime.fromisoformat(value["dt"])
+    # bool is an int subclass: true/false never pass as an integer key
+    if isinstance(value, bool) or not isinstance(value, expected):
+        raise ValueError(value)
+    return value
+
+
+def decode_cursor(kind: str, cursor: Optional[str], types: Sequence[type]) -> Optional[Tuple[Any, ...]]:
+    """
+    Sort key from a cursor issued for the same listing; 400 for anything else.
+    `types` are the python types of the sort key columns, checked value by value
+    so a forged cursor can never reach the database as a mistyped bind parameter.
+    """
+    if not cursor:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        cursor_kind, values = json.loads(raw)
+        if cursor_kind != kind or not isinstance(values, list) or len(values) != len(types):
+            raise ValueError(cursor_kind)
+        return tuple(_decode_value(v, t) for v, t in zip(values, types))
+    except (ValueError, TypeError, KeyError, binascii.Error, UnicodeDecodeError):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+
+
+def next_cursor_headers(kind: str, key: Optional[Tuple[Any, ...]]) -> Dict[str, str]:
+    return {NEXT_CURSOR_HEADER: encode_cursor(kind, key)} if key is not None else {}
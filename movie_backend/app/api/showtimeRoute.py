@@ -1,44 +1,67 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Header, HTTPException, Request
+from fastapi.responses import Response
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import List
-from app.db.crud import get_seats_for_showtime, are_seats_available
-from app.db.models import SeatStatus
+from typing import Optional
+from app.services.catalog_cache import catalog_cache
+from app.services.seat_cache import seat_cache
+from app.services.seat_codec import COMPACT_MEDIA_TYPE, compact_seat_map, layout_digest, wants_compact
+from app.services.seat_state import SeatState
 
-from app.db.database import get_db    
 from app.db.models import ShowTime
 
 
 router = APIRouter(prefix="/showtimes", tags=["Showtimes"])
 
 @router.get("/")
-async def get_showtimes(movie_id: int, db: AsyncSession = Depends(get_db)):
-    result = await db.execute(select(ShowTime).where(ShowTime.movie_id == movie_id))
-    showtimes = result.scalars().all()
-    if not showtimes:
-        raise HTTPException(status_code=404, detail="No showtimes found for this movie")
-    return showtimes
+async def get_showtimes(movie_id: int, request: Request):
+    async def build(db: AsyncSession):
+        result = await db.execute(select(ShowTime).where(ShowTime.movie_id == movie_id))
+        showtimes = result.scalars().all()
+        if not showtimes:
+            raise HTTPException(status_code=404, detail="No showtimes found for this movie")
+        return showtimes, {}
+    # cached with the catalog: showtimes only change through the admin endpoints
+    return await catalog_cache.respond(request, build)
 
 @router.get("/{showtime_id}/seats")
-async def get_seat_availability(showtime_id: int, db: AsyncSession = Depends(get_db)):
-    seats = await get_seats_for_showtime(db, showtime_id)
-    if not seats:
+async def get_seat_availability(
+    showtime_id: int,
+    format: Optional[str] = None,
+    rle: bool = False,
+    layout: Optional[str] = None,
+    accept: Optional[str] = Header(None),
+):
+    # served from the seat-map cache: counts and seats are rendered once per change
+    state = await seat_cache.get_state(showtime_id)
+    if not len(state):
         raise HTTPException(status_code=404, detail="No seats found for this showtime")
 
+    if wants_compact(format, accept):
+        skip_layout = layout == layout_digest(state)
+        body = await seat_cache.render(
+            showtime_id,
+            f"availability:compact:{skip_layout}:{rle}",
+            lambda state: {
+                **_availability_counts(state),
+                **compact_seat_map(state, known_layout=layout if skip_layout else None, rle=rle),
+            },
+        )
+        return Response(body, media_type=COMPACT_MEDIA_TYPE)
+
+    body = await seat_cache.render(
+        showtime_id,
+        "availability",
+        lambda state: {"showtime_id": showtime_id, **_availability_counts(state), "seats": state.seats()},
+    )
+    return Response(body, media_type="application/json")
+
+
+def _availability_counts(state: SeatState) -> dict:
+    counts = state.counts()
     return {
-        "showtime_id": showtime_id,
-        "total_seats": len(seats),
-        "available": sum(1 for s in seats if s.status == SeatStatus.available),   #type: ignore
-        "locked": sum(1 for s in seats if s.status == SeatStatus.locked),         #type: ignore
-        "booked": sum(1 for s in seats if s.status == SeatStatus.booked),         #type: ignore
-        "seats": [
-            {
-                "id": seat.id,
-                "row": seat.row,
-                "number": seat.number,
-                "status": seat.status.value,
-                "price": seat.price,
-            }
-            for seat in seats
-        ]
-    }
\ No newline at end of file
+        "total_seats": len(state),
+        "available": counts["available"],
+        "locked": counts["locked"],
+        "booked": counts["booked"],
+    }
@@ -1,29 +1,50 @@
-from fastapi import APIRouter, WebSocket, WebSocketDisconnect
-from app.services.broadcast import register_ws, unregister_ws
-from app.services.redis_client import get_redis
-import asyncio
 import json
+from typing import Optional
+
+from fastapi import APIRouter, Depends, WebSocket, WebSocketDisconnect
+from app.api.deps import get_ticket_pool
+from app.services.booking_pool import TicketPool
+from app.services.broadcast import register_ws, unregister_ws
+from app.services.seat_cache import seat_cache
+from app.services.seat_holds import apply_seat_holds
+from app.services.seat_codec import compact_seat_map
 
 router = APIRouter()
 
-@router.websocket("/ws/showtime/{showtime_id}")
-async def websocket_endpoint(ws: WebSocket, showtime_id: int):
-    await register_ws(showtime_id, ws)
-    redis = get_redis()
 
-    pubsub = redis.pubsub()
-    await pubsub.subscribe(f"showtime:{showtime_id}")
+async def _snapshot_frame(pool: TicketPool, showtime_id: int, compact: bool = False) -> str:
+    """
+    Current seat map with the version it reflects: exact when the booking
+    worker's table lives in this process, otherwise a safe lower bound.
+    """
+    state = pool.seat_states.get(showtime_id)
+    if state is None:
+        state = await seat_cache.get_state(showtime_id)   # holds already applied
+    else:
+        # the worker's table is the database's view: add the Redis holds on a copy
+        state = await apply_seat_holds(state.copy())
+    if compact:
+        return json.dumps({"type": "snapshot", **compact_seat_map(state)})
+    return json.dumps(state.snapshot())
+
 
+@router.websocket("/ws/showtime/{showtime_id}")
+async def websocket_endpoint(
+    ws: WebSocket,
+    showtime_id: int,
+    format: Optional[str] = None,
+    since: Optional[int] = None,
+    pool: TicketPool = Depends(get_ticket_pool),
+):
+    # updates are pushed by the process-wide listener in app.services.broadcast;
+    # this handler only sends the initial snapshot (or, for a client reconnecting
+    # with ?since=<version>, the deltas it missed) and notices when the client goes away
     try:
+        compact = format == "compact"
+        await register_ws(showtime_id, ws, snapshot=lambda: _snapshot_frame(pool, showtime_id, compact), since=since)
         while True:
-            msg = await pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
-            if msg and msg["type"] == "message":
-                try:
-                    payload = json.loads(msg["data"])
-                    await ws.send_json(payload)
-                except Exception:
-                    pass
-            await asyncio.sleep(0.1)
+            await ws.receive_text()
     except WebSocketDisconnect:
+        pass
+    finally:
         unregister_ws(showtime_id, ws)
-        await pubsub.unsubscribe(f"showtime:{showtime_id}")
@@ -1,13 +1,139 @@
 from pydantic_settings import BaseSettings
 from pydantic import Field
+from typing import Optional
 
 class Settings(BaseSettings):
-    DATABASE_URL: str 
+    DATABASE_URL: str
     GOOGLE_CLIENT_ID: str
     REDIS_URL: str
-    SECRET_KEY: str 
-    ALGORITHM: str 
-    ACCESS_TOKEN_EXPIRE_MINUTES: int 
+    SECRET_KEY: str
+    ALGORITHM: str
+    ACCESS_TOKEN_EXPIRE_MINUTES: int
+
+    # Database pools. Request handlers and background reads share the default
+    # pool; TicketPool writers get their own (BOOKING_DB_POOL_SIZE=0 shares it).
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT_SECONDS: float = 30.0
+    DB_POOL_PRE_PING: bool = True
+    DB_POOL_RECYCLE_SECONDS: int = 1800
+    DB_STATEMENT_CACHE_SIZE: int = 100   # asyncpg prepared statements per connection (0 behind pgbouncer)
+    BOOKING_DB_POOL_SIZE: int = 5
+    BOOKING_DB_MAX_OVERFLOW: int = 5
+    # Read replica for browse endpoints (unset = everything reads the primary).
+    # Endpoints declare how stale they may be; a replica lagging more than that,
+    # or unreachable, falls back to the primary. Lag is polled every CHECK interval.
+    DATABASE_READ_URL: Optional[str] = None
+    READ_DB_POOL_SIZE: int = 10
+    READ_DB_MAX_OVERFLOW: int = 10
+    READ_REPLICA_MAX_STALENESS_SECONDS: float = 10.0
+    READ_REPLICA_CHECK_INTERVAL_SECONDS: float = 2.0
+    # checkouts waiting at least this long are counted as slow in /metrics/db
+    DB_POOL_SLOW_CHECKOUT_MS: float = 50.0
+
+    # TicketPool group commit: max requests applied per transaction and how
+    # long (ms) a worker waits for more requests before committing a batch.
+    TICKETPOOL_BATCH_SIZE: int = 64
+    TICKETPOOL_BATCH_WINDOW_MS: int = 2
+
+    # Distributed TicketPool: showtimes are owned by one API process at a time
+    # (consistent hashing + Redis leases); other processes forward to the owner.
+    TICKETPOOL_DISTRIBUTED: bool = False
+    TICKETPOOL_LEASE_SECONDS: float = 10.0
+    TICKETPOOL_HEARTBEAT_SECONDS: float = 2.0
+    TICKETPOOL_FORWARD_TIMEOUT_SECONDS: float = 15.0
+    TICKETPOOL_RING_VNODES: int = 64
+
+    # TicketPool queues: "memory" (asyncio.Queue) or "redis" (durable Streams,
+    # results kept by request id for RESULT_TTL; streams with backlog are
+    # resumed every RECOVERY interval).
+    TICKETPOOL_QUEUE_BACKEND: str = "memory"
+    TICKETPOOL_RESULT_TTL_SECONDS: int = 3600
+    TICKETPOOL_RECOVERY_INTERVAL_SECONDS: float = 10.0
+    # Outcomes of bookings/cancels/updates are kept in processed_requests this
+    # long, so a redelivered or replayed request is never applied twice.
+    TICKETPOOL_PROCESSED_RETENTION_SECONDS: int = 86400
+
+    # TicketPool limits: workers retire after IDLE seconds without work (0 = never);
+    # user requests are rejected (429) once a showtime has QUEUE_CAPACITY waiting, and
+    # (503) when MAX_WORKERS are live and busy. 0 disables a limit.
+    TICKETPOOL_WORKER_IDLE_SECONDS: float = 300.0
+    TICKETPOOL_QUEUE_CAPACITY: int = 500
+    TICKETPOOL_MAX_WORKERS: int = 2000
+
+    # Seconds queued TicketPool requests get to finish on shutdown.
+    TICKETPOOL_DRAIN_TIMEOUT_SECONDS: float = 10.0
+
+    # Longest a caller waits on an in-memory TicketPool request before answering
+    # that the outcome is unknown (the request may still complete).
+    TICKETPOOL_REQUEST_TIMEOUT_SECONDS: float = 30.0
+
+    # Seat-lock reaper: how often expired locks are released and how many per sweep.
+    SEAT_LOCK_REAP_INTERVAL_SECONDS: float = 1.0
+    SEAT_LOCK_REAP_BATCH: int = 1000
+
+    # Checkout seat holds kept in Redis before a booking is confirmed.
+    SEAT_HOLD_SECONDS: int = 120
+    SEAT_HOLD_MAX_SEATS: int = 10
+
+    # WebSocket fanout: per-connection send queue, what to do when it is full
+    # ("drop_oldest" | "drop_newest" | "coalesce" into a resync frame) and
+    # how many dropped frames / how slow a send before the client is evicted.
+    WS_SEND_QUEUE_SIZE: int = 64
+    WS_SLOW_CONSUMER_POLICY: str = "drop_oldest"
+    WS_MAX_DROPPED_FRAMES: int = 256
+    WS_SEND_TIMEOUT_SECONDS: float = 5.0
+    # seats_updated events within this window go out as one seats_delta frame (0 = off)
+    WS_COALESCE_WINDOW_MS: int = 50
+    # Recent delta frames kept per showtime (for this many showtimes, LRU), so a
+    # client reconnecting with ?since=<version> is caught up without a snapshot.
+    WS_REPLAY_FRAMES: int = 256
+    WS_REPLAY_SHOWTIMES: int = 1024
+
+    # Read-through seat-map cache: showtimes kept per process (LRU) and how
+    # long an entry is trusted without being patched before it is reloaded.
+    SEAT_CACHE_MAX_SHOWTIMES: int = 1024
+    SEAT_CACHE_TTL_SECONDS: float = 300.0
+
+    # Auth: resolved users cached per token subject (TTL bounds staleness across
+    # processes). AUTH_EMBED_USER_CLAIMS puts user_id/is_admin in the token so
+    # most requests skip the DB, but a deleted, deactivated or demoted user then
+    # keeps those rights until the token expires.
+    AUTH_USER_CACHE_SIZE: int = 10_000
+    AUTH_USER_CACHE_TTL_SECONDS: float = 60.0
+    AUTH_EMBED_USER_CLAIMS: bool = False
+
+    # Showtime/movie fields for booking confirmations, cached per showtime
+    # (TTL bounds staleness after edits made by other processes).
+    SHOWTIME_META_CACHE_SIZE: int = 4096
+    SHOWTIME_META_CACHE_TTL_SECONDS: float = 300.0
+
+    # Hall layouts are immutable, so they are cached without expiry;
+    # the size only bounds memory (one entry per layout in use).
+    HALL_LAYOUT_CACHE_SIZE: int = 256
+
+    # Catalog responses (movie lists/detail, showtime listings) are cached per
+    # route + query and dropped when an admin edit bumps the catalog version;
+    # other processes notice a bump within CATALOG_VERSION_CHECK_SECONDS. The
+    # TTL bounds time-based drift (e.g. a movie moving from upcoming to now showing).
+    CATALOG_CACHE_SIZE: int = 2048
+    CATALOG_CACHE_TTL_SECONDS: float = 60.0
+    CATALOG_VERSION_CHECK_SECONDS: float = 1.0
+    CATALOG_CACHE_MAX_AGE_SECONDS: int = 30   # Cache-Control max-age for browsers and CDNs
+
+    # bcrypt runs on a thread pool of this size; beyond MAX_PENDING queued
+    # operations signup/login answer 503 instead of piling up.
+    PASSWORD_HASH_WORKERS: int = 4
+    PASSWORD_HASH_MAX_PENDING: int = 256
+
+    # Google sign-in: signing certs are cached per Cache-Control (this TTL when
+    # absent) and refreshed this long before they expire; unknown key ids
+    # trigger at most one refetch per MIN_REFRESH seconds.
+    GOOGLE_CERTS_URL: str = "https://www.googleapis.com/oauth2/v1/certs"
+    GOOGLE_CERTS_DEFAULT_TTL_SECONDS: float = 3600.0
+    GOOGLE_CERTS_REFRESH_MARGIN_SECONDS: float = 300.0
+    GOOGLE_CERTS_MIN_REFRESH_SECONDS: float = 60.0
+    GOOGLE_CERTS_TIMEOUT_SECONDS: float = 5.0
 
     class Config:
         env_file = ".env"
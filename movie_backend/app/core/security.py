@@ -1,4 +1,6 @@
 # app/core/security.py
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
 from typing import Optional
 from jose import jwt, JWTError
@@ -16,8 +18,63 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
 
-def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
+# ------------------------------------------------------------
+# 🔐 bcrypt off the event loop
+# ------------------------------------------------------------
+# bcrypt releases the GIL, so a small thread pool runs hashes in parallel
+# while the loop keeps serving bookings and sockets. Its size caps CPU spent
+# on hashing; PASSWORD_HASH_MAX_PENDING caps how many may wait for it.
+_hash_executor: Optional[ThreadPoolExecutor] = None
+_hash_pending = 0
+
+
+class PasswordHasherBusy(Exception):
+    """Too many password operations queued; the caller should retry later."""
+
+
+def _get_hash_executor() -> ThreadPoolExecutor:
+    global _hash_executor
+    if _hash_executor is None:
+        _hash_executor = ThreadPoolExecutor(
+            max_workers=settings.PASSWORD_HASH_WORKERS, thread_name_prefix="bcrypt"
+        )
+    return _hash_executor
+
+
+async def _run_hasher(fn, *args):
+    global _hash_pending
+    if _hash_pending >= settings.PASSWORD_HASH_MAX_PENDING:
+        raise PasswordHasherBusy()
+    _hash_pending += 1
+    try:
+        return await asyncio.get_running_loop().run_in_executor(_get_hash_executor(), fn, *args)
+    finally:
+        _hash_pending -= 1
+
+
+async def hash_password_async(password: str) -> str:
+    return await _run_hasher(hash_password, password)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    return await _run_hasher(verify_password, plain_password, hashed_password)
+
+
+def shutdown_hash_executor():
+    global _hash_executor
+    if _hash_executor is not None:
+        _hash_executor.shutdown(wait=False, cancel_futures=True)
+        _hash_executor = None
+
+
+def create_access_token(data: dict, expires_delta: Optional[timedelta] = None, user=None) -> str:
+    """
+    Sign a JWT for `data`. When `user` is given (and AUTH_EMBED_USER_CLAIMS is on)
+    its id and admin flag are embedded so get_current_user can skip the DB lookup.
+    """
     to_encode = data.copy()
+    if user is not None and settings.AUTH_EMBED_USER_CLAIMS:
+        to_encode.update({"user_id": user.id, "is_admin": bool(user.is_admin)})
     expire = datetime.now(timezone.utc) + (expires_delta or timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES))
     to_encode.update({"exp": expire})
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
@@ -1,10 +1,16 @@
-from typing import List, Optional, Dict, Any
-from datetime import datetime, timedelta, timezone
+import hashlib
+import json
+from typing import List, Optional, Dict, Any, Tuple
+from datetime import date, datetime, time, timedelta, timezone
 
+from sqlalchemy import delete, insert, or_, tuple_, update
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.future import select
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
 
-from app.db.models import User, Movie, ShowTime, Seat, Booking, SeatStatus
+from app.db.models import User, Movie, ShowTime, HallLayout, LayoutSeat, Seat, Booking, BookingSeat, ProcessedRequest, SeatStatus
+from app.services.showtime_meta import invalidate_showtime_meta_on_commit
 
 #Users
 async def get_user_by_email(db: AsyncSession, email: str) -> Optional[User]:
@@ -25,9 +31,57 @@ async def create_movie(db: AsyncSession, **kwargs) -> Movie:
     return movie
 
 
-async def list_movies(db: AsyncSession, skip: int = 0, limit: int = 20):
-    q = await db.execute(select(Movie).offset(skip).limit(limit))
-    return q.scalars().all()
+# Catalog pages use keyset pagination: each page continues strictly after the
+# sort key of the previous page's last movie, so page N costs the same as
+# page 1 (an index range scan) and rows inserted meanwhile never shift pages.
+# ordering name -> (sort key columns, descending)
+MOVIE_ORDERINGS: Dict[str, Tuple[Tuple[Any, ...], bool]] = {
+    "id": ((Movie.id,), False),
+    "release_date": ((Movie.release_date, Movie.id), False),
+    "release_date_desc": ((Movie.release_date, Movie.id), True),
+    "rating_desc": ((Movie.rating, Movie.id), True),
+}
+
+
+async def list_movies(
+    db: AsyncSession,
+    limit: int = 20,
+    *,
+    order: str = "id",
+    after: Optional[Tuple[Any, ...]] = None,
+    where: Tuple[Any, ...] = (),
+    language: Optional[str] = None,
+    location: Optional[str] = None,
+    on_date: Optional[date] = None,
+) -> Tuple[List[Movie], Optional[Tuple[Any, ...]]]:
+    """
+    One page of movies in `order`, starting after the sort key `after`.
+    Returns the page and the sort key to continue from (None on the last page).
+    location/on_date keep movies with a showtime at that location / on that (UTC) day.
+    """
+    columns, descending = MOVIE_ORDERINGS[order]
+    q = select(Movie).where(*where)
+    if language:
+        q = q.where(Movie.language == language)
+    if location or on_date:
+        showtime = select(ShowTime.id).where(ShowTime.movie_id == Movie.id)
+        if location:
+            showtime = showtime.where(ShowTime.location == location)
+        if on_date:
+            day = datetime.combine(on_date, time.min, tzinfo=timezone.utc)
+            showtime = showtime.where(ShowTime.start_time >= day, ShowTime.start_time < day + timedelta(days=1))
+        q = q.where(showtime.exists())
+    if after is not None:
+        key = tuple_(*columns)
+        q = q.where(key < tuple_(*after) if descending else key > tuple_(*after))
+    q = q.order_by(*(c.desc() if descending else c.asc() for c in columns)).limit(limit + 1)
+
+    movies = list((await db.execute(q)).scalars().all())
+    if len(movies) <= limit:
+        return movies, None
+    movies = movies[:limit]
+    last = movies[-1]
+    return movies, tuple(getattr(last, c.key) for c in columns)
 
 
 async def get_movie(db: AsyncSession, movie_id: int) -> Optional[Movie]:
@@ -36,8 +90,14 @@ async def get_movie(db: AsyncSession, movie_id: int) -> Optional[Movie]:
 
 
 # SHOWTIMES
-async def create_showtime(db: AsyncSession, movie_id: int, start_time: datetime, hall: str = "Main Hall") -> ShowTime:
-    st = ShowTime(movie_id=movie_id, start_time=start_time, hall=hall)
+async def create_showtime(
+    db: AsyncSession,
+    movie_id: int,
+    start_time: datetime,
+    hall: str = "Main Hall",
+    layout_id: Optional[int] = None,
+) -> ShowTime:
+    st = ShowTime(movie_id=movie_id, start_time=start_time, hall=hall, layout_id=layout_id)
     db.add(st)
     await db.flush()
     return st
@@ -48,83 +108,248 @@ async def get_showtime(db: AsyncSession, showtime_id: int) -> Optional[ShowTime]
     return q.scalars().first()
 
 
-# SEATS
-# This function is key for creating the full seat map for a showtime, efficiently in one shot.
-async def bulk_create_seats(db: AsyncSession, showtime_id: int, rows: List[str], cols: int, price: int = 100):
-    seats = []
-    for r in rows:
-        for n in range(1, cols + 1):
-            s = Seat(showtime_id=showtime_id, row=r, number=n, price=price)
-            seats.append(s)
-            db.add(s)
-    await db.flush()
-    return seats
+async def bulk_create_showtimes(
+    db: AsyncSession,
+    movie_id: int,
+    start_times: List[datetime],
+    layout_id: int,
+    hall: str = "Main Hall",
+) -> List[ShowTime]:
+    """
+    Schedule many showtimes sharing one hall layout: a single multi-row
+    INSERT ... RETURNING for the showtimes, then one INSERT ... SELECT for all their seats.
+    """
+    if not start_times:
+        return []
+    result = await db.scalars(
+        insert(ShowTime).returning(ShowTime, sort_by_parameter_order=True),
+        [{"movie_id": movie_id, "start_time": t, "hall": hall, "layout_id": layout_id} for t in start_times],
+    )
+    showtimes = list(result.all())
+    await create_showtime_seats(db, [st.id for st in showtimes])   #type: ignore
+    return showtimes
+
+
+# HALL LAYOUTS
+# A layout (rows, numbers, seat categories, price per category) is stored once
+# and shared by every showtime created from it; a showtime's seats only carry
+# their status and a reference to their layout seat.
+def grid_seats(rows: List[str], cols: int, row_categories: Optional[Dict[str, str]] = None) -> List[Tuple[str, int, str]]:
+    """(row, number, category) for a rows x cols hall; rows not in row_categories are "standard"."""
+    categories = row_categories or {}
+    return [(r, n, categories.get(r, "standard")) for r in rows for n in range(1, cols + 1)]
+
+
+def layout_signature(name: str, seats: List[Tuple[str, int, str]], price_tiers: Dict[str, int]) -> str:
+    definition = {"name": name, "seats": sorted(seats), "price_tiers": sorted(price_tiers.items())}
+    return hashlib.sha256(json.dumps(definition, separators=(",", ":")).encode()).hexdigest()
+
+
+async def get_or_create_layout(
+    db: AsyncSession,
+    name: str,
+    seats: List[Tuple[str, int, str]],
+    price_tiers: Dict[str, int],
+) -> int:
+    """
+    Id of the layout with exactly this definition, creating it when new.
+    Raises ValueError for seats whose category has no price tier.
+    """
+    unpriced = sorted({category for _, _, category in seats} - set(price_tiers))
+    if unpriced:
+        raise ValueError(f"no price tier for seat category {unpriced[0]!r}")
+    if not seats:
+        raise ValueError("a layout needs at least one seat")
+
+    signature = layout_signature(name, seats, price_tiers)
+    existing = await db.scalar(select(HallLayout.id).where(HallLayout.signature == signature))
+    if existing is not None:
+        return existing
+    try:
+        async with db.begin_nested():
+            layout_id = await db.scalar(
+                insert(HallLayout).values(name=name, signature=signature, price_tiers=price_tiers).returning(HallLayout.id)
+            )
+            await db.execute(
+                insert(LayoutSeat.__table__),
+                [{"layout_id": layout_id, "row": r, "number": n, "category": c} for r, n, c in seats],
+            )
+    except IntegrityError:
+        # created concurrently by another admin request: use theirs
+        layout_id = await db.scalar(select(HallLayout.id).where(HallLayout.signature == signature))
+    return layout_id   #type: ignore
+
+
+async def get_or_create_grid_layout(
+    db: AsyncSession,
+    name: str,
+    rows: List[str],
+    cols: int,
+    price: int = 100,
+    price_tiers: Optional[Dict[str, int]] = None,
+    row_categories: Optional[Dict[str, str]] = None,
+) -> int:
+    """A rows x cols layout: "standard" seats at `price`, rows in row_categories priced by their tier."""
+    tiers = {"standard": price, **(price_tiers or {})}
+    return await get_or_create_layout(db, name, grid_seats(rows, cols, row_categories), tiers)
+
+
+async def get_hall_layout(db: AsyncSession, layout_id: int) -> Optional[HallLayout]:
+    q = await db.execute(select(HallLayout).where(HallLayout.id == layout_id))
+    return q.scalars().first()
 
 
-async def get_seats_for_showtime(db: AsyncSession, showtime_id: int):
-    q = await db.execute(select(Seat).where(Seat.showtime_id == showtime_id).order_by(Seat.row, Seat.number))
+async def get_layout_seats(db: AsyncSession, layout_id: int):
+    q = await db.execute(
+        select(LayoutSeat).where(LayoutSeat.layout_id == layout_id).order_by(LayoutSeat.row, LayoutSeat.number)
+    )
     return q.scalars().all()
 
 
-async def are_seats_available(db: AsyncSession, seat_ids: List[int]) -> bool:
-    q = await db.execute(select(Seat).where(Seat.id.in_(seat_ids)))
-    seats = q.scalars().all()
-    return all(s.status == SeatStatus.available for s in seats)
+# SEATS
+async def create_showtime_seats(db: AsyncSession, showtime_ids: List[int]) -> int:
+    """One seat per layout seat for each showtime, generated server-side by a single INSERT ... SELECT."""
+    if not showtime_ids:
+        return 0
+    result = await db.execute(
+        insert(Seat.__table__).from_select(
+            ["showtime_id", "layout_seat_id"],   # status filled from its column default
+            select(ShowTime.id, LayoutSeat.id)
+            .join(LayoutSeat, LayoutSeat.layout_id == ShowTime.layout_id)
+            .where(ShowTime.id.in_(showtime_ids)),
+        )
+    )
+    return result.rowcount
+
+
+# This function is key for creating the full seat map for a showtime, efficiently in one shot.
+async def bulk_create_seats(db: AsyncSession, showtime_id: int, rows: List[str], cols: int, price: int = 100) -> int:
+    """Give a showtime without seats a rows x cols layout at one price (an identical layout is reused)."""
+    hall = await db.scalar(select(ShowTime.hall).where(ShowTime.id == showtime_id))
+    layout_id = await get_or_create_grid_layout(db, hall or "Main Hall", rows, cols, price)
+    await db.execute(update(ShowTime).where(ShowTime.id == showtime_id).values(layout_id=layout_id))
+    # cached showtime metadata may still say "no layout"
+    invalidate_showtime_meta_on_commit(db, showtime_id)
+    return await create_showtime_seats(db, [showtime_id])
 
 
 # LOCK / UNLOCK seats (DB-level)
-async def lock_seats(db: AsyncSession, seat_ids: List[int], user_id: int, lock_seconds: int = 120) -> bool:
-    # atomic-ish: check seats are available, then update status to locked
+# All seat transitions are single set-based UPDATEs guarded by the current status,
+# so competing transactions never hold FOR UPDATE row locks on ORM-loaded seats.
+# A partial claim leaves the claimed rows updated: callers compare the returned
+# count and roll back (savepoint) when it is short.
+async def claim_seats(
+    db: AsyncSession,
+    showtime_id: int,
+    seat_ids: List[int],
+    status: SeatStatus = SeatStatus.booked,
+    user_id: Optional[int] = None,
+    lock_seconds: Optional[int] = None,
+):
+    """
+    Atomically move available seats of a showtime to `status` and return
+    the ids of the seats actually claimed.
+    """
+    if not seat_ids:
+        return []
+    lock_until = None
+    if lock_seconds is not None:
+        lock_until = datetime.now(timezone.utc) + timedelta(seconds=lock_seconds)
+    q = await db.execute(
+        update(Seat)
+        .where(
+            Seat.id.in_(seat_ids),
+            Seat.showtime_id == showtime_id,
+            Seat.status == SeatStatus.available,
+        )
+        .values(status=status, locked_by=user_id, locked_until=lock_until)
+        .returning(Seat.id)
+        .execution_options(synchronize_session=False)
+    )
+    return list(q.scalars().all())
+
+
+async def release_expired_locks(db: AsyncSession, showtime_id: int, seat_ids: List[int]) -> List[int]:
+    """
+    Release the given seats whose lock has expired; returns the ids actually
+    released. A lock without an expiry (legacy rows) counts as expired.
+    """
     now = datetime.now(timezone.utc)
-    lock_until = now + timedelta(seconds=lock_seconds)
-    q = select(Seat).where(Seat.id.in_(seat_ids)).with_for_update()
-    res = await db.execute(q)
-    seats = res.scalars().all()
-    if not seats or any(s.status != SeatStatus.available for s in seats):
-        return False
-    for s in seats:
-        s.status = SeatStatus.locked   
-        s.locked_by = user_id
-        s.locked_until = lock_until
-        db.add(s)
-    # flush commit will be handled by caller transaction
-    await db.flush()
-    return True
+    q = await db.execute(
+        update(Seat)
+        .where(
+            Seat.id.in_(seat_ids),
+            Seat.showtime_id == showtime_id,
+            Seat.status == SeatStatus.locked,
+            or_(Seat.locked_until.is_(None), Seat.locked_until <= now),
+        )
+        .values(status=SeatStatus.available, locked_by=None, locked_until=None)
+        .returning(Seat.id)
+        .execution_options(synchronize_session=False)
+    )
+    return list(q.scalars().all())
 
 
-async def unlock_seats(db: AsyncSession, seat_ids: List[int]):
-    q = await db.execute(select(Seat).where(Seat.id.in_(seat_ids)))
-    seats = q.scalars().all()
-    for s in seats:
-        s.status = SeatStatus.available
-        s.locked_by = None
-        s.locked_until = None
-        db.add(s)
-    await db.flush()
-    return True
+async def get_locked_seats(db: AsyncSession):
+    """(id, showtime_id, locked_until) of every locked seat — served by the status/expiry index."""
+    q = await db.execute(
+        select(Seat.id, Seat.showtime_id, Seat.locked_until).where(Seat.status == SeatStatus.locked)
+    )
+    return q.all()
 
 
 # BOOKING
 async def create_booking(db: AsyncSession, user_id: int, showtime_id: int, seats_payload: List[Dict[str, Any]], total_amount: int) -> Booking:
-    booking = Booking(user_id=user_id, showtime_id=showtime_id, seats=seats_payload, total_amount=total_amount)
+    booking = Booking(user_id=user_id, showtime_id=showtime_id, total_amount=total_amount)
     db.add(booking)
     await db.flush()
+    await add_booking_seats(db, booking.id, seats_payload)   #type: ignore
     return booking
 
 
-async def mark_seats_booked(db: AsyncSession, seat_ids: List[int]):
-    q = await db.execute(select(Seat).where(Seat.id.in_(seat_ids)).with_for_update())
-    seats = q.scalars().all()
-    for s in seats:
-        s.status = SeatStatus.booked
-        s.locked_by = None
-        s.locked_until = None
-        db.add(s)
-    await db.flush()
-    
+def with_booking_seats():
+    """Loader option for Booking.seats (the relationship never lazy-loads)."""
+    return selectinload(Booking.booking_seats)
+
 
-async def get_booking_by_id(db, booking_id: int):
-    result = await db.execute(select(Booking).filter(Booking.id == booking_id))
+async def add_booking_seats(db: AsyncSession, booking_id: int, seats_payload: List[Dict[str, Any]]):
+    """Attach seats ({"seat_id", "price"}) to a booking; the unique seat index rejects a double booking."""
+    if not seats_payload:
+        return
+    await db.execute(
+        insert(BookingSeat),
+        [{"booking_id": booking_id, "seat_id": s["seat_id"], "price": s["price"]} for s in seats_payload],
+    )
+
+
+async def remove_booking_seats(db: AsyncSession, booking_id: int, seat_ids: List[int]) -> Dict[int, int]:
+    """Detach seats from a booking; returns {seat_id: price} for the rows actually removed."""
+    if not seat_ids:
+        return {}
+    result = await db.execute(
+        delete(BookingSeat)
+        .where(BookingSeat.booking_id == booking_id, BookingSeat.seat_id.in_(seat_ids))
+        .returning(BookingSeat.seat_id, BookingSeat.price)
+        .execution_options(synchronize_session=False)
+    )
+    return {row.seat_id: row.price for row in result}
+
+
+async def get_booking_seat_prices(db: AsyncSession, booking_id: int) -> Dict[int, int]:
+    """{seat_id: price snapshot} of a booking, in booking order."""
+    result = await db.execute(
+        select(BookingSeat.seat_id, BookingSeat.price)
+        .where(BookingSeat.booking_id == booking_id)
+        .order_by(BookingSeat.id)
+    )
+    return {row.seat_id: row.price for row in result}
+
+
+async def get_booking_by_id(db, booking_id: int, with_seats: bool = False):
+    query = select(Booking).filter(Booking.id == booking_id)
+    if with_seats:
+        query = query.options(with_booking_seats())
+    result = await db.execute(query)
     return result.scalars().first()
 
 async def mark_seats_available(db, seat_ids: list[int]):
@@ -136,28 +361,61 @@ async def mark_seats_available(db, seat_ids: list[int]):
         .values(status="available", locked_by=None, locked_until=None)
     )
 
-from sqlalchemy import update
-from sqlalchemy.future import select
-from app.db.models import Booking
-import json
-
 async def remove_seats_from_booking(db, booking_id: int, seat_ids: list[int]):
-    result = await db.execute(select(Booking).where(Booking.id == booking_id))
-    booking = result.scalars().first()
+    booking = await get_booking_by_id(db, booking_id)
     if not booking:
         return None
 
-    # Filter out cancelled seats
-    remaining = [s for s in booking.seats if s["seat_id"] not in seat_ids]
+    # indexed deletes of the cancelled seats only
+    await remove_booking_seats(db, booking_id, seat_ids)
+    await db.commit()
+    booking = await get_booking_by_id(db, booking_id, with_seats=True)
+    return booking.seats
+
+
+# PROCESSED REQUESTS (TicketPool idempotency)
+def _json_default(value):
+    return value.isoformat() if isinstance(value, (date, datetime)) else str(value)
 
-    # Update DB JSON
+
+async def record_processed_requests(
+    db: AsyncSession, showtime_id: int, outcomes: List[Tuple[str, Dict[str, Any], List[Dict[str, Any]]]]
+):
+    """Store (request_id, result, events) in the caller's transaction, so they commit with the request's effects."""
+    if not outcomes:
+        return
     await db.execute(
-        update(Booking)
-        .where(Booking.id == booking_id)
-        .values(seats=remaining)
+        insert(ProcessedRequest),
+        [
+            {
+                "request_id": request_id,
+                "showtime_id": showtime_id,
+                "outcome": json.dumps({"result": result, "events": events}, default=_json_default),
+            }
+            for request_id, result, events in outcomes
+        ],
     )
-    await db.commit()
-    return remaining
+
+
+async def get_processed_requests(db: AsyncSession, request_ids: List[str]) -> Dict[str, Tuple[Dict[str, Any], List[Dict[str, Any]]]]:
+    """{request_id: (result, events)} of the given requests that were already committed."""
+    if not request_ids:
+        return {}
+    rows = await db.execute(
+        select(ProcessedRequest.request_id, ProcessedRequest.outcome).where(ProcessedRequest.request_id.in_(request_ids))
+    )
+    outcomes = {}
+    for request_id, raw in rows:
+        outcome = json.loads(raw)
+        outcomes[request_id] = (outcome["result"], outcome["events"])
+    return outcomes
+
+
+async def prune_processed_requests(db: AsyncSession, before: datetime) -> int:
+    result = await db.execute(
+        delete(ProcessedRequest).where(ProcessedRequest.created_at < before).execution_options(synchronize_session=False)
+    )
+    return result.rowcount or 0
 
 
 async def create_user_if_not_exists(db, email, name, picture=None):
@@ -1,13 +1,140 @@
 # app/db/base.py
 
-from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+import time
+from typing import Any, Dict, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine, async_sessionmaker, AsyncSession
 from sqlalchemy.orm import declarative_base
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 from app.core.config import settings
 
-# ✅ Async engine
-engine = create_async_engine(
-    settings.DATABASE_URL
-)
+
+# ------------------------------------------------------------
+# 📊 Pool instrumentation
+# ------------------------------------------------------------
+class PoolStats:
+    """Checkout wait, connection hold time and saturation of one engine's pool."""
+
+    def __init__(self, name: str, size: int, max_overflow: int):
+        self.name = name
+        self.size = size
+        self.max_overflow = max_overflow
+        self.checkouts = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.slow_checkouts = 0     # waited longer than DB_POOL_SLOW_CHECKOUT_MS
+        self.timeouts = 0
+        self.hold_total = 0.0
+        self.hold_max = 0.0
+        self.peak_checked_out = 0
+        self.pool = None  # current pool instance (engines recreate it on dispose)
+
+    @property
+    def checked_out(self) -> int:
+        return self.pool.checkedout() if self.pool is not None else 0
+
+    def record_wait(self, seconds: float):
+        self.checkouts += 1
+        self.wait_total += seconds
+        self.wait_max = max(self.wait_max, seconds)
+        if seconds * 1000 >= settings.DB_POOL_SLOW_CHECKOUT_MS:
+            self.slow_checkouts += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        capacity = self.size + max(self.max_overflow, 0)
+        checked_out = self.checked_out
+        return {
+            "pool": self.name,
+            "size": self.size,
+            "max_overflow": self.max_overflow,
+            "checked_out": checked_out,
+            "peak_checked_out": self.peak_checked_out,
+            "saturation": round(checked_out / capacity, 3) if capacity else None,
+            "checkouts": self.checkouts,
+            "wait_avg_ms": round(self.wait_total / self.checkouts * 1000, 3) if self.checkouts else 0.0,
+            "wait_max_ms": round(self.wait_max * 1000, 3),
+            "slow_checkouts": self.slow_checkouts,
+            "timeouts": self.timeouts,
+            "hold_avg_ms": round(self.hold_total / self.checkouts * 1000, 3) if self.checkouts else 0.0,
+            "hold_max_ms": round(self.hold_max * 1000, 3),
+        }
+
+
+pool_stats: Dict[str, PoolStats] = {}
+
+
+class InstrumentedPool(AsyncAdaptedQueuePool):
+    """Queue pool that times how long callers wait for a connection."""
+
+    def _do_get(self):
+        stats = pool_stats[self._orig_logging_name]
+        stats.pool = self
+        start = time.perf_counter()
+        try:
+            conn = super()._do_get()
+        except PoolTimeoutError:
+            stats.timeouts += 1
+            raise
+        stats.record_wait(time.perf_counter() - start)
+        return conn
+
+
+def _make_engine(name: str, pool_size: int, max_overflow: int, url: Optional[str] = None, writer: bool = False) -> AsyncEngine:
+    url = make_url(url or settings.DATABASE_URL)
+    kwargs: Dict[str, Any] = {
+        "poolclass": InstrumentedPool,
+        "pool_size": pool_size,
+        "max_overflow": max_overflow,
+        "pool_timeout": settings.DB_POOL_TIMEOUT_SECONDS,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+        "pool_recycle": settings.DB_POOL_RECYCLE_SECONDS,
+        "pool_logging_name": name,
+    }
+    if url.drivername == "postgresql+asyncpg":
+        # SQLAlchemy's prepared statement cache (per connection) plus asyncpg's own
+        url = url.update_query_dict({"prepared_statement_cache_size": str(settings.DB_STATEMENT_CACHE_SIZE)})
+        kwargs["connect_args"] = {"statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE}
+
+    stats = pool_stats[name] = PoolStats(name, pool_size, max_overflow)
+    eng = create_async_engine(url, **kwargs)
+
+    if url.get_backend_name() == "sqlite":
+        # pysqlite never emits BEGIN, so the first SAVEPOINT of a batch opened the
+        # transaction and its RELEASE committed it. Let SQLAlchemy own BEGIN.
+        # Writers take the write lock up front: two batches that both read their
+        # seat state before writing would otherwise deadlock on the upgrade.
+        begin = "BEGIN IMMEDIATE" if writer else "BEGIN"
+
+        @event.listens_for(eng.sync_engine, "connect")
+        def _on_connect(dbapi_conn, record):
+            dbapi_conn.isolation_level = None
+
+        @event.listens_for(eng.sync_engine, "begin")
+        def _on_begin(conn):
+            conn.exec_driver_sql(begin)
+
+    @event.listens_for(eng.sync_engine, "checkout")
+    def _on_checkout(dbapi_conn, record, proxy):
+        record.info["checked_out_at"] = time.perf_counter()
+        stats.peak_checked_out = max(stats.peak_checked_out, stats.checked_out)
+
+    @event.listens_for(eng.sync_engine, "checkin")
+    def _on_checkin(dbapi_conn, record):
+        started = record.info.pop("checked_out_at", None)
+        if started is None:
+            return
+        held = time.perf_counter() - started
+        stats.hold_total += held
+        stats.hold_max = max(stats.hold_max, held)
+
+    return eng
+
+
+# ✅ Async engine (request handlers and background reads)
+engine = _make_engine("default", settings.DB_POOL_SIZE, settings.DB_MAX_OVERFLOW)
 
 # ✅ Async session factory
 async_session = async_sessionmaker(
@@ -16,15 +143,51 @@ async_session = async_sessionmaker(
     class_=AsyncSession
 )
 
+# ✅ Separate pool for TicketPool writers, so browse traffic cannot starve bookings
+if settings.BOOKING_DB_POOL_SIZE > 0:
+    booking_engine = _make_engine("booking", settings.BOOKING_DB_POOL_SIZE, settings.BOOKING_DB_MAX_OVERFLOW, writer=True)
+else:
+    booking_engine = engine
+
+booking_session = async_sessionmaker(
+    bind=booking_engine,
+    expire_on_commit=False,
+    class_=AsyncSession
+)
+
+# ✅ Optional read replica for browse endpoints (routing in app/db/replica.py)
+read_engine: Optional[AsyncEngine] = None
+read_session: Optional[async_sessionmaker] = None
+if settings.DATABASE_READ_URL:
+    read_engine = _make_engine("read", settings.READ_DB_POOL_SIZE, settings.READ_DB_MAX_OVERFLOW, settings.DATABASE_READ_URL)
+    read_session = async_sessionmaker(
+        bind=read_engine,
+        expire_on_commit=False,
+        class_=AsyncSession
+    )
+
 # ✅ Base model
 Base = declarative_base()
 
 # ✅ Helper to initialize tables (only for development)
 async def init_models():
+    from app.db.migrations import create_missing_indexes, migrate_booking_seats, migrate_seat_layouts
+
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
+        await conn.run_sync(migrate_booking_seats)
+        await conn.run_sync(migrate_seat_layouts)
+        await conn.run_sync(create_missing_indexes)
 
 # ✅ Dependency to get async DB session per request
 async def get_db():
     async with async_session() as db:
         yield db
+
+
+async def dispose_engines():
+    await engine.dispose()
+    if booking_engine is not engine:
+        await booking_engine.dispose()
+    if read_engine is not None:
+        await read_engine.dispose()
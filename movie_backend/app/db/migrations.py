@@ -0,0 +1,167 @@
+# app/db/migrations.py
+import json
+from collections import defaultdict
+from typing import Dict, List, Set, Tuple
+
+from sqlalchemy import MetaData, Table, inspect, text
+from sqlalchemy.engine import Connection
+from sqlalchemy.schema import CreateTable
+
+from app.db.crud import layout_signature
+from app.db.database import Base
+from app.db.models import BookingSeat, HallLayout, LayoutSeat, Seat, ShowTime
+
+_CHUNK = 1000
+
+
+def create_missing_indexes(conn: Connection):
+    """create_all skips existing tables, so indexes added to their models later are created here."""
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(conn, checkfirst=True)
+
+
+def migrate_booking_seats(conn: Connection):
+    """
+    Databases created before booking_seats existed keep each booking's seats
+    in a JSON `bookings.seats` column. Copy them into booking_seats and drop
+    the column (new bookings no longer write it). Runs inside init_models'
+    transaction, so a failure leaves the old schema as it was.
+    """
+    if "seats" not in {c["name"] for c in inspect(conn).get_columns("bookings")}:
+        return
+
+    legacy = []
+    for booking_id, raw in conn.execute(text("SELECT id, seats FROM bookings ORDER BY id")):
+        seats = json.loads(raw) if isinstance(raw, (str, bytes)) else raw
+        legacy.extend((booking_id, s) for s in seats or [] if s.get("seat_id") is not None)
+
+    # current seat prices, for entries written without one (and to skip seats that no longer exist)
+    seat_ids = list({s["seat_id"] for _, s in legacy})
+    prices: Dict[int, int] = {}
+    for i in range(0, len(seat_ids), _CHUNK):
+        chunk = seat_ids[i:i + _CHUNK]
+        params = {f"s{j}": sid for j, sid in enumerate(chunk)}
+        placeholders = ", ".join(f":{name}" for name in params)
+        prices.update(conn.execute(text(f"SELECT id, price FROM seats WHERE id IN ({placeholders})"), params).all())
+
+    taken = set(conn.execute(text("SELECT seat_id FROM booking_seats")).scalars())
+    rows: List[dict] = []
+    for booking_id, seat in legacy:
+        seat_id = seat["seat_id"]
+        if seat_id not in prices:
+            continue
+        if seat_id in taken:
+            # the old schema could not prevent this; the earliest booking keeps the seat
+            print(f"⚠️ booking {booking_id}: seat {seat_id} already belongs to another booking, skipped")
+            continue
+        taken.add(seat_id)
+        rows.append({"booking_id": booking_id, "seat_id": seat_id, "price": seat.get("price", prices[seat_id])})
+
+    for i in range(0, len(rows), _CHUNK):
+        conn.execute(BookingSeat.__table__.insert(), rows[i:i + _CHUNK])
+    conn.execute(text("ALTER TABLE bookings DROP COLUMN seats"))
+    print(f"✅ Migrated {len(rows)} booked seats from bookings.seats to booking_seats.")
+
+
+def migrate_seat_layouts(conn: Connection):
+    """
+    Databases created before hall layouts stored row, number and price on
+    every seat of every showtime. Derive one layout per distinct hall
+    definition (a price tier per distinct price), point showtimes and seats
+    at it, and drop the per-seat columns. Seat ids are kept, so bookings and
+    clients are unaffected. Must run after migrate_booking_seats (which reads
+    seats.price).
+    """
+    if "layout_seat_id" in {c["name"] for c in inspect(conn).get_columns("seats")}:
+        return
+
+    if "layout_id" not in {c["name"] for c in inspect(conn).get_columns("showtimes")}:
+        conn.execute(text("ALTER TABLE showtimes ADD COLUMN layout_id INTEGER REFERENCES hall_layouts(id)"))
+    conn.execute(text("ALTER TABLE seats ADD COLUMN layout_seat_id INTEGER"))
+
+    halls = dict(conn.execute(text("SELECT id, hall FROM showtimes")).all())
+    by_showtime: Dict[int, List[Tuple[str, int, int, int]]] = defaultdict(list)
+    for seat_id, showtime_id, row, number, price in conn.execute(
+        text('SELECT id, showtime_id, "row", number, price FROM seats')
+    ):
+        by_showtime[showtime_id].append((row, number, price, seat_id))
+
+    layouts: Dict[str, Tuple[int, Dict[Tuple[str, int], int]]] = {}   # signature -> (layout id, (row, number) -> layout seat id)
+    showtime_layouts: List[dict] = []
+    seat_links: List[dict] = []
+    for showtime_id, seats in by_showtime.items():
+        tiers = _price_tiers({price for _, _, price, _ in seats})
+        category = {price: name for name, price in tiers.items()}
+        definition = [(row, number, category[price]) for row, number, price, _ in seats]
+        name = halls.get(showtime_id) or "Main Hall"
+        signature = layout_signature(name, definition, tiers)
+        if signature not in layouts:
+            layouts[signature] = _insert_layout(conn, name, signature, definition, tiers)
+        layout_id, layout_seats = layouts[signature]
+        showtime_layouts.append({"showtime_id": showtime_id, "layout_id": layout_id})
+        seat_links.extend({"seat_id": sid, "layout_seat_id": layout_seats[(row, number)]} for row, number, _, sid in seats)
+
+    for i in range(0, len(showtime_layouts), _CHUNK):
+        conn.execute(text("UPDATE showtimes SET layout_id = :layout_id WHERE id = :showtime_id"), showtime_layouts[i:i + _CHUNK])
+    for i in range(0, len(seat_links), _CHUNK):
+        conn.execute(text("UPDATE seats SET layout_seat_id = :layout_seat_id WHERE id = :seat_id"), seat_links[i:i + _CHUNK])
+
+    if conn.dialect.name == "sqlite":
+        # SQLite cannot drop columns that are part of a constraint: rebuild the
+        # table (foreign keys are not enforced on these connections, so
+        # booking_seats rows keep pointing at the same seat ids)
+        _rebuild_table(conn, Seat.__table__, [ShowTime.__table__, LayoutSeat.__table__])
+    else:
+        conn.execute(text("ALTER TABLE seats DROP CONSTRAINT IF EXISTS uix_showtime_row_number"))
+        conn.execute(text('ALTER TABLE seats DROP COLUMN "row", DROP COLUMN number, DROP COLUMN price'))
+        conn.execute(text("ALTER TABLE seats ALTER COLUMN layout_seat_id SET NOT NULL"))
+        conn.execute(text(
+            "ALTER TABLE seats ADD CONSTRAINT seats_layout_seat_id_fkey "
+            "FOREIGN KEY (layout_seat_id) REFERENCES layout_seats (id)"
+        ))
+        conn.execute(text("ALTER TABLE seats ADD CONSTRAINT uix_showtime_layout_seat UNIQUE (showtime_id, layout_seat_id)"))
+    print(f"✅ Migrated {len(seat_links)} seats of {len(showtime_layouts)} showtimes onto {len(layouts)} hall layouts.")
+
+
+def _price_tiers(prices: Set[int]) -> Dict[str, int]:
+    # cheapest price is "standard"; legacy data has no category names for the others
+    ordered = sorted(prices)
+    return {("standard" if i == 0 else f"tier_{i + 1}"): price for i, price in enumerate(ordered)}
+
+
+def _insert_layout(
+    conn: Connection,
+    name: str,
+    signature: str,
+    seats: List[Tuple[str, int, str]],
+    price_tiers: Dict[str, int],
+) -> Tuple[int, Dict[Tuple[str, int], int]]:
+    layout_id = conn.execute(
+        HallLayout.__table__.insert()
+        .values(name=name, signature=signature, price_tiers=price_tiers)
+        .returning(HallLayout.__table__.c.id)
+    ).scalar_one()
+    conn.execute(
+        LayoutSeat.__table__.insert(),
+        [{"layout_id": layout_id, "row": r, "number": n, "category": c} for r, n, c in seats],
+    )
+    ids = conn.execute(
+        text('SELECT id, "row", number FROM layout_seats WHERE layout_id = :layout_id'), {"layout_id": layout_id}
+    )
+    return layout_id, {(row, number): lsid for lsid, row, number in ids}
+
+
+def _rebuild_table(conn: Connection, table: Table, referenced: List[Table]):
+    """Recreate `table` from its current model definition, keeping the rows of the model's columns."""
+    metadata = MetaData()
+    for t in referenced:
+        t.to_metadata(metadata)   # lets the new table's foreign keys compile
+    new = table.to_metadata(metadata, name=f"{table.name}__new")
+    columns = ", ".join(f'"{c.name}"' for c in table.columns)
+    conn.execute(CreateTable(new))
+    conn.execute(text(f"INSERT INTO {new.name} ({columns}) SELECT {columns} FROM {table.name}"))
+    conn.execute(text(f"DROP TABLE {table.name}"))
+    conn.execute(text(f"ALTER TABLE {new.name} RENAME TO {table.name}"))
+    for index in table.indexes:
+        index.create(conn)
@@ -1,4 +1,6 @@
-from sqlalchemy import JSON, Column, ForeignKey, Integer, String, Boolean, DateTime, UniqueConstraint, Enum
+from typing import Any, Dict, List
+
+from sqlalchemy import JSON, Column, ForeignKey, Integer, String, Boolean, DateTime, Text, UniqueConstraint, Enum, Index
 from datetime import datetime, timezone
 from sqlalchemy.orm import relationship
 import enum
@@ -34,6 +36,13 @@ class Movie(Base):
 
     showtimes = relationship("ShowTime", back_populates="movie", cascade="all, delete-orphan")
 
+    # keyset pagination of the catalog pages (see crud.list_movies)
+    __table_args__ = (
+        Index("ix_movies_release_date_id", "release_date", "id"),
+        Index("ix_movies_rating_id", "rating", "id"),
+        Index("ix_movies_language_release_date_id", "language", "release_date", "id"),
+    )
+
 class ShowTime(Base):
     __tablename__ = "showtimes"
     id = Column(Integer, primary_key=True, index=True)
@@ -41,32 +50,107 @@ class ShowTime(Base):
     start_time = Column((DateTime(timezone=True)), nullable=False, index=True)
     location = Column(String(255), default="Pune", nullable=False)
     hall = Column(String(100), default="Main Hall")
+    layout_id = Column(Integer, ForeignKey("hall_layouts.id"), nullable=True)   # geometry/prices of its seats
     created_at = Column((DateTime(timezone=True)), default=datetime.now(timezone.utc))
 
     movie = relationship("Movie", back_populates="showtimes")
     seats = relationship("Seat", back_populates="showtime", cascade="all, delete-orphan")
 
+    __table_args__ = (
+        Index("ix_showtimes_movie_location_start", "movie_id", "location", "start_time"),   # catalog location/date filters
+    )
+
+class HallLayout(Base):
+    """
+    Seat geometry, categories and price tiers of a hall, stored once and shared
+    by every showtime scheduled with it. Never edited once showtimes use it
+    (processes cache it indefinitely); a changed hall gets a new layout.
+    """
+    __tablename__ = "hall_layouts"
+    id = Column(Integer, primary_key=True, index=True)
+    name = Column(String(100), nullable=False)
+    signature = Column(String(64), nullable=False, unique=True)   # digest of the definition, to reuse identical layouts
+    price_tiers = Column(JSON, nullable=False)                    # {"standard": 150, "premium": 250}
+    created_at = Column(DateTime(timezone=True), default=datetime.now(timezone.utc))
+
+class LayoutSeat(Base):
+    __tablename__ = "layout_seats"
+    id = Column(Integer, primary_key=True)
+    layout_id = Column(Integer, ForeignKey("hall_layouts.id", ondelete="CASCADE"), nullable=False, index=True)
+    row = Column(String(4), nullable=False)
+    number = Column(Integer, nullable=False)
+    category = Column(String(50), nullable=False, default="standard")   # key into HallLayout.price_tiers
+
+    __table_args__ = (
+        UniqueConstraint("layout_id", "row", "number", name="uix_layout_row_number"),
+    )
+
 class Seat(Base):
+    """A layout seat's state for one showtime; row, number and price come from the layout."""
     __tablename__ = "seats"
     id = Column(Integer, primary_key=True, index=True)
     showtime_id = Column(Integer, ForeignKey("showtimes.id", ondelete="CASCADE"), nullable=False, index=True)
-    row = Column(String(4), nullable=False)
-    number = Column(Integer, nullable=False)
+    layout_seat_id = Column(Integer, ForeignKey("layout_seats.id"), nullable=False)
     status = Column(Enum(SeatStatus), default=SeatStatus.available, nullable=False)
     locked_by = Column(Integer, nullable=True)   # user_id who locked
     locked_until = Column((DateTime(timezone=True)), nullable=True)
-    price = Column(Integer, nullable=False, default=100)
 
     showtime = relationship("ShowTime", back_populates="seats")
+    layout_seat = relationship("LayoutSeat", lazy="joined", innerjoin=True)
 
-    __table_args__ = (UniqueConstraint("showtime_id", "row", "number", name="uix_showtime_row_number"),)
+    __table_args__ = (
+        UniqueConstraint("showtime_id", "layout_seat_id", name="uix_showtime_layout_seat"),
+        Index("ix_seats_status_locked_until", "status", "locked_until"),   # lock expiry lookups
+    )
 
 class Booking(Base):
     __tablename__ = "bookings"
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
     showtime_id = Column(Integer, ForeignKey("showtimes.id"), nullable=False, index=True)
-    seats = Column(JSON, nullable=False)                  # [{"row":"A","number":1, "seat_id": 123}]
     total_amount = Column(Integer, nullable=False, default=0)
     status = Column(String(50), default="confirmed")      # confirmed/cancelled/refunded
-    created_at = Column((DateTime(timezone=True)), default=datetime.now(timezone.utc))
\ No newline at end of file
+    created_at = Column((DateTime(timezone=True)), default=datetime.now(timezone.utc))
+
+    # load explicitly (crud.with_booking_seats) where the seats are needed
+    booking_seats = relationship(
+        "BookingSeat", back_populates="booking", order_by="BookingSeat.id",
+        cascade="all, delete-orphan", lazy="raise",
+    )
+
+    @property
+    def seats(self) -> List[Dict[str, Any]]:
+        """[{"seat_id": 123, "row": "A", "number": 1, "price": 150}], the shape the API has always returned."""
+        return [bs.payload() for bs in self.booking_seats]
+
+class BookingSeat(Base):
+    """One booked seat of a booking; the row exists only while the seat is booked."""
+    __tablename__ = "booking_seats"
+    id = Column(Integer, primary_key=True)
+    booking_id = Column(Integer, ForeignKey("bookings.id", ondelete="CASCADE"), nullable=False, index=True)
+    seat_id = Column(Integer, ForeignKey("seats.id", ondelete="CASCADE"), nullable=False)
+    price = Column(Integer, nullable=False)               # price snapshot at booking time
+
+    booking = relationship("Booking", back_populates="booking_seats")
+    seat = relationship("Seat", lazy="joined", innerjoin=True)
+
+    __table_args__ = (
+        UniqueConstraint("seat_id", name="uix_booking_seats_seat"),   # a seat is in at most one booking
+    )
+
+    def payload(self) -> Dict[str, Any]:
+        layout_seat = self.seat.layout_seat
+        return {"seat_id": self.seat_id, "row": layout_seat.row, "number": layout_seat.number, "price": self.price}
+
+class ProcessedRequest(Base):
+    """
+    Outcome of a TicketPool booking/cancel/update, written in the transaction
+    that applied it. A request seen again (redelivered by the durable queue,
+    or replayed after a commit whose outcome was unknown) is answered from
+    here instead of being applied twice.
+    """
+    __tablename__ = "processed_requests"
+    request_id = Column(String(64), primary_key=True)
+    showtime_id = Column(Integer, nullable=False)
+    outcome = Column(Text, nullable=False)    # json {"result": ..., "events": [...]}
+    created_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc), nullable=False, index=True)
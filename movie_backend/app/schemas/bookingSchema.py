@@ -1,6 +1,6 @@
 # app/schemas/booking.py
 from typing import List, Optional, Dict, Any
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from datetime import datetime
 
 class SeatSelection(BaseModel):
@@ -13,7 +13,7 @@ class CancelBookingRequest(BaseModel):
 
 class BookingRequest(BaseModel):
     showtime_id: int
-    seat_ids: List[int]
+    seat_ids: List[int] = Field(..., min_length=1)
 
 
 class BookingResponse(BaseModel):
@@ -31,4 +31,16 @@ class BookingResponse(BaseModel):
 
 class BookingUpdateRequest(BaseModel):
     """Schema for editing a booking (swapping seats)"""
-    new_seat_ids: List[int]
\ No newline at end of file
+    new_seat_ids: List[int]
+
+
+class SeatHoldRequest(BaseModel):
+    showtime_id: int
+    seat_ids: List[int]
+
+
+class SeatHoldResponse(BaseModel):
+    hold_id: str
+    showtime_id: int
+    seat_ids: List[int]
+    expires_at: datetime
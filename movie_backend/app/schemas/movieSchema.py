@@ -1,7 +1,7 @@
 # app/schemas/movie.py
-from typing import Optional
+from typing import Dict, List, Optional
 from datetime import datetime
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 
 class MovieBase(BaseModel):
@@ -32,6 +32,48 @@ class ShowTimeOut(BaseModel):
     start_time: datetime
     hall: Optional[str]
     location: Optional[str] = "Pune"
+    layout_id: Optional[int] = None
 
     class Config:
         from_attributes = True
+
+
+class SeatLayout(BaseModel):
+    """
+    Hall template: rows x cols seats. Rows listed in row_categories are priced
+    by that entry of price_tiers, every other row is "standard" at `price`.
+    """
+    rows: List[str] = Field(default_factory=lambda: ["A", "B", "C", "D"], min_length=1)
+    cols: int = Field(10, ge=1, le=200)
+    price: int = Field(100, ge=0)
+    price_tiers: Dict[str, int] = Field(default_factory=dict)       # e.g. {"premium": 250}
+    row_categories: Dict[str, str] = Field(default_factory=dict)    # e.g. {"D": "premium"}
+
+
+class HallLayoutCreate(BaseModel):
+    name: str = "Main Hall"
+    layout: SeatLayout = Field(default_factory=SeatLayout)
+
+
+class LayoutSeatOut(BaseModel):
+    id: int
+    row: str
+    number: int
+    category: str
+
+    class Config:
+        from_attributes = True
+
+
+class HallLayoutOut(BaseModel):
+    id: int
+    name: str
+    price_tiers: Dict[str, int]
+    seats: List[LayoutSeatOut] = []
+
+
+class ShowTimeBatchCreate(BaseModel):
+    start_times: List[datetime] = Field(..., min_length=1, max_length=1000)
+    hall: str = "Main Hall"
+    layout_id: Optional[int] = None          # a stored hall layout; `layout` is used when omitted
+    layout: SeatLayout = Field(default_factory=SeatLayout)
@@ -1,85 +1,403 @@
 import asyncio
+import math
+import time
 import traceback
-from typing import Dict, Any, List
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Any, List, Optional, Tuple
 
-from app.db.database import async_session
+from app.core.config import settings
+from app.db.database import async_session, booking_session
 from app.services.redis_client import get_redis
-from app.services.broadcast import broadcast_to_showtime
+from app.services.broadcast import publish_showtime_event
+from sqlalchemy.exc import IntegrityError
+
 from app.db.crud import (
-    lock_seats,
+    add_booking_seats,
+    claim_seats,
     create_booking,
-    mark_seats_booked,
-    get_seats_for_showtime,
     get_booking_by_id,
+    get_booking_seat_prices,
+    get_processed_requests,
     mark_seats_available,
+    prune_processed_requests,
+    record_processed_requests,
+    release_expired_locks,
+    remove_booking_seats,
 )
-from app.db.models import SeatStatus  # used to check seat status enum
+from app.services.durable_queue import DurableQueue
+from app.services.pool_cluster import MOVED
+from app.services.seat_cache import seat_cache
+from app.services.seat_holds import get_seat_holders
+from app.services.seat_state import SeatState, load_seat_state
+from app.services.showtime_meta import get_showtime_meta
 
 
 # ------------------------------------------------------------
 # 📦 Request Envelopes
 # ------------------------------------------------------------
+# request_id survives forwarding and durable redelivery; bookings, cancels and
+# updates record their outcome under it in the transaction that applies them.
 
 class BookingRequest:
-    def __init__(self, user_id: int, showtime_id: int, seat_ids: List[int], result_future: asyncio.Future):
+    def __init__(self, user_id: int, showtime_id: int, seat_ids: List[int], result_future: asyncio.Future, hold_id: Optional[str] = None, request_id: Optional[str] = None):
         self.user_id = user_id
         self.showtime_id = showtime_id
         self.seat_ids = seat_ids
         self.result_future = result_future
+        self.hold_id = hold_id  # set when confirming a seat hold
+        self.request_id = request_id or uuid.uuid4().hex
 
 
 class CancelRequest:
-    def __init__(self, booking_id: int, user_id: int, seat_ids: List[int], result_future: asyncio.Future):
+    def __init__(self, booking_id: int, user_id: int, seat_ids: List[int], result_future: asyncio.Future, request_id: Optional[str] = None):
         self.booking_id = booking_id
         self.user_id = user_id
         self.seat_ids = seat_ids
         self.result_future = result_future
+        self.request_id = request_id or uuid.uuid4().hex
 
 
 class UpdateRequest:
-    def __init__(self, booking_id: int, user_id: int, new_seat_ids: List[int], result_future: asyncio.Future):
+    def __init__(self, booking_id: int, user_id: int, new_seat_ids: List[int], result_future: asyncio.Future, request_id: Optional[str] = None):
         self.booking_id = booking_id
         self.user_id = user_id
         self.new_seat_ids = new_seat_ids
         self.result_future = result_future
+        self.request_id = request_id or uuid.uuid4().hex
+
+
+class ReleaseRequest:
+    def __init__(self, showtime_id: int, seat_ids: List[int], result_future: asyncio.Future, request_id: Optional[str] = None):
+        self.showtime_id = showtime_id
+        self.seat_ids = seat_ids
+        self.result_future = result_future
+        self.request_id = request_id or uuid.uuid4().hex
+
+
+class HoldExpiredRequest:
+    def __init__(self, showtime_id: int, seat_ids: List[int], result_future: asyncio.Future, request_id: Optional[str] = None):
+        self.showtime_id = showtime_id
+        self.seat_ids = seat_ids
+        self.result_future = result_future
+        self.request_id = request_id or uuid.uuid4().hex
+
+
+REQUEST_TYPES = {cls.__name__: cls for cls in (BookingRequest, CancelRequest, UpdateRequest, ReleaseRequest, HoldExpiredRequest)}
+
+# user requests are shed under overload; lock/hold maintenance always gets through
+SHEDDABLE = (BookingRequest, CancelRequest, UpdateRequest)
+
+
+class TicketPoolBusy(Exception):
+    """The pool is overloaded and did not queue the request; the caller should retry later."""
+
+    def __init__(self, message: str, status_code: int, retry_after: int):
+        super().__init__(message)
+        self.status_code = status_code   # 429: this showtime's queue is full, 503: no worker capacity
+        self.retry_after = retry_after
+
+    def as_result(self) -> Dict[str, Any]:
+        return {"success": False, "message": str(self), "status_code": self.status_code, "retry_after": self.retry_after}
 
 
 # ------------------------------------------------------------
 # 🎟️ Ticket Pool — per-showtime sequential processor
 # ------------------------------------------------------------
 
+SHUTTING_DOWN = {"success": False, "message": "booking service is shutting down, please retry"}
+RETRY_LATER = {"success": False, "message": "booking service is busy, please retry"}
+
+
+def _drain_queue(queue: asyncio.Queue) -> List[Any]:
+    reqs = []
+    while not queue.empty():
+        reqs.append(queue.get_nowait())
+    return reqs
+
+
+def _fail_requests(reqs: List[Any], result: Dict[str, Any]):
+    for req in reqs:
+        if not req.result_future.done():
+            req.result_future.set_result(dict(result))
+
+
 class TicketPool:
     """
     Handles concurrent seat operations (booking / cancel / update)
     safely by queuing them per showtime.
+
+    Each worker group-commits: it drains up to ``batch_size`` queued requests
+    (waiting at most ``batch_window_ms`` for more) and applies them in queue
+    order inside one transaction, one savepoint per request.
+
+    Workers also keep a SeatState (compact status/price table) per showtime,
+    loaded when the worker starts and updated after every commit. Since the
+    worker serializes all writes for its showtime, availability checks and
+    pricing are answered from memory; the conditional DB writes remain the
+    source of durability and a safety net against a stale table.
+
+    With a PoolCluster attached (TICKETPOOL_DISTRIBUTED), a showtime is only
+    processed by the node holding its lease; requests for showtimes owned
+    elsewhere are forwarded there.
+
+    With TICKETPOOL_QUEUE_BACKEND="redis" the per-showtime queues are Redis
+    Streams (see DurableQueue) instead of asyncio.Queues: requests survive a
+    restart, results are kept by request id, and the showtime's owner is only
+    woken up rather than handed the request. Running several processes on the
+    durable backend requires the distributed mode, so one consumer per showtime.
+
+    Workers retire after TICKETPOOL_WORKER_IDLE_SECONDS without work. User
+    requests are rejected with TicketPoolBusy instead of queued when their
+    showtime already has TICKETPOOL_QUEUE_CAPACITY waiting, or when
+    TICKETPOOL_MAX_WORKERS are live and none of them is idle.
     """
 
-    def __init__(self):
+    def __init__(self, batch_size: Optional[int] = None, batch_window_ms: Optional[int] = None):
         self.queues: Dict[int, asyncio.Queue] = {}
         self.workers: Dict[int, asyncio.Task] = {}
+        self.seat_states: Dict[int, SeatState] = {}
         self.redis = get_redis()
+        self.batch_size = max(1, batch_size if batch_size is not None else settings.TICKETPOOL_BATCH_SIZE)
+        window_ms = batch_window_ms if batch_window_ms is not None else settings.TICKETPOOL_BATCH_WINDOW_MS
+        self.batch_window = max(0, window_ms) / 1000
+        self.cluster = None   # PoolCluster in distributed mode
+        self._active: set = set()   # showtimes with a batch in progress
+        self.node_id = uuid.uuid4().hex
+        self.durable = DurableQueue() if settings.TICKETPOOL_QUEUE_BACKEND == "redis" else None
+        self._waiting: Dict[str, asyncio.Future] = {}   # durable requests submitted here, by request id
+        self._recovery_task: Optional[asyncio.Task] = None
+        self._prune_task: Optional[asyncio.Task] = None
+        self._last_used: Dict[int, float] = {}       # showtime_id -> loop time of its last batch
+        self._service_time: Dict[int, float] = {}    # showtime_id -> moving average seconds per request
+        self._default_service_time = 0.01
+        self._closing = False   # draining for shutdown: no new requests
 
     # --------------------------------------------------------
     # 🧩 Queue Management
     # --------------------------------------------------------
-    def _ensure_queue(self, showtime_id: int):
+    def _ensure_queue(self, showtime_id: int, shed: bool = False):
         """Ensure a dedicated queue/worker exists for each showtime."""
-        if showtime_id not in self.queues:
-            q = asyncio.Queue()
-            self.queues[showtime_id] = q
-            task = asyncio.create_task(self._worker(showtime_id, q))
-            self.workers[showtime_id] = task
+        task = self.workers.get(showtime_id)
+        if task is not None and not task.done():
+            return
+        self._make_room(shed)
+        self._last_used[showtime_id] = asyncio.get_running_loop().time()
+        if self.durable is not None:
+            self.workers[showtime_id] = asyncio.create_task(self._durable_worker(showtime_id))
+            return
+        q = asyncio.Queue()
+        self.queues[showtime_id] = q
+        self.workers[showtime_id] = asyncio.create_task(self._worker(showtime_id, q))
+
+    def _make_room(self, shed: bool):
+        """At the worker cap, evict the least recently used idle worker; shed the request if there is none."""
+        cap = settings.TICKETPOOL_MAX_WORKERS
+        if cap <= 0 or len(self.workers) < cap:
+            return
+        idle = [sid for sid in self.workers if self.is_idle(sid)]
+        if idle:
+            self._retire(min(idle, key=lambda sid: self._last_used.get(sid, 0.0)))
+        elif shed:
+            # the first worker to drain its queue frees a slot
+            soonest = min(self._drain_time(sid) for sid in self.workers)
+            raise TicketPoolBusy("booking service is at capacity, please retry", 503, soonest)
+
+    def _retire(self, showtime_id: int):
+        """Drop a showtime's worker with its queue and stats (cancelling it unless it is retiring itself)."""
+        task = self.workers.pop(showtime_id, None)
+        queue = self.queues.pop(showtime_id, None)
+        self.seat_states.pop(showtime_id, None)
+        self._last_used.pop(showtime_id, None)
+        self._service_time.pop(showtime_id, None)
+        if task is not None and task is not asyncio.current_task():
+            task.cancel()   # the worker answers the requests it already dequeued
+        if queue is not None:
+            # only idle workers are retired, so this is a safety net: never leave a caller waiting
+            _fail_requests(_drain_queue(queue), RETRY_LATER)
+
+    def _owns_worker(self, showtime_id: int) -> bool:
+        return self.workers.get(showtime_id) is asyncio.current_task()
+
+    def is_idle(self, showtime_id: int) -> bool:
+        # _active covers a batch from its first dequeued request until its results are out
+        q = self.queues.get(showtime_id)
+        return (q is None or q.empty()) and showtime_id not in self._active
+
+    def _drain_time(self, showtime_id: int, depth: Optional[int] = None) -> int:
+        """Whole seconds until a showtime's queue should be worked off (Retry-After)."""
+        if depth is None:
+            q = self.queues.get(showtime_id)
+            depth = q.qsize() if q is not None else 0
+        per_request = self._service_time.get(showtime_id, self._default_service_time)
+        return max(1, math.ceil(depth * per_request))
+
+    def _admit(self, showtime_id: int, depth: int):
+        cap = settings.TICKETPOOL_QUEUE_CAPACITY
+        if cap > 0 and depth >= cap:
+            raise TicketPoolBusy("too many requests for this showtime, please retry", 429, self._drain_time(showtime_id, depth))
+
+    def _check_open(self):
+        if self._closing:
+            raise TicketPoolBusy("booking service is shutting down, please retry", 503, 1)
+
+    def _enqueue_local(self, showtime_id: int, req):
+        shed = isinstance(req, SHEDDABLE)
+        q = self.queues.get(showtime_id)
+        if shed and q is not None:
+            self._admit(showtime_id, q.qsize())
+        self._ensure_queue(showtime_id, shed)
+        self.queues[showtime_id].put_nowait(req)
+
+    async def _submit(self, showtime_id: int, req) -> Dict[str, Any]:
+        """Queue a request on its showtime's worker, here or on the node that owns it."""
+        self._check_open()
+        if self.durable is not None:
+            return await self._submit_durable(showtime_id, req)
+        if self.cluster is not None:
+            owner = await self.cluster.route(showtime_id)
+            if owner is not None:
+                result = await self.cluster.forward(owner, showtime_id, req)
+                if "retry_after" in result:
+                    # shed by the owning node
+                    raise TicketPoolBusy(result["message"], result["status_code"], result["retry_after"])
+                return result
+        self._enqueue_local(showtime_id, req)
+        return await self._await_result(req)
+
+    async def _await_result(self, req) -> Dict[str, Any]:
+        try:
+            return await asyncio.wait_for(asyncio.shield(req.result_future), settings.TICKETPOOL_REQUEST_TIMEOUT_SECONDS)
+        except asyncio.TimeoutError:
+            return {"success": False, "message": "request timed out and may still complete, check your bookings"}
+
+    async def _submit_durable(self, showtime_id: int, req) -> Dict[str, Any]:
+        """Append to the showtime's stream, make sure its owner is consuming, wait for the result."""
+        # admission happens before the append: once in the stream, a request will be processed
+        if isinstance(req, SHEDDABLE):
+            if settings.TICKETPOOL_QUEUE_CAPACITY > 0:
+                self._admit(showtime_id, await self.durable.backlog(showtime_id))   #type: ignore
+            if self.cluster is None and showtime_id not in self.workers:
+                self._make_room(shed=True)
+        request_id = req.request_id
+        fut = asyncio.get_running_loop().create_future()
+        self._waiting[request_id] = fut
+        try:
+            fields = {k: v for k, v in vars(req).items() if k != "result_future"}
+            await self.durable.append(showtime_id, request_id, type(req).__name__, fields, reply_to=self.node_id)   #type: ignore
+            await self._wake(showtime_id)
+            result = await asyncio.wait_for(fut, settings.TICKETPOOL_FORWARD_TIMEOUT_SECONDS)
+        except asyncio.TimeoutError:
+            # still queued durably: the client can look the outcome up by request id
+            result = {"success": False, "message": "request queued, check its status later"}
+        finally:
+            self._waiting.pop(request_id, None)
+        return {**result, "request_id": request_id}
+
+    async def _wake(self, showtime_id: int):
+        if self.cluster is not None:
+            owner = await self.cluster.route(showtime_id)
+            if owner is not None:
+                await self.cluster.wake(owner, showtime_id)
+                return
+        self._ensure_queue(showtime_id)
+
+    async def submit_local(self, showtime_id: int, kind: str, fields: Dict[str, Any]) -> Dict[str, Any]:
+        """Run a request forwarded by another node on this node's worker."""
+        req = REQUEST_TYPES[kind](**fields, result_future=asyncio.get_running_loop().create_future())
+        try:
+            self._check_open()
+            self._enqueue_local(showtime_id, req)
+        except TicketPoolBusy as e:
+            return e.as_result()   # re-raised on the forwarding node
+        return await self._await_result(req)
+
+    # --------------------------------------------------------
+    # 🔁 Lifecycle
+    # --------------------------------------------------------
+    def start(self):
+        if self.durable is not None and self._recovery_task is None:
+            self._recovery_task = asyncio.create_task(self._recover_loop())
+        if self._prune_task is None:
+            self._prune_task = asyncio.create_task(self._prune_loop())
+
+    async def drain(self, timeout: Optional[float] = None):
+        """
+        Stop accepting requests and give queued ones up to `timeout` seconds
+        to finish. Durable entries not processed by then stay in their streams.
+        """
+        self._closing = True
+        timeout = settings.TICKETPOOL_DRAIN_TIMEOUT_SECONDS if timeout is None else timeout
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        while loop.time() < deadline:
+            if not self._active and all(q.empty() for q in self.queues.values()):
+                return
+            await asyncio.sleep(0.05)
+
+    async def stop(self):
+        self._closing = True   # cancelled workers answer their requests instead of re-queuing them
+        tasks = [t for t in [self._recovery_task, self._prune_task, *self.workers.values()] if t is not None]
+        for task in tasks:
+            task.cancel()
+        for task in tasks:
+            try:
+                await task
+            except (asyncio.CancelledError, Exception):
+                pass
+        # nobody is going to process what is left: answer the callers instead of leaving them hanging
+        # (cancelled workers have already answered the requests they had dequeued)
+        for queue in self.queues.values():
+            _fail_requests(_drain_queue(queue), SHUTTING_DOWN)
+        for fut in self._waiting.values():
+            if not fut.done():
+                fut.set_result({"success": False, "message": "request queued, check its status later"})
+        self._recovery_task = None
+        self._prune_task = None
+        self.workers.clear()
+        self.queues.clear()
+        self._last_used.clear()
+        self._service_time.clear()
+
+    async def _recover_loop(self):
+        """Resume showtimes whose streams still hold requests (after a restart or an owner crash)."""
+        while True:
+            try:
+                for showtime_id in await self.durable.queued_showtimes():   #type: ignore
+                    task = self.workers.get(showtime_id)
+                    if task is not None and not task.done():
+                        continue
+                    if self.cluster is not None and await self.cluster.route(showtime_id) is not None:
+                        continue  # a live owner is responsible for it
+                    self._ensure_queue(showtime_id)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                traceback.print_exc()
+            await asyncio.sleep(settings.TICKETPOOL_RECOVERY_INTERVAL_SECONDS)
+
+    async def _prune_loop(self):
+        """Forget processed request outcomes once nothing can redeliver them."""
+        retention = settings.TICKETPOOL_PROCESSED_RETENTION_SECONDS
+        while True:
+            try:
+                async with booking_session() as db:
+                    await prune_processed_requests(db, datetime.now(timezone.utc) - timedelta(seconds=retention))
+                    await db.commit()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                traceback.print_exc()
+            await asyncio.sleep(max(60, retention / 24))
 
     # --------------------------------------------------------
     # 🟢 Public enqueue methods
     # --------------------------------------------------------
-    async def enqueue_booking(self, user_id: int, showtime_id: int, seat_ids: List[int]) -> Dict[str, Any]:
+    async def enqueue_booking(self, user_id: int, showtime_id: int, seat_ids: List[int], hold_id: Optional[str] = None) -> Dict[str, Any]:
         loop = asyncio.get_running_loop()
         fut = loop.create_future()
-        br = BookingRequest(user_id=user_id, showtime_id=showtime_id, seat_ids=seat_ids, result_future=fut)
-        self._ensure_queue(showtime_id)
-        await self.queues[showtime_id].put(br)
-        return await fut
+        br = BookingRequest(user_id=user_id, showtime_id=showtime_id, seat_ids=seat_ids, result_future=fut, hold_id=hold_id)
+        return await self._submit(showtime_id, br)
 
     async def enqueue_cancel(self, booking_id: int, user_id: int, seat_ids: List[int]) -> Dict[str, Any]:
         async with async_session() as db:
@@ -93,9 +411,7 @@ class TicketPool:
         loop = asyncio.get_running_loop()
         fut = loop.create_future()
         cr = CancelRequest(booking_id=booking_id, user_id=user_id, seat_ids=seat_ids, result_future=fut)
-        self._ensure_queue(showtime_id)
-        await self.queues[showtime_id].put(cr)
-        return await fut
+        return await self._submit(showtime_id, cr)
 
     async def enqueue_update(self, booking_id: int, user_id: int, new_seat_ids: List[int]) -> Dict[str, Any]:
         async with async_session() as db:
@@ -109,107 +425,482 @@ class TicketPool:
         loop = asyncio.get_running_loop()
         fut = loop.create_future()
         ur = UpdateRequest(booking_id=booking_id, user_id=user_id, new_seat_ids=new_seat_ids, result_future=fut)
-        self._ensure_queue(showtime_id)
-        await self.queues[showtime_id].put(ur)
-        return await fut
+        return await self._submit(showtime_id, ur)
+
+    async def enqueue_release(self, showtime_id: int, seat_ids: List[int]) -> Dict[str, Any]:
+        """Release expired seat locks through the showtime's queue (used by the lock reaper)."""
+        loop = asyncio.get_running_loop()
+        fut = loop.create_future()
+        rr = ReleaseRequest(showtime_id=showtime_id, seat_ids=seat_ids, result_future=fut)
+        return await self._submit(showtime_id, rr)
+
+    async def enqueue_hold_expired(self, showtime_id: int, seat_ids: List[int]) -> Dict[str, Any]:
+        """Announce seats whose Redis hold lapsed without being confirmed."""
+        loop = asyncio.get_running_loop()
+        fut = loop.create_future()
+        hr = HoldExpiredRequest(showtime_id=showtime_id, seat_ids=seat_ids, result_future=fut)
+        return await self._submit(showtime_id, hr)
 
     # --------------------------------------------------------
     # ⚙️ Worker
     # --------------------------------------------------------
     async def _worker(self, showtime_id: int, queue: asyncio.Queue):
-        """Sequentially process all requests for a single showtime."""
+        """Sequentially process all requests for a single showtime, one batch at a time."""
+        # never trust a seat table left behind by a previous worker
+        self.seat_states.pop(showtime_id, None)
         while True:
-            req = await queue.get()
+            batch: List[Any] = []
             try:
-                if isinstance(req, BookingRequest):
-                    result = await self._process_booking_request(req)
-                elif isinstance(req, CancelRequest):
-                    result = await self._process_cancel_request(showtime_id, req)
-                elif isinstance(req, UpdateRequest):
-                    result = await self._process_update_request(showtime_id, req)
+                await self._next_batch(queue, settings.TICKETPOOL_WORKER_IDLE_SECONDS, batch, showtime_id)
+                if not batch:
+                    # idle and the queue is empty: nothing can arrive before _retire
+                    # (no await in between), the next request starts a fresh worker
+                    if self._owns_worker(showtime_id):
+                        self._retire(showtime_id)
+                    return
+                await self._process_batch(showtime_id, batch)
+            except asyncio.CancelledError:
+                # retired or stopped with requests already off the queue
+                if self._closing:
+                    _fail_requests(batch, SHUTTING_DOWN)
                 else:
-                    result = {"success": False, "message": "unknown request type"}
+                    # evicted as idle, so none of them was applied: hand them to a fresh worker
+                    for req in batch:
+                        if not req.result_future.done():
+                            self._ensure_queue(showtime_id)
+                            self.queues[showtime_id].put_nowait(req)
+                raise
+            finally:
+                self._active.discard(showtime_id)
+                for _ in batch:
+                    queue.task_done()
 
-                if not req.result_future.cancelled():
-                    req.result_future.set_result(result)
+    async def _durable_worker(self, showtime_id: int):
+        """Consume the showtime's Redis stream: reclaim stale entries first, then read new ones."""
+        self.seat_states.pop(showtime_id, None)
+        loop = asyncio.get_running_loop()
+        next_claim = 0.0
+        idle_since = loop.time()
+        idle_timeout = settings.TICKETPOOL_WORKER_IDLE_SECONDS
+        while True:
+            if self.cluster is not None and not self.cluster.holds(showtime_id):
+                # not ours anymore: unread entries stay in the stream for the new owner
+                if self._owns_worker(showtime_id):
+                    self._retire(showtime_id)
+                return
+            try:
+                entries, reclaimed = [], False
+                if loop.time() >= next_claim:
+                    entries = await self.durable.claim_stale(showtime_id, self.node_id, self.batch_size)   #type: ignore
+                    next_claim = loop.time() + settings.TICKETPOOL_LEASE_SECONDS / 2
+                    reclaimed = bool(entries)
+                if not entries:
+                    entries = await self.durable.read(showtime_id, self.node_id, self.batch_size, block_ms=2000)   #type: ignore
+                if entries:
+                    await self._process_entries(showtime_id, entries, reclaimed)
+                    idle_since = loop.time()
+                elif idle_timeout > 0 and loop.time() - idle_since >= idle_timeout and self._owns_worker(showtime_id):
+                    self._retire(showtime_id)
+                    # a request appended while we were deciding must not wait for the recovery loop
+                    if await self.durable.backlog(showtime_id):   #type: ignore
+                        self._ensure_queue(showtime_id)
+                    return
+            except asyncio.CancelledError:
+                raise
             except Exception:
                 traceback.print_exc()
-                if not req.result_future.cancelled():
-                    req.result_future.set_result({"success": False, "message": "internal error"})
+                await asyncio.sleep(1)
+
+    async def _process_entries(self, showtime_id: int, entries: List[Tuple[str, Dict[str, Any]]], reclaimed: bool = False):
+        """
+        Apply stream entries and answer them. Entries reclaimed from a dead
+        consumer may have committed before it crashed: their outcome is looked
+        up (stored result, else processed_requests) instead of re-applying them.
+        """
+        loop = asyncio.get_running_loop()
+        stored = await self.durable.get_results([m["request_id"] for _, m in entries])   #type: ignore
+        committed = {}
+        if reclaimed:
+            unanswered = [m["request_id"] for (_, m), prior in zip(entries, stored) if prior is None]
+            committed = await self._committed_outcomes(unanswered)
+        batch, metas, delivered, recovered, replayed_events = [], [], [], [], []
+        for (_, message), prior in zip(entries, stored):
+            if prior is not None:
+                # committed before a crash that lost only the ack: answer again, don't re-apply
+                delivered.append((message, prior["result"]))
+                continue
+            if message["request_id"] in committed:
+                # committed before a crash that lost the stored result (and maybe its broadcast)
+                result, events = committed[message["request_id"]]
+                recovered.append((message, result))
+                replayed_events.append(events)
+                continue
+            fields = {**message["fields"], "request_id": message["request_id"]}
+            batch.append(REQUEST_TYPES[message["kind"]](**fields, result_future=loop.create_future()))
+            metas.append(message)
+
+        if recovered:
+            self._publish(showtime_id, replayed_events)
+            await self.durable.store_results([   #type: ignore
+                (message["request_id"], message["fields"].get("user_id"), result) for message, result in recovered
+            ])
+            delivered.extend(recovered)
+
+        if batch:
+            self._active.add(showtime_id)
+            try:
+                await self._process_batch(showtime_id, batch)
             finally:
-                queue.task_done()
+                self._active.discard(showtime_id)
+            results = [(message, req.result_future.result()) for message, req in zip(metas, batch)]
+            if any(result.get("message") == MOVED["message"] for _, result in results):
+                return  # lease lost mid-way: leave every entry for the new owner to reclaim
+            await self.durable.store_results([   #type: ignore
+                (message["request_id"], message["fields"].get("user_id"), result) for message, result in results
+            ])
+            delivered.extend(results)
+
+        await self.durable.ack(showtime_id, [entry_id for entry_id, _ in entries])   #type: ignore
+        for message, result in delivered:
+            await self._deliver(message, result)
+
+    async def _deliver(self, message: Dict[str, Any], result: Dict[str, Any]):
+        if message["reply_to"] == self.node_id:
+            fut = self._waiting.get(message["request_id"])
+            if fut is not None and not fut.done():
+                fut.set_result(result)
+        elif self.cluster is not None:
+            await self.cluster.notify(message["reply_to"], message["request_id"], result)
+
+    async def _next_batch(
+        self,
+        queue: asyncio.Queue,
+        idle_timeout: float = 0,
+        batch: Optional[List[Any]] = None,
+        showtime_id: Optional[int] = None,
+    ) -> List[Any]:
+        """
+        Wait for the next request, then drain whatever else is already queued
+        (up to batch_size), lingering at most batch_window for stragglers.
+        Requests keep their queue (first-come) order inside the batch.
+        Returns an empty batch if nothing arrived within idle_timeout (0 = wait forever).
+
+        Requests are appended to `batch` as they are dequeued, so a caller that
+        is cancelled mid-way still knows which requests it holds; `showtime_id`
+        is marked active from the first one on.
+        """
+        batch = [] if batch is None else batch
+        first = await self._get(queue, idle_timeout, batch)
+        if first is None:
+            return batch
+        batch.append(first)
+        if showtime_id is not None:
+            self._active.add(showtime_id)
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.batch_window
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(queue.get_nowait())
+                continue
+            except asyncio.QueueEmpty:
+                pass
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            item = await self._get(queue, remaining, batch)
+            if item is None:
+                break
+            batch.append(item)
+        return batch
+
+    @staticmethod
+    async def _get(queue: asyncio.Queue, timeout: float, held: List[Any]) -> Any:
+        """
+        Next request, or None when the queue stayed empty for `timeout` (0 = wait forever).
+        Unlike wait_for(queue.get()), a request dequeued as the timeout fires is
+        returned rather than dropped, and a cancelled getter never consumes one.
+        If we are cancelled just after dequeuing, the request goes to `held`.
+        """
+        while True:
+            try:
+                return queue.get_nowait()
+            except asyncio.QueueEmpty:
+                pass
+            getter = asyncio.ensure_future(queue.get())
+            try:
+                await asyncio.wait({getter}, timeout=timeout or None)
+            except asyncio.CancelledError:
+                if getter.done() and not getter.cancelled():
+                    held.append(getter.result())   # the queue may already be detached: the caller answers it
+                else:
+                    getter.cancel()
+                raise
+            if getter.done():
+                return getter.result()
+            getter.cancel()   # a cancelled get leaves any item in the queue
+            if queue.empty():
+                return None
+
+    async def _process_batch(self, showtime_id: int, batch: List[Any]):
+        """Apply a batch in one transaction, then broadcast and resolve every future."""
+        if self.cluster is not None and not self.cluster.holds(showtime_id):
+            # lost the lease (or never got it): another node may be writing this showtime
+            for req in batch:
+                if not req.result_future.done():
+                    req.result_future.set_result(dict(MOVED))
+            return
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        rejected = await self._check_seat_holds(showtime_id, batch)
+        pending = [req for i, req in enumerate(batch) if i not in rejected]
+        try:
+            applied = await self._apply_batch(showtime_id, pending)
+        except Exception:
+            # The group commit failed (e.g. connection dropped). Usually nothing
+            # from this batch is durable, but a commit can also succeed and still
+            # raise: requests whose outcome was recorded are answered from it.
+            # The rest are retried one per transaction, so one poisoned request
+            # cannot fail the whole batch.
+            traceback.print_exc()
+            committed = await self._committed_outcomes([req.request_id for req in pending])
+            applied = []
+            for req in pending:
+                if req.request_id in committed:
+                    applied.append(committed[req.request_id])
+                    continue
+                try:
+                    applied.extend(await self._apply_batch(showtime_id, [req]))
+                except Exception:
+                    traceback.print_exc()
+                    applied.append(({"success": False, "message": "internal error"}, []))
+
+        applied_iter = iter(applied)
+        outcomes = [(rejected[i], []) if i in rejected else next(applied_iter) for i in range(len(batch))]
+        self._publish(showtime_id, [events for _, events in outcomes])
+        for req, (result, _) in zip(batch, outcomes):
+            if not req.result_future.done():
+                req.result_future.set_result(result)
+        self._record_service_time(showtime_id, len(batch), loop.time() - started)
+
+    def _publish(self, showtime_id: int, event_lists: List[List[Dict[str, Any]]]):
+        """Version, cache and broadcast the seat events of one committed batch."""
+        events = [payload for payloads in event_lists for payload in payloads]
+        if not events:
+            return
+        # one seat-map version per committed batch
+        version = self._next_version(showtime_id)
+        for payload in events:
+            payload["version"] = version
+        # patch the read cache before anyone is told the batch committed
+        seat_cache.apply(showtime_id, [(p["status"], p["seat_ids"]) for p in events], version)
+        for payload in events:
+            self._broadcast(showtime_id, payload)
+
+    async def _committed_outcomes(self, request_ids: List[str]) -> Dict[str, Tuple[Dict[str, Any], List[Dict[str, Any]]]]:
+        """(result, events) of the given requests that were already committed."""
+        if not request_ids:
+            return {}
+        try:
+            async with booking_session() as db:
+                return await get_processed_requests(db, request_ids)
+        except Exception:
+            # unknown: replaying is then the only option (claims are still guarded by seat status)
+            traceback.print_exc()
+            return {}
+
+    def _record_service_time(self, showtime_id: int, count: int, elapsed: float):
+        """Moving average of seconds per request, for Retry-After estimates."""
+        per_request = elapsed / count
+        previous = self._service_time.get(showtime_id)
+        self._service_time[showtime_id] = per_request if previous is None else 0.8 * previous + 0.2 * per_request
+        self._default_service_time = 0.8 * self._default_service_time + 0.2 * per_request
+        self._last_used[showtime_id] = asyncio.get_running_loop().time()
+
+    async def _check_seat_holds(self, showtime_id: int, batch: List[Any]) -> Dict[int, Dict[str, Any]]:
+        """
+        Check the batch against Redis seat holds with a single MGET.
+        Returns {batch index: failure result} for requests that must not run:
+        bookings touching seats held by someone else, or confirming a hold that
+        no longer covers their seats. Hold-expiry notices are narrowed to seats
+        nobody has re-held.
+        """
+        seat_ids = []
+        for req in batch:
+            if isinstance(req, (BookingRequest, HoldExpiredRequest)):
+                seat_ids.extend(req.seat_ids)
+            elif isinstance(req, UpdateRequest):
+                seat_ids.extend(req.new_seat_ids)
+        if not seat_ids:
+            return {}
+        try:
+            holders = await get_seat_holders(showtime_id, seat_ids)
+        except Exception:
+            traceback.print_exc()
+            holders = {}
+
+        rejected = {}
+        for i, req in enumerate(batch):
+            if isinstance(req, BookingRequest):
+                if req.hold_id and any(holders.get(sid) != req.hold_id for sid in req.seat_ids):
+                    rejected[i] = {"success": False, "message": "seat hold expired"}
+                elif not req.hold_id and any(sid in holders for sid in req.seat_ids):
+                    rejected[i] = {"success": False, "message": "some seats are held by another user"}
+            elif isinstance(req, UpdateRequest):
+                if any(sid in holders for sid in req.new_seat_ids):
+                    rejected[i] = {"success": False, "message": "some seats are held by another user"}
+            elif isinstance(req, HoldExpiredRequest):
+                req.seat_ids = [sid for sid in req.seat_ids if sid not in holders]
+        return rejected
+
+    async def _apply_batch(self, showtime_id: int, batch: List[Any]) -> List[Tuple[Dict[str, Any], List[Dict[str, Any]]]]:
+        """
+        Run every request of the batch inside a single transaction, each one
+        wrapped in its own savepoint so a rejected request rolls back only its
+        own changes. Returns one (result, broadcast payloads) pair per request.
+        """
+        outcomes = []
+        # writers use their own connection pool so browse traffic cannot starve them
+        async with booking_session() as db:
+            try:
+                async with db.begin():
+                    state = self.seat_states.get(showtime_id)
+                    if state is None:
+                        state = await load_seat_state(db, showtime_id)
+                        self.seat_states[showtime_id] = state
+
+                    for req in batch:
+                        savepoint = await db.begin_nested()
+                        try:
+                            result, events = await self._apply_request(db, state, showtime_id, req)
+                        except Exception:
+                            traceback.print_exc()
+                            await savepoint.rollback()
+                            outcomes.append(({"success": False, "message": "internal error"}, []))
+                            continue
+
+                        if result.get("success"):
+                            await savepoint.commit()
+                            # later requests of the batch see this one's seats
+                            for payload in events:
+                                state.set_status(payload["seat_ids"], payload["status"])
+                        else:
+                            await savepoint.rollback()
+                            events = []
+                        outcomes.append((result, events))
+
+                    # committed with the batch or not at all; failed requests changed
+                    # nothing, so running them again is harmless
+                    await record_processed_requests(db, showtime_id, [
+                        (req.request_id, result, events)
+                        for req, (result, events) in zip(batch, outcomes)
+                        if isinstance(req, SHEDDABLE) and result.get("success")
+                    ])
+            except Exception:
+                # the seat table already reflects this batch; rebuild it from the DB
+                self.seat_states.pop(showtime_id, None)
+                raise
+        return outcomes
+
+    async def _apply_request(self, db, state: SeatState, showtime_id: int, req) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+        if isinstance(req, BookingRequest):
+            return await self._process_booking_request(db, state, req)
+        if isinstance(req, CancelRequest):
+            return await self._process_cancel_request(db, state, showtime_id, req)
+        if isinstance(req, UpdateRequest):
+            return await self._process_update_request(db, state, showtime_id, req)
+        if isinstance(req, ReleaseRequest):
+            return await self._process_release_request(db, showtime_id, req)
+        if isinstance(req, HoldExpiredRequest):
+            return self._process_hold_expired_request(state, showtime_id, req)
+        return {"success": False, "message": "unknown request type"}, []
+
+    def _next_version(self, showtime_id: int) -> int:
+        state = self.seat_states.get(showtime_id)
+        if state is None:
+            # table is being rebuilt; it will be re-seeded from the clock as well
+            return int(time.time() * 1000)
+        state.version += 1
+        return state.version
+
+    def _invalidate_seat_state(self, showtime_id: int):
+        """The DB disagreed with the in-memory table: rebuild it before the next batch."""
+        self.seat_states.pop(showtime_id, None)
+
+    def _broadcast(self, showtime_id: int, payload: Dict[str, Any]):
+        # O(1) hand-off: publishing and socket writes happen off the worker
+        publish_showtime_event(showtime_id, payload)
 
     # --------------------------------------------------------
     # 🧾 Process Booking
     # --------------------------------------------------------
-    async def _process_booking_request(self, br: BookingRequest) -> Dict[str, Any]:
-        async with async_session() as db:
-            async with db.begin():
-                ok = await lock_seats(db, br.seat_ids, br.user_id, lock_seconds=120)
-                if not ok:
-                    return {"success": False, "message": "some seats are no longer available"}
-
-                seats = await get_seats_for_showtime(db, br.showtime_id)
-                seat_map = {s.id: s for s in seats}
-
-                selected_payload = []
-                total = 0
-                for sid in br.seat_ids:
-                    s = seat_map.get(sid)
-                    if not s:
-                        return {"success": False, "message": f"seat {sid} not found"}
-                    selected_payload.append(
-                        {"seat_id": s.id, "row": s.row, "number": s.number, "price": s.price}
-                    )
-                    total += s.price
-
-                booking = await create_booking(db, br.user_id, br.showtime_id, selected_payload, total)
-                await mark_seats_booked(db, br.seat_ids)
-
-            # commit broadcast
-            payload = {
-                "type": "seats_updated",
-                "showtime_id": br.showtime_id,
-                "seat_ids": br.seat_ids,
-                "status": "booked",
-            }
-            try:
-                await self.redis.publish(f"showtime:{br.showtime_id}", str(payload))
-            except Exception:
-                pass
-            await broadcast_to_showtime(br.showtime_id, payload)
+    async def _process_booking_request(self, db, state: SeatState, br: BookingRequest):
+        if not br.seat_ids:
+            return {"success": False, "message": "no seats specified"}, []
+        missing = state.missing(br.seat_ids)
+        if missing:
+            return {"success": False, "message": f"seat {missing[0]} not found for this showtime"}, []
+        if state.unavailable(br.seat_ids):
+            return {"success": False, "message": "some seats are no longer available"}, []
+
+        # one conditional UPDATE claims the seats; rows, numbers and prices come from the hall layout
+        seat_ids = list(dict.fromkeys(br.seat_ids))
+        claimed = await claim_seats(db, br.showtime_id, seat_ids)
+        if len(claimed) != len(seat_ids):
+            self._invalidate_seat_state(br.showtime_id)
+            return {"success": False, "message": "some seats are no longer available"}, []
 
-            return {"success": True, "message": "booked", "booking_id": booking.id}
+        selected_payload = [state.payload(sid) for sid in seat_ids]
+        total = sum(s["price"] for s in selected_payload)
+        try:
+            booking = await create_booking(db, br.user_id, br.showtime_id, selected_payload, total)
+        except IntegrityError:
+            # uix_booking_seats_seat: a seat is already in another booking
+            self._invalidate_seat_state(br.showtime_id)
+            return {"success": False, "message": "some seats are no longer available"}, []
+        meta = await get_showtime_meta(db, br.showtime_id)
+
+        payload = {
+            "type": "seats_updated",
+            "showtime_id": br.showtime_id,
+            "seat_ids": seat_ids,
+            "status": "booked",
+        }
+        # everything the confirmation page shows, so the caller needs no further queries
+        return {
+            "success": True,
+            "message": "booked",
+            "booking_id": booking.id,
+            "movie_title": meta.movie_title if meta else None,
+            "showtime": meta.start_time if meta else None,
+            "hall": meta.hall if meta else None,
+            "seats": selected_payload,
+            "total_amount": total,
+        }, [payload]
 
     # --------------------------------------------------------
     # 🧾 Process Cancel
     # --------------------------------------------------------
-    async def _process_cancel_request(self, showtime_id: int, cr: CancelRequest) -> Dict[str, Any]:
-        async with async_session() as db:
-            async with db.begin():
-                booking = await get_booking_by_id(db, cr.booking_id)
-                if not booking:
-                    return {"success": False, "message": "booking not found"}
-                if booking.user_id != cr.user_id:
-                    return {"success": False, "message": "unauthorized"}
-                if booking.showtime_id != showtime_id:
-                    return {"success": False, "message": "showtime mismatch"}
-
-                seat_ids = getattr(cr, "seat_ids", [])
-                if not seat_ids:
-                    return {"success": False, "message": "no seats specified"}
-
-                # ensure those belong to the booking
-                booked_ids = [s["seat_id"] for s in booking.seats]
-                invalid = [sid for sid in seat_ids if sid not in booked_ids]
-                if invalid:
-                    return {"success": False, "message": f"invalid seat ids {invalid}"}
-
-                await mark_seats_available(db, seat_ids)
-                remaining = [s for s in booking.seats if s["seat_id"] not in seat_ids]
-                booking.seats = remaining
-                db.add(booking)
-            await db.commit()
+    async def _process_cancel_request(self, db, state: SeatState, showtime_id: int, cr: CancelRequest):
+        booking = await get_booking_by_id(db, cr.booking_id)
+        if not booking:
+            return {"success": False, "message": "booking not found"}, []
+        if booking.user_id != cr.user_id:
+            return {"success": False, "message": "unauthorized"}, []
+        if booking.showtime_id != showtime_id:
+            return {"success": False, "message": "showtime mismatch"}, []
+
+        seat_ids = getattr(cr, "seat_ids", [])
+        if not seat_ids:
+            return {"success": False, "message": "no seats specified"}, []
+
+        # indexed delete of just these seats; anything not removed was not part of the booking
+        removed = await remove_booking_seats(db, cr.booking_id, seat_ids)
+        invalid = [sid for sid in seat_ids if sid not in removed]
+        if invalid:
+            # failed result -> the worker rolls back this request's savepoint, restoring the rows
+            return {"success": False, "message": f"invalid seat ids {invalid}"}, []
+
+        await mark_seats_available(db, seat_ids)
 
         payload = {
             "type": "seats_updated",
@@ -217,18 +908,12 @@ class TicketPool:
             "seat_ids": seat_ids,
             "status": "available",
         }
-        try:
-            await self.redis.publish(f"showtime:{showtime_id}", str(payload))
-        except Exception:
-            pass
-        await broadcast_to_showtime(showtime_id, payload)
-
-        return {"success": True, "message": f"Seats {seat_ids} cancelled", "booking_id": cr.booking_id}
+        return {"success": True, "message": f"Seats {seat_ids} cancelled", "booking_id": cr.booking_id}, [payload]
 
     # --------------------------------------------------------
     # 🧾 Process Update (Edit Booking)
     # --------------------------------------------------------
-    async def _process_update_request(self, showtime_id: int, ur: UpdateRequest) -> Dict[str, Any]:
+    async def _process_update_request(self, db, state: SeatState, showtime_id: int, ur: UpdateRequest):
         """
         Atomically update a booking:
         - compute old vs new seats
@@ -237,93 +922,108 @@ class TicketPool:
         - update booking record (seats + total_amount)
         - broadcast both releases and new bookings
         """
-        async with async_session() as db:
-            async with db.begin():
-                booking = await get_booking_by_id(db, ur.booking_id)
-                if not booking:
-                    return {"success": False, "message": "booking not found"}
-                if booking.user_id != ur.user_id:
-                    return {"success": False, "message": "unauthorized"}
-                if booking.showtime_id != showtime_id:
-                    return {"success": False, "message": "showtime mismatch"}
-
-                old_seat_ids = [s["seat_id"] for s in booking.seats]
-                new_seat_ids = ur.new_seat_ids
-
-                # No-op check
-                if set(old_seat_ids) == set(new_seat_ids):
-                    return {"success": False, "message": "no changes detected"}
-
-                # load current seat rows for validation
-                all_seats = await get_seats_for_showtime(db, showtime_id)
-                seat_map = {s.id: s for s in all_seats}
-
-                # Validate new seats exist and are available (unless already owned by this booking)
-                for sid in new_seat_ids:
-                    s = seat_map.get(sid)
-                    if not s:
-                        return {"success": False, "message": f"seat {sid} not found"}
-                    # check availability: compare enum value
-                    if sid not in old_seat_ids and getattr(s.status, "value", s.status) != "available":
-                        return {"success": False, "message": f"Seat {s.row}{s.number} unavailable"}
-
-                # Determine to_release and to_book
-                to_release = [sid for sid in old_seat_ids if sid not in new_seat_ids]
-                to_book = [sid for sid in new_seat_ids if sid not in old_seat_ids]
-
-                # 1) Release seats removed from booking
-                if to_release:
-                    await mark_seats_available(db, to_release)
-
-                # 2) Lock new seats (so no one else grabs them during update)
-                if to_book:
-                    ok = await lock_seats(db, to_book, ur.user_id, lock_seconds=120)
-                    if not ok:
-                        # revert any releases already done in this transaction by raising (transaction will roll back)
-                        return {"success": False, "message": "some new seats are no longer available"}
-
-                    # Mark them booked now
-                    await mark_seats_booked(db, to_book)
-
-                # 3) Update booking record seats + total
-                updated_seats = []
-                total = 0
-                for sid in new_seat_ids:
-                    s = seat_map[sid]
-                    updated_seats.append(
-                        {"seat_id": s.id, "row": s.row, "number": s.number, "price": s.price}
-                    )
-                    total += s.price
-
-                booking.seats = updated_seats
-                booking.total_amount = total
-                db.add(booking)
-            # commit transaction
-            await db.commit()
+        booking = await get_booking_by_id(db, ur.booking_id)
+        if not booking:
+            return {"success": False, "message": "booking not found"}, []
+        if booking.user_id != ur.user_id:
+            return {"success": False, "message": "unauthorized"}, []
+        if booking.showtime_id != showtime_id:
+            return {"success": False, "message": "showtime mismatch"}, []
+
+        old_prices = await get_booking_seat_prices(db, ur.booking_id)
+        old_seat_ids = list(old_prices)
+        new_seat_ids = ur.new_seat_ids
+
+        # No-op check
+        if set(old_seat_ids) == set(new_seat_ids):
+            return {"success": False, "message": "no changes detected"}, []
+
+        # Validate new seats exist and are available (unless already owned by this booking)
+        missing = state.missing(new_seat_ids)
+        if missing:
+            return {"success": False, "message": f"seat {missing[0]} not found"}, []
+        taken = state.unavailable(sid for sid in new_seat_ids if sid not in old_seat_ids)
+        if taken:
+            return {"success": False, "message": f"Seat {state.label(taken[0])} unavailable"}, []
+
+        # Determine to_release and to_book
+        to_release = [sid for sid in old_seat_ids if sid not in new_seat_ids]
+        to_book = [sid for sid in new_seat_ids if sid not in old_seat_ids]
+
+        # 1) Release seats removed from booking
+        if to_release:
+            await remove_booking_seats(db, ur.booking_id, to_release)
+            await mark_seats_available(db, to_release)
+
+        # 2) Claim new seats straight to booked (only if still available)
+        new_prices = {}
+        if to_book:
+            to_book = list(dict.fromkeys(to_book))
+            claimed = await claim_seats(db, showtime_id, to_book)
+            if len(claimed) != len(to_book):
+                # failed result -> the worker rolls back this request's savepoint, undoing the releases
+                self._invalidate_seat_state(showtime_id)
+                return {"success": False, "message": "some new seats are no longer available"}, []
+            new_prices = {sid: state.payload(sid)["price"] for sid in to_book}
+            try:
+                await add_booking_seats(db, ur.booking_id, [{"seat_id": sid, "price": new_prices[sid]} for sid in to_book])
+            except IntegrityError:
+                self._invalidate_seat_state(showtime_id)
+                return {"success": False, "message": "some new seats are no longer available"}, []
+
+        # 3) Update booking total: kept seats keep their price snapshot
+        booking.total_amount = sum(old_prices[sid] for sid in old_seat_ids if sid not in to_release) + sum(new_prices.values())
+        db.add(booking)
 
         # Broadcast: first released seats as available, then newly booked seats as booked
-        try:
-            if to_release:
-                payload_release = {
-                    "type": "seats_updated",
-                    "showtime_id": showtime_id,
-                    "seat_ids": to_release,
-                    "status": "available",
-                }
-                await self.redis.publish(f"showtime:{showtime_id}", str(payload_release))
-                await broadcast_to_showtime(showtime_id, payload_release)
-
-            if to_book:
-                payload_booked = {
-                    "type": "seats_updated",
-                    "showtime_id": showtime_id,
-                    "seat_ids": to_book,
-                    "status": "booked",
-                }
-                await self.redis.publish(f"showtime:{showtime_id}", str(payload_booked))
-                await broadcast_to_showtime(showtime_id, payload_booked)
-        except Exception:
-            # best-effort: if redis pub fails, still proceed
-            pass
+        events = []
+        if to_release:
+            events.append({
+                "type": "seats_updated",
+                "showtime_id": showtime_id,
+                "seat_ids": to_release,
+                "status": "available",
+            })
+        if to_book:
+            events.append({
+                "type": "seats_updated",
+                "showtime_id": showtime_id,
+                "seat_ids": to_book,
+                "status": "booked",
+            })
+
+        return {"success": True, "message": "booking updated successfully", "booking_id": ur.booking_id}, events
 
-        return {"success": True, "message": "booking updated successfully", "booking_id": ur.booking_id}
+    # --------------------------------------------------------
+    # 🧾 Process Release (expired locks)
+    # --------------------------------------------------------
+    async def _process_release_request(self, db, showtime_id: int, rr: ReleaseRequest):
+        released = await release_expired_locks(db, showtime_id, rr.seat_ids)
+        if not released:
+            # already booked/released, or the lock was extended
+            return {"success": True, "message": "nothing to release", "seat_ids": []}, []
+
+        payload = {
+            "type": "seats_updated",
+            "showtime_id": showtime_id,
+            "seat_ids": released,
+            "status": "available",
+        }
+        return {"success": True, "message": f"Seats {released} released", "seat_ids": released}, [payload]
+
+    # --------------------------------------------------------
+    # 🧾 Process Hold Expiry (no DB writes)
+    # --------------------------------------------------------
+    def _process_hold_expired_request(self, state: SeatState, showtime_id: int, hr: HoldExpiredRequest):
+        # only seats that were not booked in the meantime become available again;
+        # the others are re-announced as booked, correcting maps that showed the hold
+        freed = [sid for sid in hr.seat_ids if sid in state and state.status_of(sid) == "available"]
+        booked = [sid for sid in hr.seat_ids if sid in state and state.status_of(sid) == "booked"]
+        events = [
+            {"type": "seats_updated", "showtime_id": showtime_id, "seat_ids": seat_ids, "status": seat_status}
+            for seat_status, seat_ids in (("available", freed), ("booked", booked))
+            if seat_ids
+        ]
+        if not freed:
+            return {"success": True, "message": "nothing to release", "seat_ids": []}, events
+        return {"success": True, "message": f"Seats {freed} released", "seat_ids": freed}, events
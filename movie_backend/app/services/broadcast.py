@@ -1,30 +1,346 @@
 # app/services/broadcast.py
-from typing import Dict, Set
+import asyncio
+import json
+import traceback
+from collections import defaultdict, deque
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Tuple, Union
+
+from cachetools import LRUCache
 from fastapi import WebSocket
 
-# simple in-memory broadcaster indexed by showtime_id
-_connections: Dict[int, Set[WebSocket]] = {}
+from app.core.config import settings
+from app.services.redis_client import get_redis
+
+# one Redis subscriber per process fans published events out to local sockets
+SHOWTIME_CHANNEL_PATTERN = "showtime:*"
+_listener_task: Optional[asyncio.Task] = None
+
+# events waiting to be published, so callers never wait on Redis
+_outbox: Optional[asyncio.Queue] = None
+_publisher_task: Optional[asyncio.Task] = None
+OUTBOX_SIZE = 10_000
+
+# seats_updated events merged per showtime until the coalescing window closes
+_pending_deltas: Dict[int, Dict[str, Any]] = {}
+
+# called with (showtime_id, frame) for every event the listener receives
+_event_hooks: List[Callable[[int, str], None]] = []
+
+# showtime -> recent (version, frame) deltas in arrival order, for ?since= replays
+_recent: LRUCache = LRUCache(maxsize=settings.WS_REPLAY_SHOWTIMES)
+
+
+def seat_version_key(showtime_id: int) -> str:
+    """Latest published seat-map version of a showtime (lower bound for snapshots)."""
+    return f"seatmap:{showtime_id}:version"
+
+
+# ------------------------------------------------------------
+# 🔌 Per-connection writers
+# ------------------------------------------------------------
+class _Subscriber:
+    """
+    One connected socket: a bounded queue of pre-serialized frames drained by
+    its own writer task, so a slow client only ever delays itself.
+    """
+
+    __slots__ = ("ws", "showtime_id", "queue", "dropped", "ready", "task")
+
+    def __init__(self, ws: WebSocket, showtime_id: int):
+        self.ws = ws
+        self.showtime_id = showtime_id
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=settings.WS_SEND_QUEUE_SIZE)
+        self.dropped = 0
+        # frames queue up but are not written until the snapshot went out
+        self.ready = asyncio.Event()
+        self.task = asyncio.create_task(self._write())
+
+    def offer(self, frame: str) -> bool:
+        """Queue a frame without blocking; returns False once the client should be evicted."""
+        try:
+            self.queue.put_nowait(frame)
+            return True
+        except asyncio.QueueFull:
+            pass
+
+        self.dropped += 1
+        if self.dropped > settings.WS_MAX_DROPPED_FRAMES:
+            return False
+
+        policy = settings.WS_SLOW_CONSUMER_POLICY
+        if policy == "drop_oldest":
+            self.queue.get_nowait()
+            self.queue.put_nowait(frame)
+        elif policy == "coalesce":
+            # the backlog is useless now: replace it with a single resync request
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(json.dumps({"type": "resync", "showtime_id": self.showtime_id}))
+        # "drop_newest": keep the backlog, lose this frame
+        return True
+
+    async def _write(self):
+        try:
+            await self.ready.wait()
+            while True:
+                frame = await self.queue.get()
+                await asyncio.wait_for(self.ws.send_text(frame), timeout=settings.WS_SEND_TIMEOUT_SECONDS)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            # dead or stuck socket
+            _evict(self)
+
+
+_connections: Dict[int, Dict[WebSocket, _Subscriber]] = {}
 
 
-async def register_ws(showtime_id: int, ws: WebSocket):
+async def register_ws(
+    showtime_id: int,
+    ws: WebSocket,
+    snapshot: Optional[Callable[[], Awaitable[str]]] = None,
+    since: Optional[int] = None,
+):
+    """
+    Accept and subscribe a socket. With `snapshot`, the socket is subscribed
+    first and the snapshot frame is sent before any queued update, so no
+    change between the two can be missed. A client that already holds the
+    map at version `since` gets the deltas it missed instead, when they are
+    still in the replay ring.
+    """
     await ws.accept()
-    conns = _connections.setdefault(showtime_id, set())
-    conns.add(ws)
+    sub = _Subscriber(ws, showtime_id)
+    _connections.setdefault(showtime_id, {})[ws] = sub
+    # taken right after subscribing: later frames are in the socket's queue
+    missed = recent_frames(showtime_id, since) if since is not None else None
+    try:
+        if missed is not None:
+            for frame in missed:
+                await ws.send_text(frame)
+        elif snapshot is not None:
+            await ws.send_text(await snapshot())
+    finally:
+        sub.ready.set()
 
 
 def unregister_ws(showtime_id: int, ws: WebSocket):
     conns = _connections.get(showtime_id)
     if conns and ws in conns:
-        conns.remove(ws)
+        conns.pop(ws).task.cancel()
+        if not conns:
+            del _connections[showtime_id]
+
+
+def _evict(sub: _Subscriber):
+    unregister_ws(sub.showtime_id, sub.ws)
+    asyncio.get_running_loop().create_task(_close(sub.ws))
+
+
+async def _close(ws: WebSocket):
+    try:
+        await asyncio.wait_for(ws.close(code=1013), timeout=settings.WS_SEND_TIMEOUT_SECONDS)
+    except Exception:
+        pass
+
+
+# ------------------------------------------------------------
+# ⏪ Replay ring
+# ------------------------------------------------------------
+def _remember(showtime_id: int, frame: str):
+    """Keep a seat delta seen by this process's listener (every process sees every event)."""
+    try:
+        payload = json.loads(frame)
+    except ValueError:
+        return
+    if not isinstance(payload, dict) or payload.get("type") not in ("seats_delta", "seats_updated"):
+        return
+    ring: Optional[Deque[Tuple[Optional[int], str]]] = _recent.get(showtime_id)
+    if ring is None:
+        ring = _recent[showtime_id] = deque(maxlen=settings.WS_REPLAY_FRAMES)
+    ring.append((payload.get("version"), frame))
+
+
+def recent_frames(showtime_id: int, since: int) -> Optional[List[str]]:
+    """
+    Frames a client holding the map at version `since` has missed, or None
+    when the ring cannot tell (too old, or never seen here): send a snapshot.
+
+    Replays everything after the last kept frame at or below `since`. Frames
+    without a version (seat holds) are kept in arrival order, so re-applying
+    the ones the client already has cannot undo a later change.
+    """
+    ring = _recent.get(showtime_id)
+    if not ring:
+        return None
+    anchor = None
+    for i, (version, _) in enumerate(ring):
+        if version is not None and version <= since:
+            anchor = i
+    if anchor is None:
+        return None
+    return [frame for _, frame in list(ring)[anchor + 1:]]
+
+
+def deliver_frame(showtime_id: int, frame: str):
+    """Hand one serialized frame to every local socket of a showtime (never blocks)."""
+    for sub in list(_connections.get(showtime_id, {}).values()):
+        if not sub.offer(frame):
+            _evict(sub)
 
 
 async def broadcast_to_showtime(showtime_id: int, payload: dict):
-    conns = list(_connections.get(showtime_id, []))
-    to_remove = []
-    for ws in conns:
+    deliver_frame(showtime_id, json.dumps(payload))
+
+
+# ------------------------------------------------------------
+# 📤 Publishing
+# ------------------------------------------------------------
+def publish_showtime_event(showtime_id: int, payload: Union[dict, str]):
+    """
+    Queue a seat event for every API process and return immediately. The
+    publisher task sends it to Redis; local sockets receive it through this
+    process's listener like everyone else. If Redis is unreachable we still
+    deliver to the sockets connected here.
+
+    `seats_updated` events are merged per showtime for WS_COALESCE_WINDOW_MS
+    and go out as one `seats_delta` frame:
+    {"type": "seats_delta", "showtime_id", "version", "changes": {status: [seat ids]}}
+    """
+    _ensure_publisher()
+    if isinstance(payload, dict) and payload.get("type") == "seats_updated" and settings.WS_COALESCE_WINDOW_MS > 0:
+        _coalesce(showtime_id, payload)
+        return
+    version = payload.get("version") if isinstance(payload, dict) else None
+    frame = payload if isinstance(payload, str) else json.dumps(payload)
+    _enqueue(showtime_id, frame, version)
+
+
+def _enqueue(showtime_id: int, frame: str, version: Optional[int]):
+    try:
+        _outbox.put_nowait((showtime_id, frame, version))
+    except asyncio.QueueFull:
+        print(f"⚠️ seat event outbox full, dropping event for showtime {showtime_id}")
+
+
+def _coalesce(showtime_id: int, payload: dict):
+    pending = _pending_deltas.get(showtime_id)
+    if pending is None:
+        pending = _pending_deltas[showtime_id] = {"changes": {}, "version": None}
+        asyncio.get_running_loop().call_later(settings.WS_COALESCE_WINDOW_MS / 1000, _flush_delta, showtime_id)
+    # later events win per seat
+    for sid in payload["seat_ids"]:
+        pending["changes"][sid] = payload["status"]
+    version = payload.get("version")
+    if version is not None and (pending["version"] is None or version > pending["version"]):
+        pending["version"] = version
+
+
+def _flush_delta(showtime_id: int):
+    pending = _pending_deltas.pop(showtime_id, None)
+    if not pending:
+        return
+    changes = defaultdict(list)
+    for sid, seat_status in pending["changes"].items():
+        changes[seat_status].append(sid)
+    frame = json.dumps({
+        "type": "seats_delta",
+        "showtime_id": showtime_id,
+        "version": pending["version"],
+        "changes": changes,
+    })
+    _enqueue(showtime_id, frame, pending["version"])
+
+
+def _ensure_publisher():
+    global _outbox, _publisher_task
+    if _outbox is None:
+        _outbox = asyncio.Queue(maxsize=OUTBOX_SIZE)
+    if _publisher_task is None or _publisher_task.done():
+        _publisher_task = asyncio.get_running_loop().create_task(_publish_loop())
+
+
+async def _publish_loop():
+    redis = get_redis()
+    while True:
+        events = [await _outbox.get()]
+        while not _outbox.empty():
+            events.append(_outbox.get_nowait())
+        try:
+            async with redis.pipeline(transaction=False) as pipe:
+                for showtime_id, frame, version in events:
+                    pipe.publish(f"showtime:{showtime_id}", frame)
+                    if version is not None:
+                        pipe.set(seat_version_key(showtime_id), version)
+                await pipe.execute()
+        except Exception:
+            for showtime_id, frame, _ in events:
+                _remember(showtime_id, frame)
+                deliver_frame(showtime_id, frame)
+
+
+# ------------------------------------------------------------
+# 📡 Process-wide Redis listener
+# ------------------------------------------------------------
+async def _listen():
+    backoff = 0.5
+    while True:
+        pubsub = get_redis().pubsub()
         try:
-            await ws.send_json(payload)
+            await pubsub.psubscribe(SHOWTIME_CHANNEL_PATTERN)
+            backoff = 0.5
+            # events published while we were not subscribed are not in the rings
+            _recent.clear()
+            # listen() blocks on the connection: no polling, no per-socket subscriptions
+            async for msg in pubsub.listen():
+                if msg["type"] != "pmessage":
+                    continue
+                try:
+                    showtime_id = int(msg["channel"].split(":", 1)[1])
+                except (ValueError, TypeError):
+                    continue
+                _remember(showtime_id, msg["data"])
+                for hook in _event_hooks:
+                    try:
+                        hook(showtime_id, msg["data"])
+                    except Exception:
+                        traceback.print_exc()
+                if showtime_id in _connections:
+                    # already JSON: forwarded as-is, serialized once by the publisher
+                    deliver_frame(showtime_id, msg["data"])
+        except asyncio.CancelledError:
+            raise
         except Exception:
-            to_remove.append(ws)
-    for ws in to_remove:
-        unregister_ws(showtime_id, ws)
+            traceback.print_exc()
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, 10)
+        finally:
+            try:
+                await pubsub.aclose()
+            except Exception:
+                pass
+
+
+def add_event_hook(hook: Callable[[int, str], None]):
+    """Observe every seat event published by any process (e.g. to patch caches)."""
+    if hook not in _event_hooks:
+        _event_hooks.append(hook)
+
+
+def start_listener():
+    global _listener_task
+    _ensure_publisher()
+    if _listener_task is None or _listener_task.done():
+        _listener_task = asyncio.create_task(_listen())
+
+
+async def stop_listener():
+    global _listener_task, _publisher_task
+    for task in (_listener_task, _publisher_task):
+        if task is not None:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+    _listener_task = None
+    _publisher_task = None
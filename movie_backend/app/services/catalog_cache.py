@@ -0,0 +1,155 @@
+# app/services/catalog_cache.py
+import asyncio
+import hashlib
+import json
+import time
+import traceback
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Awaitable, Callable, Dict, Optional, Tuple
+
+from cachetools import TTLCache
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.db.database import async_session
+from app.db.replica import open_read_session
+from app.services.redis_client import get_redis
+
+CATALOG_VERSION_KEY = "catalog:version"
+
+# builds (body, extra headers) for a cache miss, from a catalog read session
+Builder = Callable[[AsyncSession], Awaitable[Tuple[object, Dict[str, str]]]]
+
+
+class _Entry:
+    __slots__ = ("version", "body", "etag", "headers")
+
+    def __init__(self, version: int, body: bytes, headers: Dict[str, str]):
+        self.version = version
+        self.body = body
+        self.etag = '"' + hashlib.sha256(body).hexdigest()[:32] + '"'   # strong: derived from the exact bytes
+        self.headers = headers
+
+
+class CatalogCache:
+    """
+    In-process cache of rendered catalog responses, keyed by path + sorted query.
+
+    Each entry remembers the catalog version it was rendered at. Admin writes
+    bump the version (a Redis counter shared by all processes), which retires
+    every entry at once; other processes re-read the counter at most every
+    CATALOG_VERSION_CHECK_SECONDS, so a hit normally costs no I/O at all.
+    Responses carry a strong ETag (If-None-Match answers 304) and a public
+    Cache-Control so browsers and CDNs can absorb repeat traffic.
+
+    A database session is opened only to build a missing entry, so hits
+    (and 304s) never check out a connection. Bodies are rebuilt from the
+    primary until a version change has had time to reach the read replica
+    (see _catalog_session), so a stale replica read is never cached under the
+    new version.
+    """
+
+    def __init__(self):
+        self._entries: TTLCache = TTLCache(maxsize=settings.CATALOG_CACHE_SIZE, ttl=settings.CATALOG_CACHE_TTL_SECONDS)
+        self._loading: Dict[Tuple[str, int], asyncio.Future] = {}
+        self._version = 0
+        self._checked_at = float("-inf")
+        self._changed_at = float("-inf")   # when this process last saw the version change
+
+    async def respond(self, request: Request, build: Builder) -> Response:
+        key = _cache_key(request)
+        version = await self.current_version()
+        entry = self._entries.get(key)
+        if entry is None or entry.version != version:
+            entry = await self._render(key, version, build)
+        headers = {
+            "ETag": entry.etag,
+            "Cache-Control": f"public, max-age={settings.CATALOG_CACHE_MAX_AGE_SECONDS}",
+            **entry.headers,
+        }
+        if _etag_matches(request.headers.get("if-none-match"), entry.etag):
+            return Response(status_code=304, headers=headers)
+        return Response(entry.body, media_type="application/json", headers=headers)
+
+    async def _render(self, key: str, version: int, build: Builder) -> _Entry:
+        # single flight: concurrent misses for a key share one query
+        pending = self._loading.get((key, version))
+        if pending is not None:
+            return await asyncio.shield(pending)
+        fut = asyncio.get_running_loop().create_future()
+        self._loading[(key, version)] = fut
+        try:
+            async with _catalog_session() as db:
+                content, headers = await build(db)
+                entry = _Entry(version, json.dumps(jsonable_encoder(content)).encode(), headers)
+            if version == self._version:   # not superseded by a bump while rendering
+                self._entries[key] = entry
+            fut.set_result(entry)
+            return entry
+        except BaseException as e:
+            fut.set_exception(e)
+            fut.exception()  # mark retrieved when nobody else is waiting
+            raise
+        finally:
+            del self._loading[(key, version)]
+
+    async def current_version(self) -> int:
+        now = time.monotonic()
+        if now - self._checked_at >= settings.CATALOG_VERSION_CHECK_SECONDS:
+            self._checked_at = now
+            try:
+                self._set_version(int(await get_redis().get(CATALOG_VERSION_KEY) or 0))
+            except Exception:
+                traceback.print_exc()   # keep serving at the last known version
+        return self._version
+
+    async def bump(self):
+        """Retire every cached catalog response, here at once and in other processes within a check interval."""
+        self._entries.clear()
+        try:
+            self._set_version(int(await get_redis().incr(CATALOG_VERSION_KEY)))
+            self._checked_at = time.monotonic()
+        except Exception:
+            traceback.print_exc()
+            self._version += 1
+        self._changed_at = time.monotonic()
+
+    def recently_changed(self) -> bool:
+        """True while the replica may not have replayed the write behind the last version change."""
+        # the measured lag itself can be one check interval old
+        window = settings.READ_REPLICA_MAX_STALENESS_SECONDS + settings.READ_REPLICA_CHECK_INTERVAL_SECONDS
+        return time.monotonic() - self._changed_at < window
+
+    def _set_version(self, version: int):
+        if version != self._version:
+            self._entries.clear()   # also covers a reset counter (Redis flushed)
+            self._version = version
+            self._changed_at = time.monotonic()
+
+
+@asynccontextmanager
+async def _catalog_session() -> AsyncIterator[AsyncSession]:
+    """Session for catalog builders: the replica, except right after a catalog write."""
+    if catalog_cache.recently_changed():
+        async with async_session() as db:
+            yield db
+        return
+    async with open_read_session() as db:
+        yield db
+
+
+def _cache_key(request: Request) -> str:
+    return request.url.path + "?" + "&".join(f"{k}={v}" for k, v in sorted(request.query_params.multi_items()))
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    # weak comparison, as If-None-Match requires
+    tags = [t.strip() for t in if_none_match.split(",")]
+    return "*" in tags or any(t.removeprefix("W/") == etag for t in tags)
+
+
+catalog_cache = CatalogCache()
@@ -0,0 +1,109 @@
+# app/services/durable_queue.py
+import json
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.core.config import settings
+from app.services.redis_client import get_redis
+
+# Redis layout:
+#   ticketpool:queue:<showtime_id>  -> stream of queued requests, consumer group "ticketpool"
+#   ticketpool:result:<request_id>  -> {"user_id", "result"} json (EX = TICKETPOOL_RESULT_TTL_SECONDS)
+GROUP = "ticketpool"
+QUEUE_PREFIX = "ticketpool:queue:"
+
+
+def queue_key(showtime_id: int) -> str:
+    return f"{QUEUE_PREFIX}{showtime_id}"
+
+
+def result_key(request_id: str) -> str:
+    return f"ticketpool:result:{request_id}"
+
+
+class DurableQueue:
+    """
+    Per-showtime request queues kept in Redis Streams.
+
+    A request is appended (XADD) before anyone waits on it, read by the
+    showtime's worker through a consumer group, and acknowledged and deleted
+    only after its batch committed and its result was stored. Entries left
+    pending by a crashed worker are reclaimed with XAUTOCLAIM by the next one.
+    """
+
+    def __init__(self):
+        self.redis = get_redis()
+        self._groups: set = set()
+
+    async def _ensure_group(self, showtime_id: int):
+        if showtime_id in self._groups:
+            return
+        try:
+            await self.redis.xgroup_create(queue_key(showtime_id), GROUP, id="0", mkstream=True)
+        except Exception as e:
+            if "BUSYGROUP" not in str(e):
+                raise
+        self._groups.add(showtime_id)
+
+    async def append(self, showtime_id: int, request_id: str, kind: str, fields: Dict[str, Any], reply_to: str) -> str:
+        """Durably queue a request; returns the stream entry id."""
+        await self._ensure_group(showtime_id)
+        message = {"request_id": request_id, "reply_to": reply_to, "kind": kind, "fields": fields}
+        return await self.redis.xadd(queue_key(showtime_id), {"data": json.dumps(message)})
+
+    async def read(self, showtime_id: int, consumer: str, count: int, block_ms: int) -> List[Tuple[str, Dict[str, Any]]]:
+        """New entries for this consumer, waiting up to block_ms for the first one."""
+        await self._ensure_group(showtime_id)
+        entries = await self.redis.xreadgroup(GROUP, consumer, {queue_key(showtime_id): ">"}, count=count, block=block_ms)
+        return [(entry_id, json.loads(fields["data"])) for _, messages in entries or [] for entry_id, fields in messages]
+
+    async def claim_stale(self, showtime_id: int, consumer: str, count: int) -> List[Tuple[str, Dict[str, Any]]]:
+        """Take over entries another worker read but never acknowledged (oldest first)."""
+        await self._ensure_group(showtime_id)
+        min_idle_ms = int(settings.TICKETPOOL_LEASE_SECONDS * 1000)
+        reply = await self.redis.xautoclaim(queue_key(showtime_id), GROUP, consumer, min_idle_ms, start_id="0-0", count=count)
+        messages = reply[1] if reply else []
+        return [(entry_id, json.loads(fields["data"])) for entry_id, fields in messages if fields]
+
+    async def ack(self, showtime_id: int, entry_ids: List[str]):
+        if not entry_ids:
+            return
+        pipe = self.redis.pipeline(transaction=False)
+        pipe.xack(queue_key(showtime_id), GROUP, *entry_ids)
+        pipe.xdel(queue_key(showtime_id), *entry_ids)
+        await pipe.execute()
+
+    async def backlog(self, showtime_id: int) -> int:
+        return int(await self.redis.xlen(queue_key(showtime_id)))
+
+    async def queued_showtimes(self) -> List[int]:
+        """Showtimes with entries still in their stream (new or unacknowledged)."""
+        showtimes = []
+        async for key in self.redis.scan_iter(match=f"{QUEUE_PREFIX}*", count=500):
+            if await self.redis.xlen(key):
+                showtimes.append(int(key[len(QUEUE_PREFIX):]))
+        return showtimes
+
+    # --------------------------------------------------------
+    # 🧾 Results
+    # --------------------------------------------------------
+    async def store_results(self, results: List[Tuple[str, Optional[int], Dict[str, Any]]]):
+        if not results:
+            return
+        pipe = self.redis.pipeline(transaction=False)
+        for request_id, user_id, result in results:
+            pipe.set(
+                result_key(request_id),
+                json.dumps({"user_id": user_id, "result": result}, default=str),
+                ex=settings.TICKETPOOL_RESULT_TTL_SECONDS,
+            )
+        await pipe.execute()
+
+    async def get_result(self, request_id: str) -> Optional[Dict[str, Any]]:
+        raw = await self.redis.get(result_key(request_id))
+        return json.loads(raw) if raw else None
+
+    async def get_results(self, request_ids: List[str]) -> List[Optional[Dict[str, Any]]]:
+        if not request_ids:
+            return []
+        raws = await self.redis.mget([result_key(rid) for rid in request_ids])
+        return [json.loads(raw) if raw else None for raw in raws]
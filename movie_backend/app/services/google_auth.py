@@ -0,0 +1,130 @@
+# app/services/google_auth.py
+import asyncio
+import json
+import re
+import time
+import traceback
+from typing import Any, Dict, Optional
+
+from google.auth import exceptions as google_exceptions
+from google.auth import jwt as google_jwt
+from google.auth.transport import requests as google_requests
+
+from app.core.config import settings
+
+_GOOGLE_ISSUERS = ("accounts.google.com", "https://accounts.google.com")
+_MAX_AGE_RE = re.compile(r"max-age=(\d+)")
+
+
+def _cache_lifetime(headers) -> float:
+    """Seconds the cert response may be reused: Cache-Control max-age minus Age."""
+    match = _MAX_AGE_RE.search(headers.get("Cache-Control", "") or "")
+    if not match:
+        return settings.GOOGLE_CERTS_DEFAULT_TTL_SECONDS
+    age = int(headers.get("Age", 0) or 0)
+    return max(int(match.group(1)) - age, 0)
+
+
+class GoogleCertCache:
+    """
+    Google's ID-token signing certificates, kept in-process.
+
+    Certificates are fetched off the event loop and reused for as long as
+    Google's Cache-Control allows. A background task refreshes them shortly
+    before they expire, so verifying a sign-in is a local signature check.
+    A token signed with an unknown key id (keys were rotated early) forces
+    one refresh.
+    """
+
+    def __init__(self, certs_url: Optional[str] = None):
+        self.certs_url = certs_url or settings.GOOGLE_CERTS_URL
+        self.certs: Dict[str, str] = {}
+        self.expires_at = 0.0
+        self.fetched_at = 0.0
+        self._refreshing: Optional[asyncio.Task] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def _fetch(self):
+        request = google_requests.Request()
+        response = request(self.certs_url, method="GET", timeout=settings.GOOGLE_CERTS_TIMEOUT_SECONDS)
+        if response.status != 200:
+            raise google_exceptions.TransportError(f"Could not fetch certificates at {self.certs_url}")
+        return json.loads(response.data.decode("utf-8")), _cache_lifetime(response.headers)
+
+    async def refresh(self) -> Dict[str, str]:
+        # concurrent callers share one fetch
+        if self._refreshing is None or self._refreshing.done():
+            self._refreshing = asyncio.create_task(self._do_refresh())
+        await asyncio.shield(self._refreshing)
+        return self.certs
+
+    async def _do_refresh(self):
+        certs, lifetime = await asyncio.to_thread(self._fetch)
+        self.certs = certs
+        self.fetched_at = time.monotonic()
+        self.expires_at = self.fetched_at + lifetime
+
+    async def get_certs(self) -> Dict[str, str]:
+        if not self.certs or time.monotonic() >= self.expires_at:
+            try:
+                return await self.refresh()
+            except Exception:
+                if not self.certs:
+                    raise
+                # Google unreachable: keep verifying with the last known keys
+                traceback.print_exc()
+        return self.certs
+
+    async def refresh_for_unknown_key(self) -> Dict[str, str]:
+        """Unknown key id: refetch, at most once per GOOGLE_CERTS_MIN_REFRESH_SECONDS."""
+        if time.monotonic() - self.fetched_at >= settings.GOOGLE_CERTS_MIN_REFRESH_SECONDS:
+            return await self.refresh()
+        return self.certs
+
+    # --------------------------------------------------------
+    # 🔄 Background refresh
+    # --------------------------------------------------------
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        while True:
+            try:
+                await self.refresh()
+                # wake up a little before expiry so logins never wait on the fetch
+                delay = max(self.expires_at - time.monotonic() - settings.GOOGLE_CERTS_REFRESH_MARGIN_SECONDS, 5)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                traceback.print_exc()
+                delay = 30
+            await asyncio.sleep(delay)
+
+
+google_certs = GoogleCertCache()
+
+
+def _decode(token: str, certs: Dict[str, str], audience: Optional[str]) -> Dict[str, Any]:
+    idinfo = google_jwt.decode(token, certs=certs, audience=audience, clock_skew_in_seconds=0)
+    if idinfo.get("iss") not in _GOOGLE_ISSUERS:
+        raise ValueError("Wrong issuer")
+    return idinfo
+
+
+async def verify_google_id_token(token: str, audience: Optional[str]) -> Dict[str, Any]:
+    """Drop-in for id_token.verify_oauth2_token without blocking I/O; raises ValueError."""
+    certs = await google_certs.get_certs()
+    kid = google_jwt.decode_header(token).get("kid")
+    if kid not in certs:
+        certs = await google_certs.refresh_for_unknown_key()
+    return await asyncio.to_thread(_decode, token, certs, audience)
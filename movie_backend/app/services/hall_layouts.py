@@ -0,0 +1,48 @@
+# app/services/hall_layouts.py
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+
+from cachetools import LRUCache
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.db.models import HallLayout, LayoutSeat
+
+
+@dataclass(frozen=True)
+class Layout:
+    """A hall layout resolved for seat maps: layout_seat_id -> (position, row, number, category, price)."""
+    id: int
+    name: str
+    price_tiers: Dict[str, int]
+    seats: Dict[int, Tuple[int, str, int, str, int]]
+
+
+# layout_id -> Layout; layouts never change once created, so entries only leave on eviction
+_layouts: LRUCache = LRUCache(maxsize=settings.HALL_LAYOUT_CACHE_SIZE)
+
+
+async def get_layout(db: AsyncSession, layout_id: int) -> Optional[Layout]:
+    """Cached layout, loaded on a miss with two queries on the caller's session."""
+    layout = _layouts.get(layout_id)
+    if layout is not None:
+        return layout
+    hall = (await db.execute(
+        select(HallLayout.name, HallLayout.price_tiers).where(HallLayout.id == layout_id)
+    )).first()
+    if hall is None:
+        return None
+    q = await db.execute(
+        select(LayoutSeat.id, LayoutSeat.row, LayoutSeat.number, LayoutSeat.category)
+        .where(LayoutSeat.layout_id == layout_id)
+        .order_by(LayoutSeat.row, LayoutSeat.number)
+    )
+    tiers = dict(hall.price_tiers)
+    seats = {
+        lsid: (pos, row, number, category, tiers[category])
+        for pos, (lsid, row, number, category) in enumerate(q.all())
+    }
+    layout = Layout(layout_id, hall.name, tiers, seats)
+    _layouts[layout_id] = layout
+    return layout
@@ -0,0 +1,148 @@
+# app/services/lock_reaper.py
+import asyncio
+import time
+import traceback
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+from app.core.config import settings
+from app.db.crud import get_locked_seats
+from app.db.database import async_session
+from app.services.redis_client import get_redis
+from app.services.seat_holds import HOLD_EXPIRY_KEY
+
+# Sorted set of outstanding seat locks: member "<showtime_id>:<seat_id>", score = locked_until (epoch seconds)
+LOCK_EXPIRY_KEY = "seat_locks:expiry"
+
+# Pop due members atomically so several API processes can reap without double work.
+_POP_DUE_LUA = """
+local due = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1], 'LIMIT', 0, ARGV[2])
+if #due > 0 then
+    redis.call('ZREM', KEYS[1], unpack(due))
+end
+return due
+"""
+
+
+class SeatLockReaper:
+    """
+    Releases expired seat locks (and announces lapsed seat holds) in bulk.
+
+    Bookings claim seats straight to booked, so the only DB locks left are
+    legacy rows: they are indexed by expiry in a Redis sorted set once at
+    startup, and each sweep only touches locks that are actually due. Seat
+    holds live in Redis (see seat_holds) and expire on their own. Releases go through the TicketPool queue of their
+    showtime (keeping per-showtime serialization and the worker's seat table
+    in sync), and the pool broadcasts the freed seats.
+    """
+
+    def __init__(self, pool, interval: Optional[float] = None, batch_size: Optional[int] = None):
+        self.pool = pool
+        self.interval = interval if interval is not None else settings.SEAT_LOCK_REAP_INTERVAL_SECONDS
+        self.batch_size = batch_size or settings.SEAT_LOCK_REAP_BATCH
+        self.redis = get_redis()
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self):
+        try:
+            await self._index_existing_locks()
+        except Exception:
+            traceback.print_exc()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _index_existing_locks(self):
+        """Index the locked seats still in the DB (one indexed read at startup)."""
+        async with async_session() as db:
+            locked = await get_locked_seats(db)
+        mapping = {
+            f"{showtime_id}:{seat_id}": (locked_until.timestamp() if locked_until else 0)
+            for seat_id, showtime_id, locked_until in locked
+        }
+        items = list(mapping.items())
+        for i in range(0, len(items), self.batch_size):
+            await self.redis.zadd(LOCK_EXPIRY_KEY, dict(items[i:i + self.batch_size]))
+
+    async def _run(self):
+        while True:
+            try:
+                reaped = await self.reap_once()
+            except Exception:
+                traceback.print_exc()
+                reaped = 0
+            # a full batch means more are probably due: sweep again right away
+            if reaped < self.batch_size:
+                await asyncio.sleep(self.interval)
+
+    async def reap_once(self) -> int:
+        now = time.time()
+        reaped = await self._reap_locks(now)
+        reaped += await self._reap_holds(now)
+        return reaped
+
+    async def _reap_locks(self, now: float) -> int:
+        due = await self.redis.eval(_POP_DUE_LUA, 1, LOCK_EXPIRY_KEY, now, self.batch_size)
+        if not due:
+            return 0
+
+        by_showtime: Dict[int, List[int]] = defaultdict(list)
+        for member in due:
+            showtime_id, seat_id = member.split(":")
+            by_showtime[int(showtime_id)].append(int(seat_id))
+
+        results = await asyncio.gather(*(
+            self.pool.enqueue_release(showtime_id, seat_ids)
+            for showtime_id, seat_ids in by_showtime.items()
+        ), return_exceptions=True)
+        # put failed releases back (e.g. TicketPoolBusy) so the next sweep retries them
+        retry = {
+            f"{showtime_id}:{sid}": now + self.interval
+            for (showtime_id, seat_ids), result in zip(by_showtime.items(), results)
+            if _failed(result)
+            for sid in seat_ids
+        }
+        if retry:
+            await self.redis.zadd(LOCK_EXPIRY_KEY, retry)
+        return len(due)
+
+    async def _reap_holds(self, now: float) -> int:
+        """Redis already dropped the expired hold keys; tell viewers the seats are free again."""
+        due = await self.redis.eval(_POP_DUE_LUA, 1, HOLD_EXPIRY_KEY, now, self.batch_size)
+        if not due:
+            return 0
+
+        by_showtime: Dict[int, List[int]] = defaultdict(list)
+        members: Dict[int, List[str]] = defaultdict(list)
+        for member in due:
+            _, showtime_id, seat_ids = member.split("|")
+            by_showtime[int(showtime_id)].extend(int(sid) for sid in seat_ids.split(","))
+            members[int(showtime_id)].append(member)
+
+        results = await asyncio.gather(*(
+            self.pool.enqueue_hold_expired(showtime_id, seat_ids)
+            for showtime_id, seat_ids in by_showtime.items()
+        ), return_exceptions=True)
+        retry = {
+            member: now + self.interval
+            for showtime_id, result in zip(by_showtime, results)
+            if _failed(result)
+            for member in members[showtime_id]
+        }
+        if retry:
+            await self.redis.zadd(HOLD_EXPIRY_KEY, retry)
+        return len(due)
+
+
+def _failed(result) -> bool:
+    if isinstance(result, Exception):
+        print(f"⚠️ seat release not queued, retrying next sweep: {result!r}")
+        return True
+    return not result.get("success")
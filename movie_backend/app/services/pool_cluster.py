@@ -0,0 +1,288 @@
+# app/services/pool_cluster.py
+import asyncio
+import bisect
+import hashlib
+import json
+import time
+import traceback
+import uuid
+from typing import Any, Dict, List, Optional
+
+from app.core.config import settings
+from app.services.redis_client import get_redis
+
+# Redis layout:
+#   ticketpool:nodes               -> zset of live node ids scored by heartbeat expiry (epoch seconds)
+#   ticketpool:owner:<showtime_id> -> node id holding the showtime's lease (PX = lease)
+#   ticketpool:inbox:<node_id>     -> stream of requests forwarded to that node
+#   ticketpool:reply:<node_id>     -> stream of results for requests that node forwarded
+NODES_KEY = "ticketpool:nodes"
+STREAM_MAXLEN = 10_000
+
+# KEYS = lease key; ARGV = node id, lease ms. Extend only a lease we still hold.
+_RENEW_LUA = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('PEXPIRE', KEYS[1], ARGV[2])
+end
+return 0
+"""
+
+# KEYS = lease key; ARGV = node id. Delete only a lease we still hold.
+_RELEASE_LUA = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+MOVED = {"success": False, "message": "showtime moved to another booking node, please retry"}
+TIMEOUT = {"success": False, "message": "booking service timed out, please retry"}
+
+
+def lease_key(showtime_id: int) -> str:
+    return f"ticketpool:owner:{showtime_id}"
+
+
+def _inbox(node_id: str) -> str:
+    return f"ticketpool:inbox:{node_id}"
+
+
+def _replies(node_id: str) -> str:
+    return f"ticketpool:reply:{node_id}"
+
+
+def _hash(key: str) -> int:
+    return int.from_bytes(hashlib.md5(key.encode()).digest()[:8], "big")
+
+
+class HashRing:
+    """Consistent hashing of showtimes onto nodes; adding a node moves ~1/n of them."""
+
+    def __init__(self, nodes: List[str], vnodes: int):
+        points = sorted((_hash(f"{node}#{i}"), node) for node in nodes for i in range(vnodes))
+        self._keys = [p for p, _ in points]
+        self._nodes = [n for _, n in points]
+
+    def owner(self, showtime_id: int) -> Optional[str]:
+        if not self._keys:
+            return None
+        i = bisect.bisect(self._keys, _hash(str(showtime_id))) % len(self._keys)
+        return self._nodes[i]
+
+
+class PoolCluster:
+    """
+    Coordinates TicketPools running in several processes or hosts.
+
+    Each showtime is processed by exactly one node: the holder of its Redis
+    lease. The lease goes to the showtime's owner on a consistent-hash ring of
+    live nodes (heartbeats in a sorted set). Other nodes forward requests to
+    the leaseholder's inbox stream and wait on their own reply stream, so
+    per-showtime serialization holds across the whole deployment.
+
+    A node gives a lease back once the showtime is idle and either the ring
+    points elsewhere (nodes joined or left) or its worker retired. A node that cannot renew a lease stops
+    processing that showtime and rejects its queued requests with a retry.
+    """
+
+    def __init__(self, pool):
+        self.pool = pool
+        self.node_id = pool.node_id
+        self.redis = get_redis()
+        self.lease_ms = int(settings.TICKETPOOL_LEASE_SECONDS * 1000)
+        self.ring = HashRing([self.node_id], settings.TICKETPOOL_RING_VNODES)
+        self._members: List[str] = [self.node_id]
+        self.leases: Dict[int, float] = {}          # showtime_id -> loop time the lease is safe until
+        self._waiting: Dict[str, asyncio.Future] = {}
+        self._tasks: List[asyncio.Task] = []
+
+    # --------------------------------------------------------
+    # 🔁 Lifecycle
+    # --------------------------------------------------------
+    async def start(self):
+        await self._heartbeat()
+        self._tasks = [
+            asyncio.create_task(self._heartbeat_loop()),
+            asyncio.create_task(self._renew_loop()),
+            asyncio.create_task(self._read_loop()),
+        ]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        for task in self._tasks:
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self._tasks = []
+        for showtime_id in list(self.leases):
+            await self._release(showtime_id)
+        await self.redis.zrem(NODES_KEY, self.node_id)
+        await self.redis.delete(_inbox(self.node_id), _replies(self.node_id))
+
+    # --------------------------------------------------------
+    # 🧭 Ownership
+    # --------------------------------------------------------
+    def holds(self, showtime_id: int) -> bool:
+        until = self.leases.get(showtime_id)
+        return until is not None and asyncio.get_running_loop().time() < until
+
+    async def route(self, showtime_id: int) -> Optional[str]:
+        """None when this node processes the showtime, else the node to forward to."""
+        if self.holds(showtime_id):
+            return None
+        for _ in range(3):
+            owner = await self.redis.get(lease_key(showtime_id))
+            if owner is None:
+                target = self.ring.owner(showtime_id)
+                if target != self.node_id:
+                    return target   # it takes the lease when the request arrives
+            elif owner != self.node_id:
+                return owner
+            if await self._acquire(showtime_id):
+                return None
+        # kept losing lease races: the worker re-checks the lease and answers MOVED
+        return None
+
+    async def _acquire(self, showtime_id: int) -> bool:
+        start = asyncio.get_running_loop().time()
+        key = lease_key(showtime_id)
+        ok = await self.redis.set(key, self.node_id, px=self.lease_ms, nx=True)
+        if not ok:
+            # a lease we hold but forgot about (e.g. renewal raced a restart) is ours to extend
+            ok = int(await self.redis.eval(_RENEW_LUA, 1, key, self.node_id, self.lease_ms))
+        if not ok:
+            return False
+        if showtime_id not in self.leases:
+            # writes may have happened elsewhere while we did not own it
+            self.pool.seat_states.pop(showtime_id, None)
+        self.leases[showtime_id] = start + self.lease_ms / 1000 * 0.9
+        return True
+
+    async def _release(self, showtime_id: int):
+        self._drop(showtime_id)
+        try:
+            await self.redis.eval(_RELEASE_LUA, 1, lease_key(showtime_id), self.node_id)
+        except Exception:
+            traceback.print_exc()
+
+    def _drop(self, showtime_id: int):
+        self.leases.pop(showtime_id, None)
+        self.pool.seat_states.pop(showtime_id, None)
+
+    async def _renew_loop(self):
+        interval = settings.TICKETPOOL_LEASE_SECONDS / 3
+        while True:
+            await asyncio.sleep(interval)
+            for showtime_id in list(self.leases):
+                try:
+                    if self.pool.is_idle(showtime_id) and (
+                        self.ring.owner(showtime_id) != self.node_id    # rebalance after membership changes
+                        or showtime_id not in self.pool.workers         # its worker retired
+                    ):
+                        await self._release(showtime_id)
+                        continue
+                    start = asyncio.get_running_loop().time()
+                    if int(await self.redis.eval(_RENEW_LUA, 1, lease_key(showtime_id), self.node_id, self.lease_ms)):
+                        self.leases[showtime_id] = start + self.lease_ms / 1000 * 0.9
+                    else:
+                        self._drop(showtime_id)
+                except Exception:
+                    traceback.print_exc()
+
+    # --------------------------------------------------------
+    # 💓 Membership
+    # --------------------------------------------------------
+    async def _heartbeat(self):
+        now = time.time()
+        await self.redis.zadd(NODES_KEY, {self.node_id: now + settings.TICKETPOOL_HEARTBEAT_SECONDS * 3})
+        await self.redis.zremrangebyscore(NODES_KEY, "-inf", now)
+        members = sorted(await self.redis.zrange(NODES_KEY, 0, -1))
+        if members != self._members:
+            self._members = members
+            self.ring = HashRing(members, settings.TICKETPOOL_RING_VNODES)
+
+    async def _heartbeat_loop(self):
+        while True:
+            await asyncio.sleep(settings.TICKETPOOL_HEARTBEAT_SECONDS)
+            try:
+                await self._heartbeat()
+            except Exception:
+                traceback.print_exc()
+
+    # --------------------------------------------------------
+    # 📨 Forwarding
+    # --------------------------------------------------------
+    async def forward(self, node_id: str, showtime_id: int, req) -> Dict[str, Any]:
+        request_id = uuid.uuid4().hex
+        fut = asyncio.get_running_loop().create_future()
+        self._waiting[request_id] = fut
+        message = {
+            "request_id": request_id,
+            "reply_to": self.node_id,
+            "showtime_id": showtime_id,
+            "kind": type(req).__name__,
+            "fields": {k: v for k, v in vars(req).items() if k != "result_future"},
+        }
+        try:
+            await self.redis.xadd(_inbox(node_id), {"data": json.dumps(message)}, maxlen=STREAM_MAXLEN, approximate=True)
+            return await asyncio.wait_for(fut, settings.TICKETPOOL_FORWARD_TIMEOUT_SECONDS)
+        except asyncio.TimeoutError:
+            return dict(TIMEOUT)
+        finally:
+            self._waiting.pop(request_id, None)
+
+    async def wake(self, node_id: str, showtime_id: int):
+        """Durable queue mode: the request is already in the showtime's stream, the owner just has to consume it."""
+        message = {"wake": True, "showtime_id": showtime_id}
+        await self.redis.xadd(_inbox(node_id), {"data": json.dumps(message)}, maxlen=STREAM_MAXLEN, approximate=True)
+
+    async def notify(self, node_id: str, request_id: str, result: Dict[str, Any]):
+        reply = {"request_id": request_id, "result": result}
+        pipe = self.redis.pipeline(transaction=False)
+        pipe.xadd(_replies(node_id), {"data": json.dumps(reply, default=str)}, maxlen=STREAM_MAXLEN, approximate=True)
+        # a node that died never deletes its reply stream
+        pipe.expire(_replies(node_id), 3600)
+        await pipe.execute()
+
+    async def _read_loop(self):
+        streams = {_inbox(self.node_id): "0-0", _replies(self.node_id): "0-0"}
+        while True:
+            try:
+                entries = await self.redis.xread(streams, block=5000, count=100)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                traceback.print_exc()
+                await asyncio.sleep(1)
+                continue
+            for stream, messages in entries or []:
+                for entry_id, fields in messages:
+                    streams[stream] = entry_id
+                    data = json.loads(fields["data"])
+                    if stream == _inbox(self.node_id):
+                        asyncio.create_task(self._serve(data))
+                    else:
+                        fut = self._waiting.get(data["request_id"]) or self.pool._waiting.get(data["request_id"])
+                        if fut is not None and not fut.done():
+                            fut.set_result(data["result"])
+
+    async def _serve(self, message: Dict[str, Any]):
+        showtime_id = message["showtime_id"]
+        if message.get("wake"):
+            if self.holds(showtime_id) or await self._acquire(showtime_id):
+                self.pool._ensure_queue(showtime_id)
+            return
+        try:
+            if self.holds(showtime_id) or await self._acquire(showtime_id):
+                result = await self.pool.submit_local(showtime_id, message["kind"], message["fields"])
+            else:
+                result = dict(MOVED)
+        except Exception:
+            traceback.print_exc()
+            result = {"success": False, "message": "internal error"}
+        try:
+            await self.notify(message["reply_to"], message["request_id"], result)
+        except Exception:
+            traceback.print_exc()
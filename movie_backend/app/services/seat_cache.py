@@ -0,0 +1,117 @@
+# app/services/seat_cache.py
+import asyncio
+import json
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Iterable, Optional, Tuple
+
+from app.core.config import settings
+from app.db.database import async_session
+from app.services.seat_holds import apply_seat_holds
+from app.services.seat_state import SeatState, load_published_seat_state
+
+
+class _Entry:
+    __slots__ = ("state", "loaded_at", "rendered")
+
+    def __init__(self, state: SeatState):
+        self.state = state
+        self.loaded_at = time.monotonic()
+        self.rendered: Dict[str, bytes] = {}
+
+
+class SeatMapCache:
+    """
+    Read-through, in-process LRU of seat maps per showtime.
+
+    Each entry is a SeatState plus the response bodies rendered from it, so a
+    hit costs a dict lookup. Entries are patched (not dropped) by seat events:
+    directly by the TicketPool after each commit in this process, and through
+    the Redis listener for commits made by other processes. Deltas at or below
+    an entry's version are already reflected and skipped. Entries are also
+    reloaded after SEAT_CACHE_TTL_SECONDS as a safety net for missed events.
+    """
+
+    def __init__(self, max_entries: Optional[int] = None, ttl_seconds: Optional[float] = None):
+        self.max_entries = max_entries or settings.SEAT_CACHE_MAX_SHOWTIMES
+        self.ttl = ttl_seconds if ttl_seconds is not None else settings.SEAT_CACHE_TTL_SECONDS
+        self._entries: "OrderedDict[int, _Entry]" = OrderedDict()
+        self._loading: Dict[int, asyncio.Future] = {}
+
+    async def get_state(self, showtime_id: int) -> SeatState:
+        return (await self._get_entry(showtime_id)).state
+
+    async def render(self, showtime_id: int, key: str, build: Callable[[SeatState], object]) -> bytes:
+        """JSON body for one representation of the seat map, rendered once per change."""
+        entry = await self._get_entry(showtime_id)
+        body = entry.rendered.get(key)
+        if body is None:
+            body = json.dumps(build(entry.state)).encode()
+            entry.rendered[key] = body
+        return body
+
+    async def _get_entry(self, showtime_id: int) -> _Entry:
+        entry = self._entries.get(showtime_id)
+        if entry is not None and time.monotonic() - entry.loaded_at < self.ttl:
+            self._entries.move_to_end(showtime_id)
+            return entry
+
+        # single flight: concurrent misses for a showtime share one load
+        pending = self._loading.get(showtime_id)
+        if pending is not None:
+            return await asyncio.shield(pending)
+        fut = asyncio.get_running_loop().create_future()
+        self._loading[showtime_id] = fut
+        try:
+            async with async_session() as db:
+                state = await load_published_seat_state(db, showtime_id)
+            await apply_seat_holds(state)
+            entry = _Entry(state)
+            if len(state):  # unknown/empty showtimes may get seats later: don't pin them
+                self._entries[showtime_id] = entry
+                self._entries.move_to_end(showtime_id)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+            fut.set_result(entry)
+            return entry
+        except BaseException as e:
+            fut.set_exception(e)
+            fut.exception()  # mark retrieved when nobody else is waiting
+            raise
+        finally:
+            del self._loading[showtime_id]
+
+    # --------------------------------------------------------
+    # ✏️ Write-driven patching
+    # --------------------------------------------------------
+    def apply(self, showtime_id: int, changes: Iterable[Tuple[str, Iterable[int]]], version: Optional[int] = None):
+        """Patch a cached entry with (status, seat_ids) changes, applied in order."""
+        entry = self._entries.get(showtime_id)
+        if entry is None:
+            return
+        if version is not None and version <= entry.state.version:
+            return
+        for seat_status, seat_ids in changes:
+            entry.state.set_status(seat_ids, seat_status)
+        if version is not None:
+            entry.state.version = version
+        entry.rendered.clear()
+
+    def on_event(self, showtime_id: int, frame: str):
+        """Broadcast listener hook: patch from seats_delta / seats_updated frames."""
+        if showtime_id not in self._entries:
+            return
+        try:
+            data = json.loads(frame)
+        except ValueError:
+            return
+        if data.get("type") == "seats_delta":
+            self.apply(showtime_id, data["changes"].items(), data.get("version"))
+        elif data.get("type") == "seats_updated":
+            self.apply(showtime_id, [(data["status"], data["seat_ids"])], data.get("version"))
+
+    def invalidate(self, showtime_id: int):
+        self._entries.pop(showtime_id, None)
+
+
+seat_cache = SeatMapCache()
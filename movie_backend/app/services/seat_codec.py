@@ -0,0 +1,124 @@
+# app/services/seat_codec.py
+import base64
+import hashlib
+import json
+from typing import Any, Dict, Optional
+
+from app.services.seat_state import STATUS_NAMES, SeatState
+
+# Opt-in compact seat map, negotiated with ?format=compact or this Accept type.
+COMPACT_MEDIA_TYPE = "application/vnd.bookmymovie.seatmap+json"
+
+# {
+#   "format": "compact-v1", "showtime_id", "version", "count",
+#   "status_codes": ["available", "locked", "booked"],
+#   "layout_hash": "...",
+#   "layout": {                                  # omitted when the client sent ?layout=<layout_hash>
+#     "rows": ["A", "B"], "row_counts": [10, 10],
+#     "numbers": [...],                          # only when a row is not numbered 1..n
+#     "ids": {"start": 1} | [...],               # contiguous ids collapse to their start
+#     "price_tiers": [100, 150], "price_index": "<base64 byte per seat>"   # index only with >1 tier
+#     "price_index_width": 2                     # only with >256 tiers: 2 bytes big-endian per seat
+#   },
+#   "status": "<base64 byte per seat>" | "status_rle": "<base64 (code, run hi, run lo) triples>"
+# }
+# Seats are listed in (row, number) order in every array.
+
+
+def wants_compact(fmt: Optional[str], accept: Optional[str]) -> bool:
+    if fmt:
+        return fmt == "compact"
+    return bool(accept) and COMPACT_MEDIA_TYPE in accept
+
+
+def rle_encode(data: bytes) -> bytes:
+    """(code, run length as 2 bytes big-endian) triples; runs longer than 65535 are split."""
+    out = bytearray()
+    i, n = 0, len(data)
+    while i < n:
+        code = data[i]
+        j = i + 1
+        while j < n and data[j] == code and j - i < 0xFFFF:
+            j += 1
+        run = j - i
+        out += bytes((code, run >> 8, run & 0xFF))
+        i = j
+    return bytes(out)
+
+
+def rle_decode(data: bytes) -> bytes:
+    out = bytearray()
+    for k in range(0, len(data), 3):
+        out += bytes((data[k],)) * ((data[k + 1] << 8) | data[k + 2])
+    return bytes(out)
+
+
+def _b64(data: bytes) -> str:
+    return base64.b64encode(data).decode("ascii")
+
+
+def encode_layout(state: SeatState) -> Dict[str, Any]:
+    rows, row_counts = [], []
+    for ri in state.row_idx:
+        if not row_counts or rows[-1] != state.row_labels[ri]:
+            rows.append(state.row_labels[ri])
+            row_counts.append(0)
+        row_counts[-1] += 1
+    layout: Dict[str, Any] = {"rows": rows, "row_counts": row_counts}
+
+    expected = [n for count in row_counts for n in range(1, count + 1)]
+    if list(state.numbers) != expected:
+        layout["numbers"] = list(state.numbers)
+
+    ids = list(state.ids)
+    if ids and ids == list(range(ids[0], ids[0] + len(ids))):
+        layout["ids"] = {"start": ids[0]}
+    else:
+        layout["ids"] = ids
+
+    tiers = sorted(set(state.prices))
+    layout["price_tiers"] = tiers
+    if len(tiers) > 1:
+        tier_of = {price: i for i, price in enumerate(tiers)}
+        if len(tiers) <= 0x100:
+            index = bytes(tier_of[p] for p in state.prices)
+        else:
+            # more tiers than a byte can address (e.g. migrated per-seat prices)
+            index = b"".join(tier_of[p].to_bytes(2, "big") for p in state.prices)
+            layout["price_index_width"] = 2
+        layout["price_index"] = _b64(index)
+    return layout
+
+
+def layout_hash(layout: Dict[str, Any]) -> str:
+    return hashlib.sha1(json.dumps(layout, sort_keys=True).encode()).hexdigest()[:16]
+
+
+def _layout(state: SeatState):
+    if state.layout_cache is None:
+        layout = encode_layout(state)
+        state.layout_cache = (layout, layout_hash(layout))
+    return state.layout_cache
+
+
+def layout_digest(state: SeatState) -> str:
+    return _layout(state)[1]
+
+
+def compact_seat_map(state: SeatState, known_layout: Optional[str] = None, rle: bool = False) -> Dict[str, Any]:
+    layout, digest = _layout(state)
+    body: Dict[str, Any] = {
+        "format": "compact-v1",
+        "showtime_id": state.showtime_id,
+        "version": state.version,
+        "count": len(state),
+        "status_codes": list(STATUS_NAMES),
+        "layout_hash": digest,
+    }
+    if known_layout != digest:
+        body["layout"] = layout
+    if rle:
+        body["status_rle"] = _b64(rle_encode(bytes(state.status)))
+    else:
+        body["status"] = _b64(bytes(state.status))
+    return body
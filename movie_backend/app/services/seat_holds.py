@@ -0,0 +1,124 @@
+# app/services/seat_holds.py
+import json
+import time
+import traceback
+import uuid
+from typing import Any, Dict, List, Optional
+
+from app.core.config import settings
+from app.services.redis_client import get_redis
+from app.services.seat_state import SeatState
+
+# Redis layout:
+#   hold:seat:<showtime_id>:<seat_id>  -> hold_id     (PX = hold ttl)
+#   hold:<hold_id>                     -> hold json   (PX = hold ttl)
+#   seat_holds:expiry                  -> zset of "<hold_id>|<showtime_id>|<seat ids csv>" scored by expiry
+HOLD_EXPIRY_KEY = "seat_holds:expiry"
+
+# KEYS = seat keys..., hold key; ARGV = hold_id, ttl_ms, hold json
+# All-or-nothing: returns the index (1-based) of the first seat already held, or 0.
+_HOLD_LUA = """
+local n = #KEYS - 1
+for i = 1, n do
+    if redis.call('EXISTS', KEYS[i]) == 1 then
+        return i
+    end
+end
+for i = 1, n do
+    redis.call('SET', KEYS[i], ARGV[1], 'PX', ARGV[2])
+end
+redis.call('SET', KEYS[#KEYS], ARGV[3], 'PX', ARGV[2])
+return 0
+"""
+
+# KEYS = seat keys..., hold key; ARGV = hold_id. Only deletes seat keys still owned by this hold.
+_RELEASE_LUA = """
+local n = #KEYS - 1
+for i = 1, n do
+    if redis.call('GET', KEYS[i]) == ARGV[1] then
+        redis.call('DEL', KEYS[i])
+    end
+end
+redis.call('DEL', KEYS[#KEYS])
+return 1
+"""
+
+
+class SeatHoldConflict(Exception):
+    def __init__(self, seat_id: int):
+        super().__init__(f"seat {seat_id} is held by another user")
+        self.seat_id = seat_id
+
+
+def seat_hold_key(showtime_id: int, seat_id: int) -> str:
+    return f"hold:seat:{showtime_id}:{seat_id}"
+
+
+def _hold_key(hold_id: str) -> str:
+    return f"hold:{hold_id}"
+
+
+def _expiry_member(hold: Dict[str, Any]) -> str:
+    return f"{hold['hold_id']}|{hold['showtime_id']}|{','.join(map(str, hold['seat_ids']))}"
+
+
+async def create_hold(user_id: int, showtime_id: int, seat_ids: List[int], ttl_seconds: Optional[int] = None) -> Dict[str, Any]:
+    """Atomically hold every seat (SET NX PX semantics) or none; raises SeatHoldConflict."""
+    ttl = ttl_seconds or settings.SEAT_HOLD_SECONDS
+    seat_ids = list(dict.fromkeys(seat_ids))
+    hold = {
+        "hold_id": uuid.uuid4().hex,
+        "user_id": user_id,
+        "showtime_id": showtime_id,
+        "seat_ids": seat_ids,
+        "expires_at": time.time() + ttl,
+    }
+    redis = get_redis()
+    keys = [seat_hold_key(showtime_id, sid) for sid in seat_ids] + [_hold_key(hold["hold_id"])]
+    taken = await redis.eval(_HOLD_LUA, len(keys), *keys, hold["hold_id"], ttl * 1000, json.dumps(hold))
+    if int(taken):
+        raise SeatHoldConflict(seat_ids[int(taken) - 1])
+    await redis.zadd(HOLD_EXPIRY_KEY, {_expiry_member(hold): hold["expires_at"]})
+    return hold
+
+
+async def get_hold(hold_id: str) -> Optional[Dict[str, Any]]:
+    raw = await get_redis().get(_hold_key(hold_id))
+    return json.loads(raw) if raw else None
+
+
+async def release_hold(hold: Dict[str, Any]):
+    """Drop a hold (after confirm or on explicit release)."""
+    redis = get_redis()
+    keys = [seat_hold_key(hold["showtime_id"], sid) for sid in hold["seat_ids"]] + [_hold_key(hold["hold_id"])]
+    await redis.eval(_RELEASE_LUA, len(keys), *keys, hold["hold_id"])
+    await redis.zrem(HOLD_EXPIRY_KEY, _expiry_member(hold))
+
+
+async def announce_released_hold_later(hold: Dict[str, Any]):
+    """Leave announcing a released hold's seats to the lock reaper's next sweep."""
+    await get_redis().zadd(HOLD_EXPIRY_KEY, {_expiry_member(hold): time.time()})
+
+
+async def apply_seat_holds(state: SeatState) -> SeatState:
+    """
+    Mark the available seats of `state` that are held in Redis as locked
+    (holds never touch the database, so a freshly loaded table misses them).
+    On a Redis error the table is left as loaded.
+    """
+    try:
+        held = await get_seat_holders(state.showtime_id, list(state.ids))
+    except Exception:
+        traceback.print_exc()
+        return state
+    state.set_status([sid for sid in held if state.status_of(sid) == "available"], "locked")
+    return state
+
+
+async def get_seat_holders(showtime_id: int, seat_ids: List[int]) -> Dict[int, str]:
+    """seat_id -> hold_id for the given seats that are currently held (one MGET)."""
+    if not seat_ids:
+        return {}
+    seat_ids = list(dict.fromkeys(seat_ids))
+    values = await get_redis().mget([seat_hold_key(showtime_id, sid) for sid in seat_ids])
+    return {sid: hold_id for sid, hold_id in zip(seat_ids, values) if hold_id}
@@ -0,0 +1,165 @@
+# app/services/seat_state.py
+import time
+from array import array
+from typing import Any, Dict, Iterable, List, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.models import Seat, SeatStatus
+from app.services.broadcast import seat_version_key
+from app.services.hall_layouts import get_layout
+from app.services.redis_client import get_redis
+from app.services.showtime_meta import get_showtime_meta
+
+# one status byte per seat
+AVAILABLE, LOCKED, BOOKED = 0, 1, 2
+STATUS_NAMES = ("available", "locked", "booked")
+STATUS_CODES = {name: code for code, name in enumerate(STATUS_NAMES)}
+
+
+class SeatState:
+    """
+    Compact in-memory seat table for one showtime.
+
+    Seats are stored column-wise in parallel arrays (ordered by row, number)
+    with a seat_id -> position index, so availability checks and pricing
+    for k seats are O(k) lookups instead of an ORM hydration of the hall.
+
+    `version` increases with every committed change. It is seeded from the
+    wall clock in milliseconds when the table is (re)built, so it keeps
+    increasing across worker restarts as long as a showtime commits fewer
+    than 1000 batches per second.
+    """
+
+    __slots__ = (
+        "showtime_id", "ids", "row_labels", "row_idx", "numbers", "prices", "status", "version",
+        "layout_cache", "_pos",
+    )
+
+    def __init__(self, showtime_id: int, seats: Iterable[Tuple[int, str, int, int, str]]):
+        self.showtime_id = showtime_id
+        self.ids = array("q")
+        self.row_labels: List[str] = []
+        self.row_idx = array("H")
+        self.numbers = array("H")
+        self.prices = array("l")
+        self.status = bytearray()
+        self.version = int(time.time() * 1000)
+        self.layout_cache = None  # encoded compact layout; geometry never changes for a table
+        self._pos: Dict[int, int] = {}
+
+        label_pos: Dict[str, int] = {}
+        for seat_id, row, number, price, status in seats:
+            if row not in label_pos:
+                label_pos[row] = len(self.row_labels)
+                self.row_labels.append(row)
+            self._pos[seat_id] = len(self.ids)
+            self.ids.append(seat_id)
+            self.row_idx.append(label_pos[row])
+            self.numbers.append(number)
+            self.prices.append(price)
+            self.status.append(STATUS_CODES[status])
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __contains__(self, seat_id: int) -> bool:
+        return seat_id in self._pos
+
+    def missing(self, seat_ids: Iterable[int]) -> List[int]:
+        return [sid for sid in seat_ids if sid not in self._pos]
+
+    def status_of(self, seat_id: int) -> str:
+        return STATUS_NAMES[self.status[self._pos[seat_id]]]
+
+    def unavailable(self, seat_ids: Iterable[int]) -> List[int]:
+        """Seat ids (all assumed present) that are not currently available."""
+        pos, status = self._pos, self.status
+        return [sid for sid in seat_ids if status[pos[sid]] != AVAILABLE]
+
+    def label(self, seat_id: int) -> str:
+        i = self._pos[seat_id]
+        return f"{self.row_labels[self.row_idx[i]]}{self.numbers[i]}"
+
+    def payload(self, seat_id: int) -> Dict[str, Any]:
+        """The seat as stored on a booking (price from the hall layout)."""
+        i = self._pos[seat_id]
+        return {"seat_id": seat_id, "row": self.row_labels[self.row_idx[i]], "number": self.numbers[i], "price": self.prices[i]}
+
+    def copy(self) -> "SeatState":
+        """Same seats and version with a private status vector (geometry is shared)."""
+        clone = SeatState.__new__(SeatState)
+        for name in SeatState.__slots__:
+            setattr(clone, name, getattr(self, name))
+        clone.status = bytearray(self.status)
+        return clone
+
+    def set_status(self, seat_ids: Iterable[int], status: str):
+        code = STATUS_CODES[status]
+        pos = self._pos
+        for sid in seat_ids:
+            i = pos.get(sid)
+            if i is not None:
+                self.status[i] = code
+
+
+    def counts(self) -> Dict[str, int]:
+        return {name: self.status.count(code) for code, name in enumerate(STATUS_NAMES)}
+
+    def seats(self) -> List[Dict[str, Any]]:
+        labels = self.row_labels
+        return [
+            {
+                "id": self.ids[i],
+                "row": labels[self.row_idx[i]],
+                "number": self.numbers[i],
+                "status": STATUS_NAMES[self.status[i]],
+                "price": self.prices[i],
+            }
+            for i in range(len(self.ids))
+        ]
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Full seat map at the current version (WebSocket snapshot frame)."""
+        return {
+            "type": "snapshot",
+            "showtime_id": self.showtime_id,
+            "version": self.version,
+            "seats": self.seats(),
+        }
+
+
+async def load_seat_state(db: AsyncSession, showtime_id: int) -> SeatState:
+    """
+    Build the seat table for a showtime: the cached hall layout supplies rows,
+    numbers and prices, the database only the showtime's status vector.
+    """
+    meta = await get_showtime_meta(db, showtime_id)
+    layout = await get_layout(db, meta.layout_id) if meta is not None and meta.layout_id is not None else None
+    if layout is None:
+        return SeatState(showtime_id, ())
+    q = await db.execute(
+        select(Seat.id, Seat.layout_seat_id, Seat.status).where(Seat.showtime_id == showtime_id)
+    )
+    placed = sorted((layout.seats[lsid], sid, status) for sid, lsid, status in q.all())
+    return SeatState(
+        showtime_id,
+        ((sid, row, number, price, status.value if isinstance(status, SeatStatus) else status)
+         for (_, row, number, _, price), sid, status in placed),
+    )
+
+
+async def load_published_seat_state(db: AsyncSession, showtime_id: int) -> SeatState:
+    """
+    Seat table for readers outside the booking worker. Its version is the
+    last one published for the showtime, read *before* the seats so it is a
+    lower bound: replaying any newer delta on top of it is always safe.
+    """
+    try:
+        version = int(await get_redis().get(seat_version_key(showtime_id)) or 0)
+    except Exception:
+        version = 0
+    state = await load_seat_state(db, showtime_id)
+    state.version = version
+    return state
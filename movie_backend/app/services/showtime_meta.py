@@ -0,0 +1,85 @@
+# app/services/showtime_meta.py
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional
+
+from cachetools import TTLCache
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.models import Movie, ShowTime
+
+
+@dataclass(frozen=True)
+class ShowtimeMeta:
+    """The showtime/movie fields a booking confirmation shows, detached from any session."""
+    showtime_id: int
+    movie_id: int
+    movie_title: str
+    start_time: datetime
+    hall: Optional[str]
+    layout_id: Optional[int]
+
+
+# showtime_id -> ShowtimeMeta; the TTL bounds how long another process's
+# edit to a showtime or movie can go unnoticed here
+_showtimes: TTLCache = TTLCache(maxsize=settings.SHOWTIME_META_CACHE_SIZE, ttl=settings.SHOWTIME_META_CACHE_TTL_SECONDS)
+
+
+async def get_showtime_meta(db: AsyncSession, showtime_id: int) -> Optional[ShowtimeMeta]:
+    """Cached metadata, loaded on a miss with one query on the caller's session (and transaction)."""
+    meta = _showtimes.get(showtime_id)
+    if meta is not None:
+        return meta
+    row = (await db.execute(
+        select(ShowTime.movie_id, Movie.title, ShowTime.start_time, ShowTime.hall, ShowTime.layout_id)
+        .join(Movie, ShowTime.movie_id == Movie.id)
+        .where(ShowTime.id == showtime_id)
+    )).first()
+    if row is None:
+        return None
+    meta = ShowtimeMeta(showtime_id, row.movie_id, row.title, row.start_time, row.hall, row.layout_id)
+    _showtimes[showtime_id] = meta
+    return meta
+
+
+def invalidate_showtime_meta(showtime_id: int):
+    _showtimes.pop(showtime_id, None)
+
+
+def invalidate_showtime_meta_on_commit(db: AsyncSession, showtime_id: int):
+    """
+    For Core updates of a showtime, which the ORM hooks below do not see: drop
+    the entry now, and again once the caller's transaction commits, since a
+    reader may cache the old committed row in between.
+    """
+    invalidate_showtime_meta(showtime_id)
+    db.sync_session.info.setdefault("stale_showtime_meta", set()).add(showtime_id)
+
+
+# ------------------------------------------------------------
+# 🔄 Invalidation hooks: ORM updates/deletes of a ShowTime or Movie, and Core
+#    updates registered above, once their transaction commits (this process)
+# ------------------------------------------------------------
+@event.listens_for(ShowTime, "after_update")
+@event.listens_for(ShowTime, "after_delete")
+def _showtime_modified(mapper, connection, target):
+    invalidate_showtime_meta(target.id)
+
+
+@event.listens_for(Movie, "after_update")
+@event.listens_for(Movie, "after_delete")
+def _movie_modified(mapper, connection, target):
+    for showtime_id, meta in list(_showtimes.items()):
+        if meta.movie_id == target.id:
+            invalidate_showtime_meta(showtime_id)
+
+
+@event.listens_for(Session, "after_commit")
+def _session_committed(session):
+    if session.in_nested_transaction():
+        return
+    for showtime_id in session.info.pop("stale_showtime_meta", ()):
+        invalidate_showtime_meta(showtime_id)
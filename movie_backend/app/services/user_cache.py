@@ -0,0 +1,65 @@
+# app/services/user_cache.py
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+
+from cachetools import TTLCache
+from sqlalchemy import event, inspect
+
+from app.core.config import settings
+from app.db.models import User
+
+
+@dataclass(frozen=True)
+class AuthUser:
+    """What request handlers need to know about the caller, detached from any session."""
+    id: int
+    email: str
+    name: Optional[str]
+    is_admin: bool = False
+    is_active: bool = True
+
+    @classmethod
+    def from_model(cls, user: User) -> "AuthUser":
+        return cls(
+            id=user.id,                                  #type: ignore
+            email=user.email,                            #type: ignore
+            name=user.name,                              #type: ignore
+            is_admin=bool(user.is_admin),
+            is_active=user.is_active is not False,
+        )
+
+    @classmethod
+    def from_claims(cls, payload: Dict[str, Any]) -> Optional["AuthUser"]:
+        """Identity embedded by create_access_token(user=...), or None for older tokens."""
+        if "user_id" not in payload or "is_admin" not in payload:
+            return None
+        return cls(id=int(payload["user_id"]), email=payload["sub"], name=payload.get("name"), is_admin=bool(payload["is_admin"]))
+
+
+# token subject (email) -> AuthUser; the TTL bounds how long another
+# process's change to a user can go unnoticed here
+_users: TTLCache = TTLCache(maxsize=settings.AUTH_USER_CACHE_SIZE, ttl=settings.AUTH_USER_CACHE_TTL_SECONDS)
+
+
+def get_cached_user(email: str) -> Optional[AuthUser]:
+    return _users.get(email)
+
+
+def cache_user(user: AuthUser):
+    _users[user.email] = user
+
+
+def invalidate_user(email: str):
+    _users.pop(email, None)
+
+
+# ------------------------------------------------------------
+# 🔄 Invalidation hooks: any ORM update/delete of a User in this process
+# ------------------------------------------------------------
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _user_modified(mapper, connection, target):
+    invalidate_user(target.email)
+    # the email itself may have changed: drop the old subject too
+    for old_email in inspect(target).attrs.email.history.deleted or ():
+        invalidate_user(old_email)
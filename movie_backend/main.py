@@ -2,13 +2,25 @@ from fastapi import FastAPI
 from contextlib import asynccontextmanager
 from fastapi.middleware.cors import CORSMiddleware
 
-from app.db.database import init_models
+from app.db.database import dispose_engines, init_models
+from app.db.replica import replica_monitor
+from app.core.security import shutdown_hash_executor
+from app.services.google_auth import google_certs
+from app.services.booking_pool import TicketPool
+from app.services.lock_reaper import SeatLockReaper
+from app.services.pool_cluster import PoolCluster
+from app.core.config import settings
+from app.services.broadcast import add_event_hook, start_listener, stop_listener
+from app.services.seat_cache import seat_cache
 
 from app.api.authRoute import router as auth_router
+from app.api.pagination import NEXT_CURSOR_HEADER
 from app.api.movieRoute import router as movieRouter
 from app.api.showtimeRoute import router as showtimeRouter
+from app.api.layoutRoute import router as layoutRouter
 from app.api.bookingRoute import router as bookingRouter
 from app.api.webSocketRoute import router as webSocketRouter
+from app.api.metricsRoute import router as metricsRouter
 
 # ✅ Allowed origins for dev (Frontend, Google login popup)
 origins = [
@@ -25,9 +37,40 @@ async def lifespan(app: FastAPI):
     print("🚀 Starting BookMyMovie backend...")
     await init_models()
     print("✅ Database models initialized successfully.")
+    # seat events from other processes patch this process's seat-map cache
+    add_event_hook(seat_cache.on_event)
+    start_listener()
+    print("✅ Seat update listener subscribed.")
+    # one TicketPool per process, shared by every route through get_ticket_pool
+    booking_pool = TicketPool()
+    app.state.ticket_pool = booking_pool
+    cluster = None
+    if settings.TICKETPOOL_DISTRIBUTED:
+        cluster = PoolCluster(booking_pool)
+        await cluster.start()
+        booking_pool.cluster = cluster
+        print(f"✅ Joined booking cluster as node {cluster.node_id}.")
+    booking_pool.start()
+    print("✅ Ticket pool started.")
+    reaper = SeatLockReaper(booking_pool)
+    await reaper.start()
+    print("✅ Seat-lock reaper started.")
+    google_certs.start()
+    replica_monitor.start()
     yield
     # Shutdown logic
     print("🛑 Shutting down BookMyMovie backend...")
+    await replica_monitor.stop()
+    await google_certs.stop()
+    await reaper.stop()
+    # let queued bookings finish, then stop the workers
+    await booking_pool.drain()
+    await booking_pool.stop()
+    if cluster is not None:
+        await cluster.stop()
+    await stop_listener()
+    shutdown_hash_executor()
+    await dispose_engines()
 
 # ✅ Create app instance with lifespan
 app = FastAPI(title="BookMyMovie API", lifespan=lifespan)
@@ -39,14 +82,17 @@ app.add_middleware(
     allow_credentials=True,  # Allow cookies / Authorization headers
     allow_methods=["*"],     # Allow GET, POST, PUT, DELETE, etc.
     allow_headers=["*"],     # Allow all headers including Authorization
+    expose_headers=[NEXT_CURSOR_HEADER],   # catalog pagination
 )
 
 # ✅ Routers
 app.include_router(auth_router)
 app.include_router(movieRouter)
 app.include_router(showtimeRouter)
+app.include_router(layoutRouter)
 app.include_router(bookingRouter)
 app.include_router(webSocketRouter)
+app.include_router(metricsRouter)
 
 @app.get("/")
 def read_root():
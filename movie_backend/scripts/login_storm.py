@@ -0,0 +1,108 @@
+# scripts/login_storm.py
+"""
+Login-storm benchmark: booking latency with and without hundreds of password
+logins in flight.
+
+Books seats of one showtime one at a time, first on a quiet server and then
+while `--logins` clients log in as fast as they can. With bcrypt off the event
+loop the two latency profiles should match; logins beyond
+PASSWORD_HASH_MAX_PENDING are answered 503 rather than queued.
+
+    uvicorn main:app --port 8000
+    python scripts/login_storm.py --showtime 1 --bookings 50 --logins 300
+
+The showtime needs 2 x --bookings free seats. Uses httpx (requirements-dev.txt).
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from collections import Counter
+
+import httpx
+
+
+def _summary(latencies):
+    ordered = sorted(latencies)
+    p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+    return (
+        f"n={len(ordered)} p50={statistics.median(ordered) * 1000:.1f}ms "
+        f"p95={p95 * 1000:.1f}ms max={ordered[-1] * 1000:.1f}ms"
+    )
+
+
+async def _token(client: httpx.AsyncClient, email: str, password: str) -> str:
+    r = await client.post("/auth/login", data={"username": email, "password": password})
+    if r.status_code == 401:
+        r = await client.post("/auth/signup", json={
+            "email": email, "password": password, "retype_password": password,
+            "first_name": "Storm", "last_name": "Bench",
+        })
+        r.raise_for_status()
+        return r.json()["token"]
+    r.raise_for_status()
+    return r.json()["access_token"]
+
+
+async def _free_seats(client: httpx.AsyncClient, showtime_id: int):
+    r = await client.get(f"/bookings/showtime/{showtime_id}/seats")
+    r.raise_for_status()
+    return [s["id"] for s in r.json() if s["status"] == "available"]
+
+
+async def _book(client: httpx.AsyncClient, headers, showtime_id: int, seat_ids, latencies):
+    for seat_id in seat_ids:
+        start = time.perf_counter()
+        r = await client.post("/bookings/", json={"showtime_id": showtime_id, "seat_ids": [seat_id]}, headers=headers)
+        latencies.append(time.perf_counter() - start)
+        if r.status_code != 200:
+            print(f"booking seat {seat_id}: {r.status_code} {r.text}")
+
+
+async def _login_loop(client: httpx.AsyncClient, email: str, password: str, stop: asyncio.Event, statuses: Counter):
+    while not stop.is_set():
+        try:
+            r = await client.post("/auth/login", data={"username": email, "password": password})
+            statuses[r.status_code] += 1
+        except httpx.HTTPError as e:
+            statuses[type(e).__name__] += 1
+
+
+async def main(args):
+    limits = httpx.Limits(max_connections=args.logins + 10, max_keepalive_connections=args.logins + 10)
+    async with httpx.AsyncClient(base_url=args.url, timeout=60, limits=limits) as client:
+        headers = {"Authorization": f"Bearer {await _token(client, args.email, args.password)}"}
+        seats = await _free_seats(client, args.showtime)
+        if len(seats) < 2 * args.bookings:
+            raise SystemExit(f"showtime {args.showtime} has {len(seats)} free seats, need {2 * args.bookings}")
+
+        quiet = []
+        await _book(client, headers, args.showtime, seats[:args.bookings], quiet)
+        print(f"bookings, quiet server:     {_summary(quiet)}")
+
+        stop = asyncio.Event()
+        statuses: Counter = Counter()
+        storm = [
+            asyncio.create_task(_login_loop(client, args.email, args.password, stop, statuses))
+            for _ in range(args.logins)
+        ]
+        await asyncio.sleep(1)  # let the storm build up
+        during = []
+        started = time.perf_counter()
+        await _book(client, headers, args.showtime, seats[args.bookings:2 * args.bookings], during)
+        elapsed = time.perf_counter() - started
+        stop.set()
+        await asyncio.gather(*storm)
+        print(f"bookings, {args.logins} logins in flight: {_summary(during)}")
+        print(f"logins: {dict(statuses)} ({statuses[200] / elapsed:.1f} successful/s)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--showtime", type=int, required=True)
+    parser.add_argument("--bookings", type=int, default=50)
+    parser.add_argument("--logins", type=int, default=300)
+    parser.add_argument("--email", default="login-storm@example.com")
+    parser.add_argument("--password", default="login-storm")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,182 @@
+# tests/conftest.py
+"""
+Test setup: SQLite (aiosqlite) stands in for Postgres and fakeredis for Redis,
+so the suite runs without any services:
+
+    pip install -r requirements-dev.txt
+    pytest
+
+`async def` tests run on one event loop shared by the whole session, since
+the engines, the Redis client and the app's background tasks are bound to
+the loop they were first used on.
+"""
+import asyncio
+import inspect
+import os
+import sqlite3
+import tempfile
+
+import pytest
+
+_TMP_DIR = tempfile.mkdtemp(prefix="bookmymovie-tests-")
+
+_DB_PATH = os.path.join(_TMP_DIR, "test.db")
+
+# must be set before app.core.config builds its Settings (they win over .env)
+os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{_DB_PATH}"
+os.environ["DATABASE_READ_URL"] = ""
+os.environ["REDIS_URL"] = "redis://localhost:6379/15"
+os.environ["GOOGLE_CLIENT_ID"] = "test-client-id"
+# no network in tests: the background cert refresh fails fast and is retried
+os.environ["GOOGLE_CERTS_URL"] = "http://127.0.0.1:9/certs"
+os.environ.setdefault("SECRET_KEY", "test-secret")
+os.environ.setdefault("ALGORITHM", "HS256")
+os.environ.setdefault("ACCESS_TOKEN_EXPIRE_MINUTES", "60")
+
+import fakeredis  # noqa: E402
+import httpx  # noqa: E402
+
+import app.services.redis_client as redis_client  # noqa: E402
+
+redis_client.redis_client = fakeredis.aioredis.FakeRedis(decode_responses=True)
+
+TEST_TIMEOUT_SECONDS = 60
+
+_loop = asyncio.new_event_loop()
+
+
+def run(coro):
+    """Run a coroutine on the session loop (for fixtures)."""
+    return _loop.run_until_complete(asyncio.wait_for(coro, TEST_TIMEOUT_SECONDS))
+
+
+@pytest.hookimpl(tryfirst=True)
+def pytest_pyfunc_call(pyfuncitem):
+    if not inspect.iscoroutinefunction(pyfuncitem.obj):
+        return None
+    kwargs = {name: pyfuncitem.funcargs[name] for name in pyfuncitem._fixtureinfo.argnames}
+    run(pyfuncitem.obj(**kwargs))
+    return True
+
+
+def pytest_sessionfinish(session, exitstatus):
+    if not _loop.is_closed():
+        _loop.run_until_complete(_loop.shutdown_asyncgens())
+        _loop.close()
+
+
+# ------------------------------------------------------------
+# 🧪 Fixtures
+# ------------------------------------------------------------
+@pytest.fixture(scope="session")
+def app():
+    """The FastAPI app with its lifespan (tables, TicketPool, reaper) running."""
+    import app.db.models  # noqa: F401  (register tables before init_models)
+    from main import app as fastapi_app
+
+    lifespan = fastapi_app.router.lifespan_context(fastapi_app)
+    run(lifespan.__aenter__())
+    yield fastapi_app
+    run(lifespan.__aexit__(None, None, None))
+
+
+@pytest.fixture(scope="session")
+def client(app):
+    client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test")
+    yield client
+    run(client.aclose())
+
+
+@pytest.fixture
+def sql_statements(app):
+    """Records the verb (SELECT, UPDATE, ...) of every statement sent to the database."""
+    from sqlalchemy import event
+    from app.db.database import booking_engine, engine
+
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        verb = statement.split()[0].upper()
+        # the SQLite engine sends BEGIN itself; asyncpg does it outside the cursor
+        if verb != "BEGIN":
+            statements.append(verb)
+
+    engines = {engine.sync_engine, booking_engine.sync_engine}
+    for eng in engines:
+        event.listen(eng, "before_cursor_execute", record)
+    yield statements
+    for eng in engines:
+        event.remove(eng, "before_cursor_execute", record)
+
+
+@pytest.fixture
+def make_user(app):
+    """Create a password user; returns (user, auth headers)."""
+    from app.core.security import create_access_token
+    from app.db.database import async_session
+    from app.db.models import User
+
+    async def factory(email: str, password: str = "x", is_admin: bool = False):
+        async with async_session() as db:
+            user = User(email=email, name=email.split("@")[0], password=password, is_admin=is_admin)
+            db.add(user)
+            await db.commit()
+            await db.refresh(user)
+        token = create_access_token({"sub": user.email, "name": user.name}, user=user)
+        return user, {"Authorization": f"Bearer {token}"}
+
+    return factory
+
+
+@pytest.fixture
+def make_showtime(app):
+    """Create a movie with one showtime of rows x cols seats; returns (showtime id, seat ids)."""
+    from datetime import datetime
+    from sqlalchemy import select
+    from app.db import crud
+    from app.db.database import async_session
+    from app.db.models import Seat
+
+    async def factory(rows=("A",), cols: int = 10, price: int = 150, title: str = "Test Movie"):
+        async with async_session() as db:
+            movie = await crud.create_movie(
+                db, title=title, description="d", poster_url="p", rating=8, release_date=datetime(2020, 1, 1)
+            )
+            showtime = await crud.create_showtime(db, movie.id, datetime(2030, 1, 1, 18, 0))
+            await crud.bulk_create_seats(db, showtime.id, list(rows), cols, price=price)
+            await db.commit()
+            seat_ids = (await db.scalars(
+                select(Seat.id).where(Seat.showtime_id == showtime.id).order_by(Seat.id)
+            )).all()
+            return showtime.id, list(seat_ids)
+
+    return factory
+
+
+@pytest.fixture
+def make_replica(app, monkeypatch):
+    """
+    Route replica reads to a second SQLite engine (pool "read") holding a copy
+    of the test database as of the call; later writes exist only on the primary.
+    """
+    from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+    from app.db import database, replica
+
+    engines = []
+
+    async def factory():
+        path = os.path.join(_TMP_DIR, f"replica-{len(engines)}.db")
+        with sqlite3.connect(_DB_PATH) as primary, sqlite3.connect(path) as copy:
+            primary.backup(copy)
+        monkeypatch.setitem(database.pool_stats, "read", None)   # so teardown drops the pool's stats again
+        eng = database._make_engine("read", 2, 0, url=f"sqlite+aiosqlite:///{path}")
+        engines.append(eng)
+        monkeypatch.setattr(replica, "read_engine", eng)
+        monkeypatch.setattr(replica, "read_session", async_sessionmaker(bind=eng, expire_on_commit=False, class_=AsyncSession))
+        monkeypatch.setattr(replica.replica_monitor, "healthy", True)
+        monkeypatch.setattr(replica.replica_monitor, "lag", 0.0)
+        return eng
+
+    yield factory
+    for eng in engines:
+        run(eng.dispose())
@@ -0,0 +1,161 @@
+# tests/test_booking_queries.py
+"""
+A booking is one TicketPool transaction: the seat claim and the booking rows,
+with the confirmation built from data the pool already holds. These tests pin
+the statement count so extra round trips show up as failures. Booked seats
+live in booking_seats, one row per seat, migrated from the old JSON column.
+"""
+import json
+
+import pytest
+from sqlalchemy import inspect, select, text, update
+from sqlalchemy.exc import IntegrityError
+
+from app.db.database import async_session, engine
+from app.db.migrations import migrate_booking_seats
+from app.db.models import Booking, BookingSeat, Seat, SeatStatus
+
+# claim the seats, insert the booking and its seats inside the request's savepoint,
+# then record the outcome (processed_requests) for the whole batch
+BOOKING_WRITES = ["SAVEPOINT", "UPDATE", "INSERT", "INSERT", "RELEASE", "INSERT"]
+
+
+async def test_first_booking_loads_showtime_once(client, make_user, make_showtime, sql_statements):
+    _, headers = await make_user("cold@example.com")
+    showtime_id, seat_ids = await make_showtime(cols=4)
+    assert (await client.get("/bookings/me", headers=headers)).status_code == 200   # resolves the caller once
+
+    sql_statements.clear()
+    r = await client.post("/bookings/", json={"showtime_id": showtime_id, "seat_ids": seat_ids[:1]}, headers=headers)
+    assert r.status_code == 200, r.text
+    # seat map, layout and showtime/movie metadata are read once, never per seat
+    reads = sql_statements[:-len(BOOKING_WRITES)]
+    assert sql_statements[-len(BOOKING_WRITES):] == BOOKING_WRITES
+    assert set(reads) == {"SELECT"} and len(reads) <= 4
+
+
+async def test_booking_is_one_transaction(client, make_user, make_showtime, sql_statements):
+    _, headers = await make_user("warm@example.com")
+    showtime_id, seat_ids = await make_showtime(cols=10, price=150)
+    r = await client.post("/bookings/", json={"showtime_id": showtime_id, "seat_ids": seat_ids[:1]}, headers=headers)
+    assert r.status_code == 200, r.text
+
+    sql_statements.clear()
+    r = await client.post("/bookings/", json={"showtime_id": showtime_id, "seat_ids": seat_ids[1:3]}, headers=headers)
+    assert r.status_code == 200, r.text
+    assert sql_statements == BOOKING_WRITES
+
+    body = r.json()
+    assert body["movie_title"] == "Test Movie"
+    assert body["hall"]
+    assert body["total_amount"] == 300
+    assert [s["seat_id"] for s in body["seats"]] == seat_ids[1:3]
+    assert all(s["price"] == 150 for s in body["seats"])
+
+
+async def test_rejected_booking_writes_nothing(client, make_user, make_showtime, sql_statements):
+    _, headers = await make_user("taken@example.com")
+    showtime_id, seat_ids = await make_showtime(cols=2)
+    r = await client.post("/bookings/", json={"showtime_id": showtime_id, "seat_ids": seat_ids[:1]}, headers=headers)
+    assert r.status_code == 200, r.text
+
+    sql_statements.clear()
+    r = await client.post("/bookings/", json={"showtime_id": showtime_id, "seat_ids": seat_ids[:1]}, headers=headers)
+    assert r.status_code == 400
+    # the worker's seat table rejects it before any statement is sent
+    assert sql_statements == []
+
+
+async def test_a_seat_belongs_to_one_booking(make_user, make_showtime):
+    user, _ = await make_user("unique-seat@example.com")
+    showtime_id, seat_ids = await make_showtime(cols=2)
+    async with async_session() as db:
+        first = Booking(user_id=user.id, showtime_id=showtime_id, total_amount=150)
+        second = Booking(user_id=user.id, showtime_id=showtime_id, total_amount=150)
+        db.add_all([first, second])
+        await db.flush()
+        db.add(BookingSeat(booking_id=first.id, seat_id=seat_ids[0], price=150))
+        await db.commit()
+
+        # even if two writers both saw the seat as free, only one booking gets it
+        db.add(BookingSeat(booking_id=second.id, seat_id=seat_ids[0], price=150))
+        with pytest.raises(IntegrityError):
+            await db.commit()
+
+
+async def _legacy_bookings(user_id: int, showtime_id: int, bookings):
+    """
+    Write bookings the way the old schema did (a JSON `bookings.seats` column,
+    seats still priced individually), then migrate them.
+    """
+    async with engine.begin() as conn:
+        await conn.execute(text("ALTER TABLE bookings ADD COLUMN seats JSON"))
+        await conn.execute(text("ALTER TABLE seats ADD COLUMN price INTEGER"))
+        await conn.execute(text("UPDATE seats SET price = 150"))
+        ids = []
+        for seats in bookings:
+            row = await conn.execute(
+                text(
+                    "INSERT INTO bookings (user_id, showtime_id, total_amount, status, created_at, seats) "
+                    "VALUES (:user_id, :showtime_id, :total, 'confirmed', CURRENT_TIMESTAMP, :seats) RETURNING id"
+                ),
+                {"user_id": user_id, "showtime_id": showtime_id,
+                 "total": sum(s.get("price", 150) for s in seats), "seats": json.dumps(seats)},
+            )
+            ids.append(row.scalar_one())
+        booked = [s["seat_id"] for seats in bookings for s in seats]
+        await conn.execute(update(Seat).where(Seat.id.in_(booked)).values(status=SeatStatus.booked))
+        await conn.run_sync(migrate_booking_seats)
+        await conn.execute(text("ALTER TABLE seats DROP COLUMN price"))
+    return ids
+
+
+async def _booking_seats(booking_ids):
+    async with async_session() as db:
+        rows = await db.execute(
+            select(BookingSeat.booking_id, BookingSeat.seat_id, BookingSeat.price)
+            .where(BookingSeat.booking_id.in_(booking_ids))
+            .order_by(BookingSeat.booking_id, BookingSeat.seat_id)
+        )
+        return [tuple(r) for r in rows]
+
+
+async def test_legacy_seats_are_migrated(make_user, make_showtime):
+    user, _ = await make_user("legacy@example.com")
+    showtime_id, seats = await make_showtime(cols=4, price=150)
+    first, second = await _legacy_bookings(user.id, showtime_id, [
+        [{"seat_id": seats[0], "row": "A", "number": 1, "price": 120}, {"seat_id": seats[1], "row": "A", "number": 2}],
+        # the old schema let a seat end up in two bookings; the earlier one keeps it
+        [{"seat_id": seats[1], "row": "A", "number": 2, "price": 150}, {"seat_id": seats[2], "row": "A", "number": 3, "price": 150}],
+    ])
+
+    assert await _booking_seats([first, second]) == [
+        (first, seats[0], 120),     # price snapshot kept
+        (first, seats[1], 150),     # no snapshot: the seat's current price
+        (second, seats[2], 150),
+    ]
+    async with engine.connect() as conn:
+        columns = await conn.run_sync(lambda c: {col["name"] for col in inspect(c).get_columns("bookings")})
+    assert "seats" not in columns
+
+
+async def test_migrated_booking_can_be_updated_and_cancelled(client, make_user, make_showtime):
+    user, headers = await make_user("legacy-edit@example.com")
+    showtime_id, seats = await make_showtime(cols=4, price=150)
+    [booking_id] = await _legacy_bookings(user.id, showtime_id, [
+        [{"seat_id": seats[0], "row": "A", "number": 1, "price": 120}, {"seat_id": seats[1], "row": "A", "number": 2, "price": 120}],
+    ])
+
+    r = await client.put(f"/bookings/{booking_id}/update", json={"new_seat_ids": [seats[0], seats[3]]}, headers=headers)
+    assert r.status_code == 200, r.text
+    r = await client.get(f"/bookings/{booking_id}", headers=headers)
+    assert [(s["seat_id"], s["price"]) for s in r.json()["seats"]] == [(seats[0], 120), (seats[3], 150)]
+    assert r.json()["total_amount"] == 270
+
+    r = await client.put(f"/bookings/{booking_id}/cancel", json={"seat_ids": [seats[0]]}, headers=headers)
+    assert r.status_code == 200, r.text
+    assert await _booking_seats([booking_id]) == [(booking_id, seats[3], 150)]
+
+    r = await client.get(f"/bookings/showtime/{showtime_id}/seats")
+    status = {s["id"]: s["status"] for s in r.json()}
+    assert [status[s] for s in seats] == ["available", "available", "available", "booked"]
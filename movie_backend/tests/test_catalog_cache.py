@@ -0,0 +1,77 @@
+# tests/test_catalog_cache.py
+"""
+Catalog responses are cached in-process with a strong ETag. Hits and 304s
+never touch the database; a catalog write, here or in another process,
+retires every cached response.
+"""
+from datetime import datetime
+
+from app.core.config import settings
+from app.db import crud
+from app.db.database import async_session, pool_stats
+from app.services.catalog_cache import CATALOG_VERSION_KEY
+from app.services.redis_client import get_redis
+
+
+async def _movie(title: str) -> int:
+    async with async_session() as db:
+        movie = await crud.create_movie(
+            db, title=title, description="d", poster_url="p", rating=8, release_date=datetime(2020, 1, 1)
+        )
+        await db.commit()
+        return movie.id
+
+
+async def test_matching_etag_is_answered_without_the_database(client, make_replica, sql_statements, monkeypatch):
+    # reads go to the replica even right after a catalog write
+    monkeypatch.setattr(settings, "READ_REPLICA_MAX_STALENESS_SECONDS", 0)
+    monkeypatch.setattr(settings, "READ_REPLICA_CHECK_INTERVAL_SECONDS", 0)
+    movie_id = await _movie("Cached")
+    await make_replica()
+    r = await client.get(f"/movie/{movie_id}")
+    assert r.status_code == 200
+    assert pool_stats["read"].checkouts == 1
+    etag = r.headers["ETag"]
+
+    sql_statements.clear()
+    r = await client.get(f"/movie/{movie_id}", headers={"If-None-Match": etag})
+    assert r.status_code == 304
+    assert r.headers["ETag"] == etag
+    r = await client.get(f"/movie/{movie_id}")
+    assert r.status_code == 200 and r.json()["title"] == "Cached"
+    # neither the 304 nor the hit checked out a connection
+    assert pool_stats["read"].checkouts == 1
+    assert sql_statements == []
+
+
+async def test_catalog_write_retires_cached_responses(client, make_user):
+    _, admin = await make_user("catalog-admin@example.com", is_admin=True)
+    movie_id = await _movie("Before")
+    r = await client.get(f"/movie/{movie_id}")
+    etag = r.headers["ETag"]
+
+    payload = {"title": "After", "description": "d", "poster_url": "p", "rating": 8, "release_date": "2020-01-01T00:00:00"}
+    r = await client.put(f"/movie/update/{movie_id}", json=payload, headers=admin)
+    assert r.status_code == 200, r.text
+
+    r = await client.get(f"/movie/{movie_id}", headers={"If-None-Match": etag})
+    assert r.status_code == 200
+    assert r.json()["title"] == "After"
+    assert r.headers["ETag"] != etag
+
+
+async def test_version_bump_from_another_process(client, monkeypatch):
+    monkeypatch.setattr(settings, "CATALOG_VERSION_CHECK_SECONDS", 0)
+    movie_id = await _movie("Elsewhere")
+    etag = (await client.get(f"/movie/{movie_id}")).headers["ETag"]
+
+    # another process renamed the movie and bumped the shared counter
+    async with async_session() as db:
+        movie = await crud.get_movie(db, movie_id)
+        movie.title = "Renamed"
+        await db.commit()
+    await get_redis().incr(CATALOG_VERSION_KEY)
+
+    r = await client.get(f"/movie/{movie_id}", headers={"If-None-Match": etag})
+    assert r.status_code == 200
+    assert r.json()["title"] == "Renamed"
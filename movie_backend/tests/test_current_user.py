@@ -0,0 +1,50 @@
+# tests/test_current_user.py
+"""
+get_current_user resolves the caller from the user cache or the database, so
+a deleted or deactivated user loses access. Embedded token claims skip that
+lookup only when AUTH_EMBED_USER_CLAIMS is on.
+"""
+from app.core.config import settings
+from app.core.security import create_access_token
+from app.db.database import async_session
+from app.db.models import User
+
+
+async def _delete(user_id: int):
+    async with async_session() as db:
+        await db.delete(await db.get(User, user_id))
+        await db.commit()
+
+
+async def test_deleted_user_is_rejected(client, make_user):
+    user, headers = await make_user("deleted@example.com")
+    assert (await client.get("/bookings/me", headers=headers)).status_code == 200
+
+    await _delete(user.id)
+    r = await client.get("/bookings/me", headers=headers)
+    assert r.status_code == 401
+
+
+async def test_inactive_user_is_rejected(client, make_user):
+    user, headers = await make_user("inactive@example.com")
+    assert (await client.get("/bookings/me", headers=headers)).status_code == 200
+
+    async with async_session() as db:
+        (await db.get(User, user.id)).is_active = False
+        await db.commit()
+    r = await client.get("/bookings/me", headers=headers)
+    assert r.status_code == 403
+    assert r.json()["detail"] == "Inactive user"
+
+
+async def test_embedded_claims_are_ignored_when_disabled(client, make_user, monkeypatch):
+    user, _ = await make_user("claims@example.com")
+    monkeypatch.setattr(settings, "AUTH_EMBED_USER_CLAIMS", True)
+    token = create_access_token({"sub": user.email, "name": user.name}, user=user)
+    headers = {"Authorization": f"Bearer {token}"}
+    await _delete(user.id)
+
+    # trusted while enabled: the token alone identifies the caller
+    assert (await client.get("/bookings/me", headers=headers)).status_code == 200
+    monkeypatch.setattr(settings, "AUTH_EMBED_USER_CLAIMS", False)
+    assert (await client.get("/bookings/me", headers=headers)).status_code == 401
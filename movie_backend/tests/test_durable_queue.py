@@ -0,0 +1,92 @@
+# tests/test_durable_queue.py
+"""
+TicketPool on the Redis Streams backend: a request redelivered after its
+worker died must be answered with its original outcome, not applied again.
+"""
+import pytest
+from sqlalchemy import select
+
+from app.core.config import settings
+from app.db.database import async_session
+from app.db.models import Booking
+from app.services.booking_pool import BookingRequest, TicketPool
+from conftest import run
+
+
+class WorkerCrash(Exception):
+    pass
+
+
+@pytest.fixture
+def durable_pools(app, monkeypatch):
+    """Two TicketPools on the durable backend (two processes); entries are reclaimable at once."""
+    monkeypatch.setattr(settings, "TICKETPOOL_QUEUE_BACKEND", "redis")
+    monkeypatch.setattr(settings, "TICKETPOOL_LEASE_SECONDS", 0)
+    pools = [TicketPool(), TicketPool()]
+    yield pools
+    for pool in pools:
+        run(pool.stop())
+
+
+async def _append_booking(pool: TicketPool, user_id: int, showtime_id: int, seat_ids):
+    req = BookingRequest(user_id, showtime_id, seat_ids, result_future=None)
+    fields = {k: v for k, v in vars(req).items() if k != "result_future"}
+    await pool.durable.append(showtime_id, req.request_id, "BookingRequest", fields, reply_to=pool.node_id)
+    return req.request_id
+
+
+async def _bookings(showtime_id: int):
+    async with async_session() as db:
+        return (await db.scalars(select(Booking.id).where(Booking.showtime_id == showtime_id))).all()
+
+
+async def test_crash_between_commit_and_store_is_not_applied_twice(durable_pools, make_user, make_showtime, monkeypatch):
+    first, second = durable_pools
+    user, _ = await make_user("durable@example.com")
+    showtime_id, seat_ids = await make_showtime(cols=4)
+    request_id = await _append_booking(first, user.id, showtime_id, seat_ids[:2])
+
+    # the first worker commits the batch and dies before storing the result or acking
+    async def crash(results):
+        raise WorkerCrash()
+
+    monkeypatch.setattr(first.durable, "store_results", crash)
+    entries = await first.durable.read(showtime_id, first.node_id, 10, block_ms=1)
+    with pytest.raises(WorkerCrash):
+        await first._process_entries(showtime_id, entries)
+    [booking_id] = await _bookings(showtime_id)
+    assert await second.durable.get_result(request_id) is None
+
+    # another worker reclaims the unacknowledged entry
+    reclaimed = await second.durable.claim_stale(showtime_id, second.node_id, 10)
+    assert [m["request_id"] for _, m in reclaimed] == [request_id]
+    await second._process_entries(showtime_id, reclaimed, reclaimed=True)
+
+    stored = await second.durable.get_result(request_id)
+    assert stored["result"]["success"] is True
+    assert stored["result"]["booking_id"] == booking_id
+    assert [s["seat_id"] for s in stored["result"]["seats"]] == seat_ids[:2]
+    assert await _bookings(showtime_id) == [booking_id]
+    assert await second.durable.backlog(showtime_id) == 0
+
+
+async def test_stored_result_is_answered_again(durable_pools, make_user, make_showtime, monkeypatch):
+    first, second = durable_pools
+    user, _ = await make_user("durable-ack@example.com")
+    showtime_id, seat_ids = await make_showtime(cols=4)
+    request_id = await _append_booking(first, user.id, showtime_id, seat_ids[:1])
+
+    # result stored, ack lost: the entry stays pending
+    async def lose_ack(showtime_id, entry_ids):
+        raise WorkerCrash()
+
+    monkeypatch.setattr(first.durable, "ack", lose_ack)
+    entries = await first.durable.read(showtime_id, first.node_id, 10, block_ms=1)
+    with pytest.raises(WorkerCrash):
+        await first._process_entries(showtime_id, entries)
+    original = (await first.durable.get_result(request_id))["result"]
+
+    reclaimed = await second.durable.claim_stale(showtime_id, second.node_id, 10)
+    await second._process_entries(showtime_id, reclaimed, reclaimed=True)
+    assert (await second.durable.get_result(request_id))["result"] == original
+    assert len(await _bookings(showtime_id)) == 1
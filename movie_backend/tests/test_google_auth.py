@@ -0,0 +1,184 @@
+# tests/test_google_auth.py
+"""
+Google ID-token verification against a local stand-in for Google's cert
+endpoint: keys are generated here and served from 127.0.0.1, no network.
+"""
+import asyncio
+import json
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from cryptography import x509
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from cryptography.x509.oid import NameOID
+from google.auth import crypt as google_crypt
+from google.auth import jwt as google_jwt
+
+from app.core.config import settings
+from app.services import google_auth
+from app.services.google_auth import GoogleCertCache, verify_google_id_token
+
+AUDIENCE = "test-client-id.apps.googleusercontent.com"
+
+
+def _make_key(kid: str):
+    """(kid, private key PEM, self-signed certificate PEM), like an entry of Google's v1 certs."""
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, kid)])
+    now = datetime.now(timezone.utc)
+    cert = (
+        x509.CertificateBuilder()
+        .subject_name(name)
+        .issuer_name(name)
+        .public_key(key.public_key())
+        .serial_number(x509.random_serial_number())
+        .not_valid_before(now - timedelta(days=1))
+        .not_valid_after(now + timedelta(days=1))
+        .sign(key, hashes.SHA256())
+    )
+    private_pem = key.private_bytes(
+        serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()
+    ).decode()
+    return kid, private_pem, cert.public_bytes(serialization.Encoding.PEM).decode()
+
+
+# RSA key generation is slow; every test shares these two
+KEY_1 = _make_key("key-1")
+KEY_2 = _make_key("key-2")
+
+
+def _token(key=KEY_1, **overrides) -> str:
+    kid, private_pem, _ = key
+    now = int(time.time())
+    claims = {
+        "iss": "https://accounts.google.com",
+        "aud": AUDIENCE,
+        "sub": "1234567890",
+        "email": "user@example.com",
+        "name": "Test User",
+        "iat": now,
+        "exp": now + 600,
+    }
+    claims.update(overrides)
+    signer = google_crypt.RSASigner.from_string(private_pem, key_id=kid)
+    return google_jwt.encode(signer, claims).decode()
+
+
+class _CertServer:
+    """Serves {kid: cert PEM} like https://www.googleapis.com/oauth2/v1/certs and counts fetches."""
+
+    def __init__(self, keys, max_age: int = 3600, delay: float = 0.0):
+        self.keys = list(keys)
+        self.max_age = max_age
+        self.delay = delay
+        self.fetches = 0
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                server.fetches += 1
+                time.sleep(server.delay)
+                body = json.dumps({kid: cert for kid, _, cert in server.keys}).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Cache-Control", f"public, max-age={server.max_age}")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}/oauth2/v1/certs"
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+@pytest.fixture
+def cert_server():
+    server = _CertServer([KEY_1])
+    yield server
+    server.close()
+
+
+@pytest.fixture
+def certs(cert_server, monkeypatch):
+    """A fresh cert cache pointed at the local server, used by verify_google_id_token."""
+    cache = GoogleCertCache(certs_url=cert_server.url)
+    monkeypatch.setattr(google_auth, "google_certs", cache)
+    return cache
+
+
+async def test_valid_token(certs, cert_server):
+    idinfo = await verify_google_id_token(_token(), AUDIENCE)
+    assert idinfo["email"] == "user@example.com"
+    assert idinfo["sub"] == "1234567890"
+    # the second sign-in is a local check against the cached certs
+    await verify_google_id_token(_token(), AUDIENCE)
+    assert cert_server.fetches == 1
+    assert certs.expires_at - certs.fetched_at == pytest.approx(3600)
+
+
+async def test_wrong_audience(certs):
+    with pytest.raises(ValueError):
+        await verify_google_id_token(_token(aud="someone-else.apps.googleusercontent.com"), AUDIENCE)
+
+
+async def test_wrong_issuer(certs):
+    with pytest.raises(ValueError, match="issuer"):
+        await verify_google_id_token(_token(iss="https://evil.example.com"), AUDIENCE)
+
+
+async def test_expired_token(certs):
+    now = int(time.time())
+    with pytest.raises(ValueError):
+        await verify_google_id_token(_token(iat=now - 7200, exp=now - 3600), AUDIENCE)
+
+
+async def test_token_signed_by_another_key(certs):
+    kid, _, _ = KEY_1
+    forged = (kid, KEY_2[1], KEY_1[2])  # claims key-1 but is signed with key-2's private key
+    with pytest.raises(ValueError):
+        await verify_google_id_token(_token(forged), AUDIENCE)
+
+
+async def test_unknown_kid_refetches_once(certs, cert_server):
+    await verify_google_id_token(_token(), AUDIENCE)
+    assert cert_server.fetches == 1
+
+    # a while later Google rotates keys before the cached certs expire
+    certs.fetched_at -= settings.GOOGLE_CERTS_MIN_REFRESH_SECONDS
+    cert_server.keys = [KEY_1, KEY_2]
+    idinfo = await verify_google_id_token(_token(KEY_2), AUDIENCE)
+    assert idinfo["email"] == "user@example.com"
+    assert cert_server.fetches == 2
+
+    # a kid Google never published cannot make every sign-in refetch
+    stranger = _make_key("key-unknown")
+    for _ in range(3):
+        with pytest.raises(ValueError):
+            await verify_google_id_token(_token(stranger), AUDIENCE)
+    assert cert_server.fetches == 2
+
+
+async def test_concurrent_logins_fetch_certs_once(certs, cert_server):
+    cert_server.delay = 0.2
+    results = await asyncio.gather(*(verify_google_id_token(_token(), AUDIENCE) for _ in range(20)))
+    assert all(r["email"] == "user@example.com" for r in results)
+    assert cert_server.fetches == 1
+
+
+async def test_expired_certs_are_refreshed(certs, cert_server):
+    cert_server.max_age = 0
+    await verify_google_id_token(_token(), AUDIENCE)
+    await verify_google_id_token(_token(), AUDIENCE)
+    assert cert_server.fetches == 2
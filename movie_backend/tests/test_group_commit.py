@@ -0,0 +1,141 @@
+# tests/test_group_commit.py
+"""
+TicketPool group commit: a batch is one transaction with a savepoint per
+request. A rejected request rolls back alone; a failed commit is replayed one
+request at a time; a commit that went through but raised is not reported twice.
+"""
+import asyncio
+
+import pytest
+from sqlalchemy import event, select, update
+from sqlalchemy.orm import Session
+
+from app.db.database import async_session
+from app.db.models import Booking, Seat, SeatStatus
+from app.services.booking_pool import BookingRequest, TicketPool
+from conftest import run
+
+
+class CommitFailed(Exception):
+    pass
+
+
+@pytest.fixture
+def pool(app):
+    pool = TicketPool(batch_size=16, batch_window_ms=0)
+    yield pool
+    run(pool.stop())
+
+
+@pytest.fixture
+def fail_next_commit():
+    """
+    Make the next outer commit raise: "before_commit" fails it before it
+    reaches the DB, "after_commit" raises once it went through (the outcome is
+    unknown). Savepoint releases fire the same events and are left alone.
+    """
+    installed = []
+
+    def install(when: str):
+        def fail(session):
+            if session.in_nested_transaction():
+                return
+            event.remove(Session, when, fail)
+            installed.remove((when, fail))
+            raise CommitFailed(when)
+
+        event.listen(Session, when, fail)
+        installed.append((when, fail))
+
+    yield install
+    for when, fail in installed:
+        event.remove(Session, when, fail)
+
+
+def _bookings(user_id, showtime_id, *seat_groups):
+    loop = asyncio.get_running_loop()
+    return [BookingRequest(user_id, showtime_id, list(seats), loop.create_future()) for seats in seat_groups]
+
+
+async def _seat_statuses(seat_ids):
+    async with async_session() as db:
+        rows = await db.execute(select(Seat.id, Seat.status).where(Seat.id.in_(seat_ids)))
+        return {seat_id: status.value for seat_id, status in rows}
+
+
+async def _booking_ids(showtime_id):
+    async with async_session() as db:
+        return (await db.scalars(select(Booking.id).where(Booking.showtime_id == showtime_id).order_by(Booking.id))).all()
+
+
+async def test_conflicting_request_fails_alone(pool, make_user, make_showtime):
+    user, _ = await make_user("batch-conflict@example.com")
+    showtime_id, seats = await make_showtime(cols=6)
+    # warm the worker's seat table, then book seat 3 behind its back so only the DB knows
+    warmup = _bookings(user.id, showtime_id, seats[5:6])
+    await pool._process_batch(showtime_id, warmup)
+    async with async_session() as db:
+        await db.execute(update(Seat).where(Seat.id == seats[3]).values(status=SeatStatus.booked))
+        await db.commit()
+
+    batch = _bookings(
+        user.id, showtime_id,
+        seats[0:2],              # ok
+        seats[1:2],              # taken earlier in the same batch: rejected from memory
+        [seats[2], seats[3]],    # claims seat 2, then the DB refuses seat 3: savepoint rolled back
+        seats[4:5],              # ok
+    )
+    await pool._process_batch(showtime_id, batch)
+    results = [req.result_future.result() for req in batch]
+
+    assert [r["success"] for r in results] == [True, False, False, True]
+    assert results[1]["message"] == results[2]["message"] == "some seats are no longer available"
+    statuses = await _seat_statuses(seats)
+    assert statuses[seats[2]] == "available"   # the partial claim did not survive
+    assert [statuses[s] for s in (seats[0], seats[1], seats[4])] == ["booked"] * 3
+    assert await _booking_ids(showtime_id) == [warmup[0].result_future.result()["booking_id"], results[0]["booking_id"], results[3]["booking_id"]]
+
+
+async def test_failed_commit_is_replayed_per_request(pool, make_user, make_showtime, fail_next_commit):
+    user, _ = await make_user("batch-replay@example.com")
+    showtime_id, seats = await make_showtime(cols=4)
+
+    fail_next_commit("before_commit")
+    batch = _bookings(user.id, showtime_id, seats[0:1], seats[1:3], seats[1:2])
+    await pool._process_batch(showtime_id, batch)
+    results = [req.result_future.result() for req in batch]
+
+    # nothing of the failed group commit stuck; the replay applied each request once
+    assert [r["success"] for r in results] == [True, True, False]
+    assert await _booking_ids(showtime_id) == sorted(r["booking_id"] for r in results[:2])
+    assert (await _seat_statuses(seats[:3])) == {s: "booked" for s in seats[:3]}
+
+
+async def test_ambiguous_commit_is_not_reported_twice(pool, make_user, make_showtime, fail_next_commit):
+    user, _ = await make_user("batch-ambiguous@example.com")
+    showtime_id, seats = await make_showtime(cols=4)
+
+    # the batch commits, but the worker only sees an error
+    fail_next_commit("after_commit")
+    batch = _bookings(user.id, showtime_id, seats[0:2], seats[2:3])
+    await pool._process_batch(showtime_id, batch)
+    results = [req.result_future.result() for req in batch]
+
+    # answered from the recorded outcome, not replayed into "no longer available"
+    assert [r["success"] for r in results] == [True, True]
+    assert await _booking_ids(showtime_id) == [results[0]["booking_id"], results[1]["booking_id"]]
+    assert [s["seat_id"] for s in results[0]["seats"]] == seats[0:2]
+
+
+async def test_repeated_seat_is_booked_and_announced_once(pool, make_user, make_showtime):
+    user, _ = await make_user("batch-repeat@example.com")
+    showtime_id, seats = await make_showtime(cols=2)
+    announced = []
+    pool._broadcast = lambda showtime_id, payload: announced.append(payload["seat_ids"])
+
+    batch = _bookings(user.id, showtime_id, [seats[0], seats[1], seats[0]])
+    await pool._process_batch(showtime_id, batch)
+    result = batch[0].result_future.result()
+
+    assert [s["seat_id"] for s in result["seats"]] == seats
+    assert announced == [seats]
@@ -0,0 +1,88 @@
+# tests/test_layout_migration.py
+"""
+migrate_seat_layouts on a database from before hall layouts: every seat's
+row, number and price end up on a shared layout, the seats table is rebuilt
+without them (SQLite), and seat ids - which bookings point at - are kept.
+"""
+import json
+
+from sqlalchemy import inspect, text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.db.database import Base
+from app.db.migrations import migrate_seat_layouts
+
+LEGACY_SEATS = """
+CREATE TABLE seats (
+    id INTEGER PRIMARY KEY,
+    showtime_id INTEGER NOT NULL REFERENCES showtimes(id) ON DELETE CASCADE,
+    "row" VARCHAR(4) NOT NULL,
+    number INTEGER NOT NULL,
+    price INTEGER NOT NULL,
+    status VARCHAR(9) NOT NULL,
+    locked_by INTEGER,
+    locked_until DATETIME,
+    CONSTRAINT uix_showtime_row_number UNIQUE (showtime_id, "row", number)
+)
+"""
+
+# showtime id -> hall, [(seat id, row, number, price, status)]
+LEGACY = {
+    1: ("Audi 1", [(11, "A", 1, 150, "available"), (12, "A", 2, 150, "booked"), (13, "B", 1, 250, "available")]),
+    2: ("Audi 1", [(21, "A", 1, 150, "booked"), (22, "A", 2, 150, "available"), (23, "B", 1, 250, "available")]),
+    3: ("Audi 2", [(31, "A", 1, 120, "available")]),
+}
+
+
+def _legacy_schema(conn):
+    tables = [t for t in Base.metadata.sorted_tables if t.name != "seats"]
+    Base.metadata.create_all(conn, tables=tables)
+    conn.execute(text(LEGACY_SEATS))
+    for showtime_id, (hall, seats) in LEGACY.items():
+        conn.execute(
+            text("INSERT INTO showtimes (id, movie_id, start_time, location, hall) VALUES (:id, 1, '2030-01-01 18:00:00', 'Pune', :hall)"),
+            {"id": showtime_id, "hall": hall},
+        )
+        conn.execute(
+            text('INSERT INTO seats (id, showtime_id, "row", number, price, status) VALUES (:id, :showtime_id, :row, :number, :price, :status)'),
+            [{"id": sid, "showtime_id": showtime_id, "row": r, "number": n, "price": p, "status": s} for sid, r, n, p, s in seats],
+        )
+
+
+async def test_legacy_seats_move_onto_layouts(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'legacy.db'}")
+    try:
+        async with engine.begin() as conn:
+            await conn.run_sync(_legacy_schema)
+            await conn.run_sync(migrate_seat_layouts)
+
+        async with engine.connect() as conn:
+            columns = await conn.run_sync(lambda c: {col["name"] for col in inspect(c).get_columns("seats")})
+            uniques = await conn.run_sync(lambda c: inspect(c).get_unique_constraints("seats"))
+            rows = (await conn.execute(text(
+                'SELECT s.id, s.showtime_id, ls."row", ls.number, ls.category, s.status, l.id, l.name, l.price_tiers '
+                "FROM seats s JOIN layout_seats ls ON ls.id = s.layout_seat_id JOIN hall_layouts l ON l.id = ls.layout_id "
+                "ORDER BY s.id"
+            ))).all()
+            showtime_layouts = dict((await conn.execute(text("SELECT id, layout_id FROM showtimes"))).all())
+    finally:
+        await engine.dispose()
+
+    assert {"row", "number", "price"}.isdisjoint(columns)
+    assert [u["column_names"] for u in uniques] == [["showtime_id", "layout_seat_id"]]
+
+    migrated = {
+        sid: (showtime_id, row, number, json.loads(tiers)[category], status)
+        for sid, showtime_id, row, number, category, status, _, _, tiers in rows
+    }
+    # same ids, same seats, same prices, same states
+    assert migrated == {
+        sid: (showtime_id, r, n, p, s)
+        for showtime_id, (_, seats) in LEGACY.items()
+        for sid, r, n, p, s in seats
+    }
+    categories = {(name, category) for _, _, _, _, category, _, _, name, _ in rows}
+    assert categories == {("Audi 1", "standard"), ("Audi 1", "tier_2"), ("Audi 2", "standard")}
+    # identical halls share one layout
+    assert showtime_layouts[1] == showtime_layouts[2] != showtime_layouts[3]
+    assert {layout_id for _, _, _, _, _, _, layout_id, _, _ in rows} == set(showtime_layouts.values())
@@ -0,0 +1,71 @@
+# tests/test_lock_reaper.py
+"""
+The reaper releases legacy seat locks (also those without an expiry) and
+announces lapsed holds; whatever it could not hand to the TicketPool goes
+back into the expiry index for the next sweep.
+"""
+import asyncio
+import time
+
+import pytest
+from sqlalchemy import update
+
+from app.db.database import async_session
+from app.db.models import Seat, SeatStatus
+from app.services.booking_pool import TicketPoolBusy
+from app.services.lock_reaper import LOCK_EXPIRY_KEY, SeatLockReaper
+from app.services.redis_client import get_redis
+from app.services.seat_holds import HOLD_EXPIRY_KEY
+
+
+class BusyPool:
+    """A TicketPool whose queues are all full."""
+
+    async def enqueue_release(self, showtime_id, seat_ids):
+        raise TicketPoolBusy("too many showtimes are being processed", 503, 1)
+
+    async def enqueue_hold_expired(self, showtime_id, seat_ids):
+        raise TicketPoolBusy("too many showtimes are being processed", 503, 1)
+
+
+async def _status(seat_id):
+    async with async_session() as db:
+        return (await db.get(Seat, seat_id)).status
+
+
+async def test_lock_without_expiry_is_released(app, make_user, make_showtime):
+    user, _ = await make_user("legacy-lock@example.com")
+    showtime_id, seats = await make_showtime(cols=2)
+    async with async_session() as db:
+        await db.execute(
+            update(Seat).where(Seat.id == seats[0]).values(status=SeatStatus.locked, locked_by=user.id, locked_until=None)
+        )
+        await db.commit()
+
+    reaper = SeatLockReaper(app.state.ticket_pool)
+    await reaper._index_existing_locks()
+    await reaper.reap_once()
+    # the app's own reaper may have swept it first: either way the seat is freed
+    for _ in range(100):
+        if await _status(seats[0]) == SeatStatus.available:
+            break
+        await asyncio.sleep(0.01)
+    assert await _status(seats[0]) == SeatStatus.available
+
+
+@pytest.mark.parametrize("key, member", [
+    (LOCK_EXPIRY_KEY, "999001:1"),
+    (HOLD_EXPIRY_KEY, "hold-busy|999001|1,2"),
+])
+async def test_busy_pool_puts_entries_back(key, member):
+    redis = get_redis()
+    # due only on the reaper's clock below, so the app's own reaper leaves it alone
+    due_at = time.time() + 3600
+    await redis.zadd(key, {member: due_at})
+    reaper = SeatLockReaper(BusyPool(), interval=5)
+    try:
+        reap = reaper._reap_locks if key == LOCK_EXPIRY_KEY else reaper._reap_holds
+        assert await reap(due_at + 1) == 1
+        assert await redis.zscore(key, member) == pytest.approx(due_at + 1 + 5)
+    finally:
+        await redis.zrem(key, member)
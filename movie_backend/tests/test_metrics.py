@@ -0,0 +1,15 @@
+# tests/test_metrics.py
+
+
+async def test_db_metrics_are_admin_only(client, make_user):
+    r = await client.get("/metrics/db")
+    assert r.status_code == 401
+
+    _, headers = await make_user("viewer@example.com")
+    r = await client.get("/metrics/db", headers=headers)
+    assert r.status_code == 403
+
+    _, headers = await make_user("ops@example.com", is_admin=True)
+    r = await client.get("/metrics/db", headers=headers)
+    assert r.status_code == 200
+    assert "default" in r.json()
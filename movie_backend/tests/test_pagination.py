@@ -0,0 +1,48 @@
+# tests/test_pagination.py
+import base64
+import json
+from datetime import datetime, timezone
+
+import pytest
+from fastapi import HTTPException
+
+from app.api.pagination import decode_cursor, encode_cursor
+
+
+def _raw_cursor(payload) -> str:
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).rstrip(b"=").decode()
+
+
+def test_cursor_round_trip():
+    key = (datetime(2030, 1, 1, 18, 0, tzinfo=timezone.utc), 42)
+    assert decode_cursor("upcoming", encode_cursor("upcoming", key), [datetime, int]) == key
+    assert decode_cursor("list", encode_cursor("list", (7,)), [int]) == (7,)
+    assert decode_cursor("list", None, [int]) is None
+
+
+@pytest.mark.parametrize("payload", [
+    ["upcoming", ["abc", 1]],                       # string where a datetime belongs
+    ["upcoming", [{"dt": "not a date"}, 1]],
+    ["upcoming", [{"dt": 5}, 1]],
+    ["upcoming", [{"dt": "2030-01-01T00:00:00"}, "1"]],
+    ["upcoming", [{"dt": "2030-01-01T00:00:00"}, True]],
+    ["upcoming", [{"dt": "2030-01-01T00:00:00"}]],  # wrong length
+    ["list", [1]],                                  # another listing's cursor
+])
+def test_mistyped_cursor_is_rejected(payload):
+    with pytest.raises(HTTPException) as exc:
+        decode_cursor("upcoming", _raw_cursor(payload), [datetime, int])
+    assert exc.value.status_code == 400
+
+
+def test_garbage_cursor_is_rejected():
+    for cursor in ("!!!", "e30", _raw_cursor({"a": 1})):
+        with pytest.raises(HTTPException):
+            decode_cursor("list", cursor, [int])
+
+
+async def test_catalog_rejects_mistyped_cursor(client):
+    r = await client.get("/movie/upcoming", params={"cursor": _raw_cursor(["upcoming", ["abc", 1]])})
+    assert r.status_code == 400
+    r = await client.get("/movie/top-rated", params={"cursor": _raw_cursor(["top-rated", [{"dt": "2030-01-01"}, 1]])})
+    assert r.status_code == 400
@@ -0,0 +1,64 @@
+# tests/test_password_hashing.py
+"""
+bcrypt runs on a bounded thread pool: the event loop keeps serving while a
+hash is in flight, and a full queue turns sign-ins away with 503 instead of
+letting them pile up.
+"""
+import asyncio
+import threading
+import time
+
+from app.core import security
+from app.core.config import settings
+from app.core.security import hash_password
+
+
+async def test_full_hash_queue_returns_503(client, make_user, monkeypatch):
+    monkeypatch.setattr(settings, "PASSWORD_HASH_MAX_PENDING", 2)
+    await make_user("storm@example.com", password=hash_password("secret"))
+    login = {"username": "storm@example.com", "password": "secret"}
+
+    # occupy every pending slot with work that waits until released
+    release = threading.Event()
+    blockers = [asyncio.create_task(security._run_hasher(release.wait, 10)) for _ in range(2)]
+    await asyncio.sleep(0)
+    try:
+        r = await client.post("/auth/login", data=login)
+        assert r.status_code == 503
+        assert r.headers["Retry-After"] == "1"
+
+        r = await client.post("/auth/signup", json={
+            "email": "new@example.com", "password": "pw", "retype_password": "pw",
+            "first_name": "New", "last_name": "User",
+        })
+        assert r.status_code == 503
+    finally:
+        release.set()
+        await asyncio.gather(*blockers)
+
+    r = await client.post("/auth/login", data=login)
+    assert r.status_code == 200, r.text
+    assert security._hash_pending == 0
+
+
+async def test_hashing_does_not_block_the_event_loop():
+    hashed = hash_password("secret")
+    gaps = []
+
+    async def ticker(stop: asyncio.Event):
+        last = time.perf_counter()
+        while not stop.is_set():
+            await asyncio.sleep(0.005)
+            now = time.perf_counter()
+            gaps.append(now - last)
+            last = now
+
+    stop = asyncio.Event()
+    tick = asyncio.create_task(ticker(stop))
+    results = await asyncio.gather(*(security.verify_password_async("secret", hashed) for _ in range(8)))
+    stop.set()
+    await tick
+
+    assert all(results)
+    # eight bcrypt rounds take far longer than any single pause of the loop
+    assert max(gaps) < 0.1
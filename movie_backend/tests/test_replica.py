@@ -0,0 +1,82 @@
+# tests/test_replica.py
+"""
+Read-replica routing with two SQLite engines: the "replica" is a copy of the
+test database, so rows written after the copy tell which engine served a read.
+"""
+from datetime import datetime
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.db import crud, replica
+from app.db.database import async_session, pool_stats
+from app.db.models import Movie
+from app.db.replica import open_read_session, replica_monitor
+
+
+async def _movie(title: str):
+    async with async_session() as db:
+        await crud.create_movie(db, title=title, description="d", poster_url="p", rating=8, release_date=datetime(2020, 1, 1))
+        await db.commit()
+
+
+async def _sees(title: str, **kwargs) -> bool:
+    async with open_read_session(**kwargs) as db:
+        return title in (await db.scalars(select(Movie.title))).all()
+
+
+async def test_replica_within_staleness_serves_reads(make_replica):
+    await make_replica()
+    await _movie("Written after the copy")
+    replica_monitor.lag = 3.0   # under READ_REPLICA_MAX_STALENESS_SECONDS
+
+    assert not await _sees("Written after the copy")
+    assert pool_stats["read"].checkouts == 1
+
+
+async def test_stale_replica_falls_back_to_primary(make_replica):
+    await make_replica()
+    await _movie("Not replayed yet")
+    replica_monitor.lag = 30.0
+
+    assert await _sees("Not replayed yet")
+    # a caller that tolerates the lag still reads the replica
+    assert not await _sees("Not replayed yet", max_staleness=60)
+    assert pool_stats["read"].checkouts == 1
+
+
+async def test_unreachable_replica_falls_back_to_primary(make_replica, monkeypatch):
+    healthy_engine = await make_replica()
+    await _movie("Replica is down")
+    down = create_async_engine("sqlite+aiosqlite:////nonexistent-dir/replica.db")
+    monkeypatch.setattr(replica, "read_engine", down)
+    monkeypatch.setattr(replica, "read_session", async_sessionmaker(bind=down, expire_on_commit=False, class_=AsyncSession))
+    try:
+        # the failed checkout marks the replica down, so later reads skip it at once
+        assert await _sees("Replica is down")
+        assert replica_monitor.healthy is False
+        await replica_monitor.check()
+        assert replica_monitor.healthy is False
+    finally:
+        await down.dispose()
+
+    # back up: the next health check routes reads to it again
+    monkeypatch.setattr(replica, "read_engine", healthy_engine)
+    monkeypatch.setattr(replica, "read_session", async_sessionmaker(bind=healthy_engine, expire_on_commit=False, class_=AsyncSession))
+    await replica_monitor.check()
+    assert replica_monitor.healthy is True
+    assert not await _sees("Replica is down")
+
+
+async def test_read_endpoint_follows_the_replica_lag(client, make_user, make_replica):
+    _, admin = await make_user("replica-admin@example.com", is_admin=True)
+    await make_replica()
+    layout = {"rows": ["A", "B"], "cols": 3, "price": 120}
+    r = await client.post("/layouts/", json={"name": "Replica Hall", "layout": layout}, headers=admin)
+    assert r.status_code == 200, r.text
+    layout_id = r.json()["id"]
+
+    # the replica has not seen the layout yet; once it is too far behind, reads go to the primary
+    assert (await client.get(f"/layouts/{layout_id}")).status_code == 404
+    replica_monitor.lag = 30.0
+    assert (await client.get(f"/layouts/{layout_id}")).status_code == 200
@@ -0,0 +1,86 @@
+# tests/test_seat_cache.py
+"""
+The seat-map cache is patched by the TicketPool after each commit, so a
+booking shows up in the cached map without reloading it from the database;
+a request that rolls back leaves the cached map (and its rendered body) alone.
+"""
+import pytest
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.services import seat_cache as seat_cache_module
+from app.services.booking_pool import TicketPool
+from app.services.seat_cache import seat_cache
+from conftest import run
+
+
+@pytest.fixture
+def pool(app):
+    pool = TicketPool(batch_size=16, batch_window_ms=0)
+    yield pool
+    run(pool.stop())
+
+
+@pytest.fixture
+def loads(monkeypatch):
+    """Showtime ids the seat cache (re)loaded from the database."""
+    loaded = []
+    load = seat_cache_module.load_published_seat_state
+
+    async def counting(db, showtime_id):
+        loaded.append(showtime_id)
+        return await load(db, showtime_id)
+
+    monkeypatch.setattr(seat_cache_module, "load_published_seat_state", counting)
+    return loaded
+
+
+async def _statuses(client, showtime_id):
+    r = await client.get(f"/bookings/showtime/{showtime_id}/seats")
+    assert r.status_code == 200, r.text
+    return [s["status"] for s in r.json()]
+
+
+async def test_booking_patches_the_cached_map(client, make_user, make_showtime, loads):
+    _, headers = await make_user("cache-patch@example.com")
+    showtime_id, seats = await make_showtime(cols=3)
+    assert await _statuses(client, showtime_id) == ["available"] * 3
+    assert loads == [showtime_id]
+    version = seat_cache._entries[showtime_id].state.version
+
+    r = await client.post("/bookings/", json={"showtime_id": showtime_id, "seat_ids": seats[1:]}, headers=headers)
+    assert r.status_code == 200, r.text
+    # already patched when the booking is answered, not by a reload
+    assert await _statuses(client, showtime_id) == ["available", "booked", "booked"]
+    assert seat_cache._entries[showtime_id].state.version > version
+    assert loads == [showtime_id]
+
+
+async def test_rolled_back_request_leaves_the_cache_alone(client, pool, make_user, make_showtime, loads):
+    user, _ = await make_user("cache-rollback@example.com")
+    showtime_id, seats = await make_showtime(cols=3)
+    assert (await pool.enqueue_booking(user.id, showtime_id, seats[:1]))["success"]
+    assert await _statuses(client, showtime_id) == ["booked", "available", "available"]
+    entry = seat_cache._entries[showtime_id]
+    version, body = entry.state.version, entry.rendered["seats"]
+
+    # rejected inside the batch: its savepoint rolls back
+    assert not (await pool.enqueue_booking(user.id, showtime_id, seats[:2]))["success"]
+
+    # the whole transaction fails, and so does its one-request replay
+    def fail(session):
+        if not session.in_nested_transaction():
+            raise RuntimeError("commit failed")
+
+    event.listen(Session, "before_commit", fail)
+    try:
+        result = await pool.enqueue_booking(user.id, showtime_id, seats[1:])
+    finally:
+        event.remove(Session, "before_commit", fail)
+    assert result == {"success": False, "message": "internal error"}
+
+    assert seat_cache._entries[showtime_id] is entry
+    assert entry.state.version == version
+    assert entry.rendered["seats"] is body
+    assert await _statuses(client, showtime_id) == ["booked", "available", "available"]
+    assert loads == [showtime_id]
@@ -0,0 +1,29 @@
+# tests/test_seat_codec.py
+"""
+Compact seat-map layout: the price index is one byte per seat, or two bytes
+big-endian once a showtime has more distinct prices than a byte can address.
+"""
+import base64
+
+import pytest
+
+from app.services.seat_codec import encode_layout
+from app.services.seat_state import SeatState
+
+
+def _decode_prices(layout):
+    index = base64.b64decode(layout["price_index"])
+    width = layout.get("price_index_width", 1)
+    tiers = layout["price_tiers"]
+    return [tiers[int.from_bytes(index[i:i + width], "big")] for i in range(0, len(index), width)]
+
+
+@pytest.mark.parametrize("count, width", [(256, 1), (300, 2)])
+def test_price_index_round_trips(count, width):
+    prices = [100 + (i * 7) % count for i in range(count)]
+    state = SeatState(1, ((i + 1, "A", i + 1, price, "available") for i, price in enumerate(prices)))
+
+    layout = encode_layout(state)
+    assert len(layout["price_tiers"]) == count
+    assert layout.get("price_index_width", 1) == width
+    assert _decode_prices(layout) == prices
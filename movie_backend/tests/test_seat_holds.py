@@ -0,0 +1,101 @@
+# tests/test_seat_holds.py
+"""
+Checkout holds live in Redis: hold -> confirm books through the TicketPool,
+a lapsed hold cannot be confirmed, and a released hold frees its seats.
+"""
+import asyncio
+
+from app.core.config import settings
+from app.services.booking_pool import TicketPoolBusy
+from app.services.redis_client import get_redis
+from app.services.seat_holds import HOLD_EXPIRY_KEY
+
+
+async def _hold(client, headers, showtime_id, seat_ids):
+    r = await client.post("/bookings/holds", json={"showtime_id": showtime_id, "seat_ids": seat_ids}, headers=headers)
+    assert r.status_code == 200, r.text
+    return r.json()["hold_id"]
+
+
+async def _statuses(client, showtime_id):
+    r = await client.get(f"/bookings/showtime/{showtime_id}/seats")
+    return {s["id"]: s["status"] for s in r.json()}
+
+
+async def test_hold_then_confirm(client, make_user, make_showtime):
+    _, headers = await make_user("hold-confirm@example.com")
+    _, other = await make_user("hold-other@example.com")
+    showtime_id, seats = await make_showtime(cols=4)
+    hold_id = await _hold(client, headers, showtime_id, seats[:2])
+
+    # held seats can be neither held nor booked by anyone else
+    r = await client.post("/bookings/holds", json={"showtime_id": showtime_id, "seat_ids": seats[1:3]}, headers=other)
+    assert r.status_code == 409
+    r = await client.post("/bookings/", json={"showtime_id": showtime_id, "seat_ids": seats[:1]}, headers=other)
+    assert r.status_code == 400
+
+    r = await client.post(f"/bookings/holds/{hold_id}/confirm", headers=headers)
+    assert r.status_code == 200, r.text
+    assert [s["seat_id"] for s in r.json()["seats"]] == seats[:2]
+    statuses = await _statuses(client, showtime_id)
+    assert [statuses[s] for s in seats[:2]] == ["booked", "booked"]
+
+    # the hold is used up
+    r = await client.post(f"/bookings/holds/{hold_id}/confirm", headers=headers)
+    assert r.status_code == 404
+
+
+async def test_expired_hold_cannot_be_confirmed(client, make_user, make_showtime, monkeypatch):
+    monkeypatch.setattr(settings, "SEAT_HOLD_SECONDS", 1)
+    _, headers = await make_user("hold-expired@example.com")
+    showtime_id, seats = await make_showtime(cols=2)
+    hold_id = await _hold(client, headers, showtime_id, seats[:1])
+
+    await asyncio.sleep(1.1)
+    r = await client.post(f"/bookings/holds/{hold_id}/confirm", headers=headers)
+    assert r.status_code == 404
+    assert r.json()["detail"] == "Hold not found or expired"
+    # nothing was booked: once the reaper announces the lapsed hold, the seat is free again
+    for _ in range(300):
+        if (await _statuses(client, showtime_id))[seats[0]] == "available":
+            break
+        await asyncio.sleep(0.01)
+    assert (await _statuses(client, showtime_id))[seats[0]] == "available"
+    await _hold(client, headers, showtime_id, seats[:1])
+
+
+async def test_release_frees_the_seats(client, make_user, make_showtime):
+    _, headers = await make_user("hold-release@example.com")
+    _, other = await make_user("hold-release-other@example.com")
+    showtime_id, seats = await make_showtime(cols=2)
+    hold_id = await _hold(client, headers, showtime_id, seats)
+
+    r = await client.delete(f"/bookings/holds/{hold_id}", headers=other)
+    assert r.status_code == 404   # not theirs
+    r = await client.delete(f"/bookings/holds/{hold_id}", headers=headers)
+    assert r.status_code == 200, r.text
+
+    r = await client.post("/bookings/", json={"showtime_id": showtime_id, "seat_ids": seats}, headers=other)
+    assert r.status_code == 200, r.text
+
+
+async def test_release_while_pool_is_busy(app, client, make_user, make_showtime, monkeypatch):
+    _, headers = await make_user("hold-busy@example.com")
+    showtime_id, seats = await make_showtime(cols=2)
+    hold_id = await _hold(client, headers, showtime_id, seats[:1])
+
+    async def busy(showtime_id, seat_ids):
+        raise TicketPoolBusy("booking service is shutting down, please retry", 503, 1)
+
+    monkeypatch.setattr(app.state.ticket_pool, "enqueue_hold_expired", busy)
+    r = await client.delete(f"/bookings/holds/{hold_id}", headers=headers)
+    assert r.status_code == 503
+    assert r.headers["Retry-After"] == "1"
+    # released in Redis; the reaper announces the seats on a later sweep (and keeps
+    # putting the entry back while the pool is busy)
+    member = f"{hold_id}|{showtime_id}|{seats[0]}"
+    for _ in range(100):
+        if await get_redis().zscore(HOLD_EXPIRY_KEY, member) is not None:
+            break
+        await asyncio.sleep(0.01)
+    assert await get_redis().zscore(HOLD_EXPIRY_KEY, member) is not None
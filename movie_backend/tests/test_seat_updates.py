@@ -0,0 +1,80 @@
+# tests/test_seat_updates.py
+"""
+Seat-map WebSocket catch-up: a client reconnecting with ?since=<version> is
+replayed the seats_delta frames it missed while they are still in the ring,
+and gets a snapshot otherwise.
+"""
+import asyncio
+import json
+
+import pytest
+
+from app.core.config import settings
+from app.services import broadcast
+from app.services.broadcast import register_ws, unregister_ws
+
+
+class FakeSocket:
+    def __init__(self):
+        self.sent = []
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, frame: str):
+        self.sent.append(json.loads(frame))
+
+
+async def _snapshot():
+    return json.dumps({"type": "snapshot"})
+
+
+async def _book(client, headers, showtime_id, seat_ids):
+    """Book, then wait until the listener has put the resulting delta in the ring; returns its version."""
+    ring = broadcast._recent.get(showtime_id)
+    newest = ring[-1][0] if ring else None
+    r = await client.post("/bookings/", json={"showtime_id": showtime_id, "seat_ids": seat_ids}, headers=headers)
+    assert r.status_code == 200, r.text
+    for _ in range(300):
+        ring = broadcast._recent.get(showtime_id)
+        if ring and ring[-1][0] != newest:
+            return ring[-1][0]
+        await asyncio.sleep(0.01)
+    pytest.fail("seat delta never reached the listener")
+
+
+async def _reconnect(showtime_id, since):
+    ws = FakeSocket()
+    await register_ws(showtime_id, ws, snapshot=_snapshot, since=since)
+    unregister_ws(showtime_id, ws)
+    return ws.sent
+
+
+async def test_reconnect_replays_missed_deltas(client, make_user, make_showtime):
+    _, headers = await make_user("replay@example.com")
+    showtime_id, seats = await make_showtime(cols=6)
+    first = await _book(client, headers, showtime_id, seats[0:1])
+    second = await _book(client, headers, showtime_id, seats[1:3])
+    third = await _book(client, headers, showtime_id, seats[3:4])
+    assert first < second < third
+
+    sent = await _reconnect(showtime_id, since=first)
+    assert [f["type"] for f in sent] == ["seats_delta", "seats_delta"]
+    assert [f["version"] for f in sent] == [second, third]
+    assert [f["changes"]["booked"] for f in sent] == [seats[1:3], seats[3:4]]
+
+    # up to date: nothing to send, and no snapshot either
+    assert await _reconnect(showtime_id, since=third) == []
+    # older than anything this process has seen (e.g. from before it started listening)
+    assert await _reconnect(showtime_id, since=first - 1) == [{"type": "snapshot"}]
+
+
+async def test_reconnect_too_far_behind_gets_a_snapshot(client, make_user, make_showtime, monkeypatch):
+    monkeypatch.setattr(settings, "WS_REPLAY_FRAMES", 2)
+    _, headers = await make_user("replay-old@example.com")
+    showtime_id, seats = await make_showtime(cols=4)
+    versions = [await _book(client, headers, showtime_id, [seat]) for seat in seats[:3]]
+
+    # the ring keeps the last two deltas: the first one is gone
+    assert await _reconnect(showtime_id, since=versions[0]) == [{"type": "snapshot"}]
+    assert [f["version"] for f in await _reconnect(showtime_id, since=versions[1])] == [versions[2]]
@@ -0,0 +1,78 @@
+# tests/test_showtimes.py
+from datetime import datetime
+
+import pytest
+
+from app.db import crud
+from app.db.database import async_session
+
+
+@pytest.fixture
+def admin(make_user):
+    async def factory():
+        _, headers = await make_user(f"admin-{datetime.now().timestamp()}@example.com", is_admin=True)
+        async with async_session() as db:
+            movie = await crud.create_movie(
+                db, title="Layout Movie", description="d", poster_url="p", rating=7, release_date=datetime(2020, 1, 1)
+            )
+            await db.commit()
+            return movie.id, headers
+
+    return factory
+
+
+@pytest.mark.parametrize("params", [
+    {"cols": 0},
+    {"cols": 201},
+    {"price": -1},
+    {"rows": ""},
+    {"rows": " , ,"},
+])
+async def test_create_showtime_rejects_bad_layout(client, admin, params):
+    movie_id, headers = await admin()
+    r = await client.post(
+        f"/movie/{movie_id}/showtimes",
+        params={"start_time": "2030-02-01T18:00:00", **params},
+        headers=headers,
+    )
+    assert r.status_code == 422, r.text
+
+
+async def test_create_showtime_with_grid(client, admin):
+    movie_id, headers = await admin()
+    r = await client.post(
+        f"/movie/{movie_id}/showtimes",
+        params={"start_time": "2030-02-01T18:00:00", "rows": "A, B", "cols": 3, "price": 120},
+        headers=headers,
+    )
+    assert r.status_code == 200, r.text
+    seats = (await client.get(f"/bookings/showtime/{r.json()['id']}/seats")).json()
+    assert [(s["row"], s["number"]) for s in seats] == [("A", 1), ("A", 2), ("A", 3), ("B", 1), ("B", 2), ("B", 3)]
+    assert {s["price"] for s in seats} == {120}
+
+
+@pytest.mark.parametrize("params", [{}, {"format": "compact"}])
+async def test_seat_map_of_unknown_showtime_is_404(client, params):
+    r = await client.get("/bookings/showtime/999999/seats", params=params)
+    assert r.status_code == 404
+    # same answer as the availability endpoint
+    r = await client.get("/showtimes/999999/seats", params=params)
+    assert r.status_code == 404
+
+
+async def test_seats_added_after_a_seat_map_read_are_served(client, admin):
+    movie_id, _ = await admin()
+    async with async_session() as db:
+        showtime = await crud.create_showtime(db, movie_id, datetime(2030, 3, 1, 18, 0))
+        await db.commit()
+    # caches the showtime's metadata while it has no layout yet
+    assert (await client.get(f"/bookings/showtime/{showtime.id}/seats")).status_code == 404
+
+    async with async_session() as db:
+        await crud.bulk_create_seats(db, showtime.id, ["A"], 2, price=150)
+        # read while the layout is not committed yet
+        assert (await client.get(f"/bookings/showtime/{showtime.id}/seats")).status_code == 404
+        await db.commit()
+    r = await client.get(f"/bookings/showtime/{showtime.id}/seats")
+    assert r.status_code == 200, r.text
+    assert len(r.json()) == 2
@@ -0,0 +1,113 @@
+# tests/test_ticket_pool_limits.py
+"""
+TicketPool admission control with tiny limits: a full showtime queue answers
+429, a pool at its worker cap with no idle worker answers 503 (Retry-After
+from the soonest drain), and idle workers retire or make room for others.
+"""
+import asyncio
+
+import pytest
+
+from app.api.deps import get_ticket_pool
+from app.core.config import settings
+from app.services.booking_pool import TicketPool, TicketPoolBusy
+from conftest import run
+
+
+@pytest.fixture
+def pool(app, monkeypatch):
+    monkeypatch.setattr(settings, "TICKETPOOL_QUEUE_CAPACITY", 2)
+    monkeypatch.setattr(settings, "TICKETPOOL_MAX_WORKERS", 2)
+    pool = TicketPool(batch_size=1, batch_window_ms=0)
+    yield pool
+    run(pool.stop())
+
+
+@pytest.fixture
+def gate(pool):
+    """Hold every batch of the pool until the returned event is set."""
+    opened = asyncio.Event()
+    apply_batch = pool._apply_batch
+
+    async def held(showtime_id, reqs):
+        await opened.wait()
+        return await apply_batch(showtime_id, reqs)
+
+    pool._apply_batch = held
+    yield opened
+    opened.set()
+
+
+async def _busy(pool, user_id, showtime_id, seat_ids):
+    """Start a booking and wait until its worker has taken it off the queue."""
+    task = asyncio.create_task(pool.enqueue_booking(user_id, showtime_id, seat_ids))
+    for _ in range(100):
+        if showtime_id in pool._active:
+            return task
+        await asyncio.sleep(0.01)
+    pytest.fail("worker never picked up the booking")
+
+
+async def test_full_queue_answers_429(pool, gate, make_user, make_showtime):
+    user, _ = await make_user("pool-queue@example.com")
+    showtime_id, seats = await make_showtime(cols=4)
+    running = await _busy(pool, user.id, showtime_id, seats[:1])
+    queued = [asyncio.create_task(pool.enqueue_booking(user.id, showtime_id, [seat])) for seat in seats[1:3]]
+    await asyncio.sleep(0)
+
+    with pytest.raises(TicketPoolBusy) as exc:
+        await pool.enqueue_booking(user.id, showtime_id, seats[3:])
+    assert exc.value.status_code == 429
+    assert exc.value.retry_after >= 1
+
+    # internal requests are never shed
+    release = asyncio.create_task(pool.enqueue_release(showtime_id, seats[3:]))
+    gate.set()
+    results = await asyncio.gather(running, *queued, release)
+    assert all(r["success"] for r in results)
+
+
+async def test_worker_cap_answers_503_with_retry_after(app, client, pool, gate, make_user, make_showtime):
+    user, headers = await make_user("pool-cap@example.com")
+    busy = []
+    for _ in range(2):
+        showtime_id, seats = await make_showtime(cols=1)
+        busy.append(await _busy(pool, user.id, showtime_id, seats))
+    showtime_id, seats = await make_showtime(cols=1)
+
+    app.dependency_overrides[get_ticket_pool] = lambda: pool
+    try:
+        r = await client.post("/bookings/", json={"showtime_id": showtime_id, "seat_ids": seats}, headers=headers)
+    finally:
+        app.dependency_overrides.pop(get_ticket_pool)
+    assert r.status_code == 503
+    assert r.json()["detail"] == "booking service is at capacity, please retry"
+    assert int(r.headers["Retry-After"]) >= 1
+    assert showtime_id not in pool.workers
+
+    gate.set()
+    assert all(r["success"] for r in await asyncio.gather(*busy))
+    # both workers are idle now: the least recently used one makes room
+    first = min(pool.workers, key=pool._last_used.__getitem__)
+    assert (await pool.enqueue_booking(user.id, showtime_id, seats))["success"]
+    assert showtime_id in pool.workers and first not in pool.workers
+    assert len(pool.workers) == 2
+
+
+async def test_idle_worker_retires(pool, make_user, make_showtime, monkeypatch):
+    monkeypatch.setattr(settings, "TICKETPOOL_WORKER_IDLE_SECONDS", 0.2)
+    user, _ = await make_user("pool-idle@example.com")
+    showtime_id, seats = await make_showtime(cols=2)
+    assert (await pool.enqueue_booking(user.id, showtime_id, seats[:1]))["success"]
+    assert showtime_id in pool.workers
+
+    for _ in range(100):
+        if showtime_id not in pool.workers:
+            break
+        await asyncio.sleep(0.01)
+    assert showtime_id not in pool.workers
+    assert showtime_id not in pool.queues and showtime_id not in pool.seat_states
+
+    # the next request starts a fresh worker (which reloads the seats)
+    assert not (await pool.enqueue_booking(user.id, showtime_id, seats[:1]))["success"]
+    assert (await pool.enqueue_booking(user.id, showtime_id, seats[1:]))["success"]
@@ -1,4 +1,4 @@
-import React, { useEffect, useState, useMemo } from "react";
+import React, { useEffect, useState, useMemo, useRef } from "react";
 import { useParams, useLocation, useNavigate } from "react-router-dom";
 import { useAuth } from "../Context/AuthContext";
 import {
@@ -28,9 +28,12 @@ const SeatSelection = () => {
   const [seats, setSeats] = useState([]);
   const [selected, setSelected] = useState([]);
   const [loading, setLoading] = useState(true);
+  const [wsEpoch, setWsEpoch] = useState(0); // bumped to reconnect the seat socket
+  const versionRef = useRef(null); // seat-map version of the last snapshot/delta applied
 
   // 🧩 Fetch seat map
   useEffect(() => {
+    versionRef.current = null; // another showtime: start from a snapshot
     const fetchSeats = async () => {
       try {
         const res = await getShowtimeSeatsForBooking(showtime_id);
@@ -53,27 +56,37 @@ const SeatSelection = () => {
   useEffect(() => {
     if (!showtime_id || loading) return;
 
-    const ws = new WebSocket(`ws://localhost:8000/ws/showtime/${showtime_id}`);
+    // reconnecting with ?since= replays the missed deltas (or sends a snapshot if too far behind)
+    const since = versionRef.current != null ? `?since=${versionRef.current}` : "";
+    const ws = new WebSocket(`ws://localhost:8000/ws/showtime/${showtime_id}${since}`);
+    const applyChanges = (changes) =>
+      setSeats((prev) =>
+        prev.map((s) => {
+          for (const [status, ids] of Object.entries(changes)) {
+            if (STATUS[status] && ids.includes(s.id)) return { ...s, status };
+          }
+          return s;
+        })
+      );
+
     ws.onopen = () => console.log("✅ WebSocket connected (SeatSelection)");
     ws.onmessage = (event) => {
       try {
         const data = JSON.parse(event.data);
-        if (data.type === "seats_updated" && data.showtime_id === Number(showtime_id)) {
-          setSeats((prev) =>
-            prev.map((s) =>
-              data.seat_ids.includes(s.id)
-                ? {
-                  ...s,
-                  status:
-                    data.status === "available"
-                      ? "available"
-                      : data.status === "booked"
-                        ? "booked"
-                        : s.status,
-                }
-                : s
-            )
-          );
+        if (data.showtime_id !== Number(showtime_id)) return;
+
+        if (data.type === "snapshot") {
+          versionRef.current = data.version;
+          setSeats(data.seats);
+        } else if (data.type === "seats_delta" || data.type === "seats_updated") {
+          // deltas already contained in the snapshot (or replayed twice) are skipped
+          const version = versionRef.current;
+          if (data.version != null && version != null && data.version <= version) return;
+          if (data.version != null) versionRef.current = data.version;
+          applyChanges(data.changes || { [data.status]: data.seat_ids });
+        } else if (data.type === "resync") {
+          // we fell behind: reconnect from the last version we applied
+          setWsEpoch((n) => n + 1);
         }
       } catch (err) {
         console.error("⚠️ WebSocket message parse error:", err);
@@ -83,7 +96,7 @@ const SeatSelection = () => {
     ws.onerror = (err) => console.error("⚠️ WebSocket error:", err);
 
     return () => ws.close();
-  }, [showtime_id, loading]);
+  }, [showtime_id, loading, wsEpoch]);
 
   // 🧮 Build seat map
   const seatMap = useMemo(() => {